@@ -0,0 +1,169 @@
+import mmap
+import os
+import struct
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, Mapping, Optional, Union
+from lft.consensus.messages.data import Data
+from lft.serialization import Serializer
+
+__all__ = ("CommitStore", )
+
+SEGMENT_NAME = "commits.seg"
+INDEX_NAME = "commits.idx"
+
+_RECORD_HEADER = struct.Struct("<I")
+_INDEX_ENTRY = struct.Struct("<Q")
+
+
+class CommitStore(Mapping[int, Data]):
+    # Committed data by data number.
+    # Serialized data is appended to the segment file. The index file is mmap'd and has a fixed width entry per number,
+    # the offset of the data in the segment plus one. Zero means no data of the number.
+    # Recent data is kept in an LRU tip, so memory does not grow with the number of commits.
+    def __init__(self, path: Union[str, Path, None] = None, tip_size: int = 1024, index_growth: int = 65536):
+        if path is None:
+            # Removed with the store
+            self._temp_dir = tempfile.TemporaryDirectory(prefix="lft-commits-")
+            path = self._temp_dir.name
+        else:
+            self._temp_dir = None
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._serializer = Serializer()
+        self._tip: OrderedDict[int, Data] = OrderedDict()
+        self._tip_size = tip_size
+        self._index_growth = index_growth
+
+        self._segment = open(str(self.path.joinpath(SEGMENT_NAME)), "ab+")
+        self._segment.seek(0, os.SEEK_END)
+        self._segment_size = self._segment.tell()
+
+        index_path = self.path.joinpath(INDEX_NAME)
+        self._index_file = open(str(index_path), "ab+" if index_path.exists() else "wb+")
+        self._index: Optional[mmap.mmap] = None
+        self._map_index(max(os.path.getsize(str(index_path)), _INDEX_ENTRY.size * index_growth))
+
+        self._len = 0
+        self._first_number: Optional[int] = None
+        self._last_number: Optional[int] = None
+        self._load_index()
+
+    @property
+    def first_number(self) -> Optional[int]:
+        return self._first_number
+
+    @property
+    def last_number(self) -> Optional[int]:
+        return self._last_number
+
+    def __getitem__(self, number: int) -> Data:
+        try:
+            data = self._tip[number]
+        except KeyError:
+            data = self._read(self._get_offset(number))
+            self._cache(number, data)
+        else:
+            self._tip.move_to_end(number)
+        return data
+
+    def __setitem__(self, number: int, data: Data):
+        if number != data.number:
+            raise ValueError(f"Data number mismatch: {number}, {data.number}")
+        self.append(data)
+
+    def __contains__(self, number) -> bool:
+        return isinstance(number, int) and self._get_offset(number, raising=False) is not None
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[int]:
+        if self._first_number is None:
+            return
+        for number in range(self._first_number, self._last_number + 1):
+            if number in self:
+                yield number
+
+    def append(self, data: Data):
+        # The latest data of a number is valid. Old data stays in the segment.
+        number = data.number
+        if number < 0:
+            raise ValueError(f"Invalid data number: {number}")
+        serialized = self._serializer.serialize(data).encode()
+        offset = self._segment_size
+        self._segment.write(_RECORD_HEADER.pack(len(serialized)))
+        self._segment.write(serialized)
+        self._segment.flush()
+        self._segment_size += _RECORD_HEADER.size + len(serialized)
+
+        if number not in self:
+            self._len += 1
+        self._set_offset(number, offset)
+        self._first_number = number if self._first_number is None else min(self._first_number, number)
+        self._last_number = number if self._last_number is None else max(self._last_number, number)
+        self._cache(number, data)
+
+    def flush(self):
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+        self._index.flush()
+
+    def close(self):
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+            self._index_file.close()
+            self._segment.close()
+        if self._temp_dir:
+            self._temp_dir.cleanup()
+            self._temp_dir = None
+
+    def __del__(self):
+        self.close()
+
+    def _cache(self, number: int, data: Data):
+        self._tip[number] = data
+        self._tip.move_to_end(number)
+        while len(self._tip) > self._tip_size:
+            self._tip.popitem(last=False)
+
+    def _read(self, offset: int) -> Data:
+        self._segment.seek(offset)
+        size, = _RECORD_HEADER.unpack(self._segment.read(_RECORD_HEADER.size))
+        serialized = self._segment.read(size)
+        self._segment.seek(0, os.SEEK_END)
+        return self._serializer.deserialize(serialized.decode())
+
+    def _get_offset(self, number: int, raising=True) -> Optional[int]:
+        position = number * _INDEX_ENTRY.size
+        if 0 <= number and position + _INDEX_ENTRY.size <= len(self._index):
+            entry, = _INDEX_ENTRY.unpack_from(self._index, position)
+            if entry:
+                return entry - 1
+        if raising:
+            raise KeyError(number)
+        return None
+
+    def _set_offset(self, number: int, offset: int):
+        position = number * _INDEX_ENTRY.size
+        if position + _INDEX_ENTRY.size > len(self._index):
+            growth = _INDEX_ENTRY.size * self._index_growth
+            self._map_index((position // growth + 1) * growth)
+        _INDEX_ENTRY.pack_into(self._index, position, offset + 1)
+
+    def _map_index(self, size: int):
+        if self._index is not None:
+            self._index.close()
+        self._index_file.truncate(size)
+        self._index = mmap.mmap(self._index_file.fileno(), size)
+
+    def _load_index(self):
+        for number, (entry, ) in enumerate(_INDEX_ENTRY.iter_unpack(self._index)):
+            if entry:
+                self._len += 1
+                if self._first_number is None:
+                    self._first_number = number
+                self._last_number = number
@@ -1,17 +1,22 @@
-from hashlib import sha3_256
-from typing import Sequence, Type, TypeVar
-from lft.app.vote import DefaultVote
-from lft.consensus.messages.data import Data, DataVerifier, DataFactory
+from typing import Type, TypeVar, Optional, Sequence, Tuple, Callable, Set
+from lft.app.id_hasher import IdHasher, ID_SIZE, blake2b_id_hasher, pack_ints, digest_id
+from lft.app.tx_pool import TxPool, tx_hash
+from lft.consensus.messages.data import Data, DataVerifier, DataFactory, PrevVotes
+from lft.consensus.messages.vote import QuorumCertificate
 
-__all__ = ("DefaultData", "DefaultDataFactory", "DefaultDataVerifier")
+__all__ = ("DefaultData", "PayloadData", "DefaultDataFactory", "DefaultDataVerifier")
 
 T = TypeVar("T")
 
+_EMPTY_VOTE_ID = bytes(ID_SIZE)
+
 
 class DefaultData(Data):
     NoneData = bytes(16)
     LazyData = bytes([255] * 16)
 
+    __slots__ = ("_id", "_prev_id", "_proposer_id", "_number", "_epoch_num", "_round_num", "_prev_votes", "_hash")
+
     def __init__(self,
                  id_: bytes,
                  prev_id: bytes,
@@ -19,14 +24,16 @@ class DefaultData(Data):
                  number: int,
                  epoch_num: int,
                  round_num: int,
-                 prev_votes: Sequence['DefaultVote'] = ()):
-        self._id = id_
-        self._prev_id = prev_id
-        self._proposer_id = proposer_id
-        self._number = number
-        self._epoch_num = epoch_num
-        self._round_num = round_num
-        self._prev_votes: Sequence['DefaultVote'] = prev_votes
+                 prev_votes: PrevVotes = ()):
+        _set = object.__setattr__
+        _set(self, "_id", id_)
+        _set(self, "_prev_id", prev_id)
+        _set(self, "_proposer_id", proposer_id)
+        _set(self, "_number", number)
+        _set(self, "_epoch_num", epoch_num)
+        _set(self, "_round_num", round_num)
+        _set(self, "_prev_votes", _freeze_prev_votes(prev_votes))
+        _set(self, "_hash", int.from_bytes(id_, "big"))
 
     @property
     def id(self) -> bytes:
@@ -53,7 +60,7 @@ class DefaultData(Data):
         return self._round_num
 
     @property
-    def prev_votes(self) -> Sequence['DefaultVote']:
+    def prev_votes(self) -> PrevVotes:
         return self._prev_votes
 
     def is_none(self) -> bool:
@@ -62,6 +69,23 @@ class DefaultData(Data):
     def is_lazy(self) -> bool:
         return self._id == self.LazyData
 
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{self.__class__.__qualname__} is immutable")
+
+    def __reduce__(self):
+        return self.__class__, (self._id, self._prev_id, self._proposer_id, self._number,
+                                self._epoch_num, self._round_num, self._prev_votes)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, DefaultData) and self._hash != other._hash:
+            return False
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return self._hash
+
     def _serialize(self) -> dict:
         return {
             "id": self.id,
@@ -70,7 +94,7 @@ class DefaultData(Data):
             "number": self.number,
             "epoch": self.epoch_num,
             "round": self.round_num,
-            "prev_votes": tuple(self.prev_votes)
+            "prev_votes": self.prev_votes
         }
 
     @classmethod
@@ -82,7 +106,7 @@ class DefaultData(Data):
             number=kwargs["number"],
             epoch_num=kwargs["epoch"],
             round_num=kwargs["round"],
-            prev_votes=tuple(kwargs["prev_votes"])
+            prev_votes=kwargs["prev_votes"]
         )
 
     def __repr__(self):
@@ -93,14 +117,82 @@ class DefaultData(Data):
         return f"{self.__class__.__qualname__}({serialized})"
 
 
+class PayloadData(DefaultData):
+    # DefaultData with a batch of transactions
+    __slots__ = ("_payload", )
+
+    def __init__(self,
+                 id_: bytes,
+                 prev_id: bytes,
+                 proposer_id: bytes,
+                 number: int,
+                 epoch_num: int,
+                 round_num: int,
+                 prev_votes: PrevVotes = (),
+                 payload: Sequence[bytes] = ()):
+        super().__init__(id_, prev_id, proposer_id, number, epoch_num, round_num, prev_votes)
+        object.__setattr__(self, "_payload", tuple(payload))
+
+    @property
+    def payload(self) -> Tuple[bytes, ...]:
+        return self._payload
+
+    def __reduce__(self):
+        return self.__class__, (self._id, self._prev_id, self._proposer_id, self._number,
+                                self._epoch_num, self._round_num, self._prev_votes, self._payload)
+
+    def __eq__(self, other):
+        return super().__eq__(other) and self._payload == getattr(other, "payload", ())
+
+    __hash__ = DefaultData.__hash__
+
+    def _serialize(self) -> dict:
+        serialized = super()._serialize()
+        serialized["payload"] = self.payload
+        return serialized
+
+    @classmethod
+    def _deserialize(cls: Type[T], **kwargs) -> T:
+        return PayloadData(
+            id_=kwargs["id"],
+            prev_id=kwargs["prev_id"],
+            proposer_id=kwargs["proposer_id"],
+            number=kwargs["number"],
+            epoch_num=kwargs["epoch"],
+            round_num=kwargs["round"],
+            prev_votes=kwargs["prev_votes"],
+            payload=kwargs["payload"]
+        )
+
+
+def _freeze_prev_votes(prev_votes: PrevVotes) -> PrevVotes:
+    if isinstance(prev_votes, QuorumCertificate):
+        return prev_votes
+    return tuple(prev_votes)
+
+
 class DefaultDataVerifier(DataVerifier):
     async def verify(self, data: 'DefaultData'):
         pass
 
 
 class DefaultDataFactory(DataFactory):
-    def __init__(self, node_id: bytes):
+    def __init__(self, node_id: bytes, id_hasher: IdHasher = blake2b_id_hasher,
+                 data_verifier: Optional[DataVerifier] = None, tx_pool: Optional[TxPool] = None,
+                 max_batch_count: int = 1000, max_batch_bytes: int = 1024 * 1024,
+                 find_data: Optional[Callable[[bytes], Optional[Data]]] = None):
         self._node_id = node_id
+        self._id_hasher = id_hasher
+        self._data_verifier = data_verifier
+
+        # If tx_pool exists, data carries a batch of its transactions within the budgets.
+        self._tx_pool = tx_pool
+        self._max_batch_count = max_batch_count
+        self._max_batch_bytes = max_batch_bytes
+
+        # Transactions stay in tx_pool until they are committed. Those carried by the uncommitted ancestors,
+        # found by find_data, are not proposed again.
+        self._find_data = find_data
 
     def _create_id(self,
                    prev_id: bytes,
@@ -108,20 +200,50 @@ class DefaultDataFactory(DataFactory):
                    data_number: int,
                    epoch_num: int,
                    round_num: int,
-                   prev_votes: Sequence['DefaultVote']) -> bytes:
-        source = (prev_id + propose_id + data_number.to_bytes(64, 'big') +
-                  epoch_num.to_bytes(64, 'big') + round_num.to_bytes(64, 'big') +
-                  b"".join(prev_vote.id if prev_vote else bytes(16) for prev_vote in prev_votes))
-        return sha3_256(source).digest()[:16]
+                   prev_votes: PrevVotes,
+                   payload: Sequence[bytes] = ()) -> bytes:
+        hasher = self._id_hasher()
+        hasher.update(prev_id)
+        hasher.update(propose_id)
+        hasher.update(pack_ints(data_number, epoch_num, round_num))
+        if isinstance(prev_votes, QuorumCertificate):
+            hasher.update(prev_votes.id)
+        else:
+            for prev_vote in prev_votes:
+                hasher.update(prev_vote.id if prev_vote else _EMPTY_VOTE_ID)
+        if payload:
+            hasher.update(pack_ints(len(payload)))
+            for tx in payload:
+                hasher.update(pack_ints(len(tx)))
+                hasher.update(tx)
+        return digest_id(hasher)
 
     async def create_data(self,
                           data_number: int,
                           prev_id: bytes,
                           epoch_num: int,
                           round_num: int,
-                          prev_votes: Sequence['DefaultVote']) -> DefaultData:
-        data_id = self._create_id(prev_id, self._node_id, data_number, epoch_num, round_num, prev_votes)
-        return DefaultData(data_id, prev_id, self._node_id, data_number, epoch_num, round_num, prev_votes=prev_votes)
+                          prev_votes: PrevVotes) -> DefaultData:
+        if self._tx_pool is None:
+            data_id = self._create_id(prev_id, self._node_id, data_number, epoch_num, round_num, prev_votes)
+            return DefaultData(data_id, prev_id, self._node_id, data_number, epoch_num, round_num,
+                               prev_votes=prev_votes)
+
+        payload = self._tx_pool.get_batch(self._max_batch_count, self._max_batch_bytes,
+                                          excluded=self._get_ancestor_tx_hashes(prev_id))
+        data_id = self._create_id(prev_id, self._node_id, data_number, epoch_num, round_num, prev_votes, payload)
+        return PayloadData(data_id, prev_id, self._node_id, data_number, epoch_num, round_num,
+                           prev_votes=prev_votes, payload=payload)
+
+    def _get_ancestor_tx_hashes(self, prev_id: bytes) -> Set[bytes]:
+        # Ancestors are found until they are pruned after commit, so only a few of them are followed.
+        tx_hashes = set()
+        data = self._find_data(prev_id) if self._find_data else None
+        while data:
+            if isinstance(data, PayloadData):
+                tx_hashes.update(tx_hash(tx) for tx in data.payload)
+            data = self._find_data(data.prev_id)
+        return tx_hashes
 
     def create_none_data(self,
                          epoch_num: int,
@@ -135,6 +257,6 @@ class DefaultDataFactory(DataFactory):
                          proposer_id: bytes) -> DefaultData:
         return DefaultData(DefaultData.LazyData, DefaultData.LazyData, proposer_id, -1, epoch_num, round_num)
 
-    async def create_data_verifier(self) -> DefaultDataVerifier:
-        return DefaultDataVerifier()
+    async def create_data_verifier(self) -> DataVerifier:
+        return self._data_verifier or DefaultDataVerifier()
 
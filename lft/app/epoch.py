@@ -1,5 +1,5 @@
 import math
-from typing import Sequence, Type
+from typing import Sequence, Type, Mapping
 
 from lft.consensus.messages.data import Data
 from lft.consensus.epoch import Epoch
@@ -15,11 +15,17 @@ class RotateEpoch(Epoch):
         self._rotate_bound = rotate_bound
         self._voters = tuple(voters)
         self._voters_num = len(self._voters)
+        self._voter_indices = {voter: index for index, voter in enumerate(self._voters)}
+        self._quorum_num = math.ceil(self._voters_num * 0.67)
 
     @property
     def voters(self) -> Sequence[bytes]:
         return self._voters
 
+    @property
+    def voter_indices(self) -> Mapping[bytes, int]:
+        return self._voter_indices
+
     @property
     def voters_num(self) -> int:
         return self._voters_num
@@ -30,7 +36,7 @@ class RotateEpoch(Epoch):
 
     @property
     def quorum_num(self) -> int:
-        return math.ceil(self.voters_num * 0.67)
+        return self._quorum_num
 
     def verify_data(self, data: Data):
         self.verify_proposer(data.proposer_id, data.round_num)
@@ -50,7 +56,7 @@ class RotateEpoch(Epoch):
             if voter != expected:
                 raise InvalidVoter(voter, expected)
         else:
-            if voter not in self._voters:
+            if voter not in self._voter_indices:
                 raise InvalidVoter(voter, bytes(0))
 
     def get_proposer_id(self, round_num: int) -> bytes:
@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from lft.consensus.commit_stream import CommitStream
+from lft.consensus.messages.data import Data, DataVerifier
+
+__all__ = ("StateMachine", "ExecutionPipeline", "ExecutionMetrics", "SpeculativeDataVerifier", "ExecutionFailed")
+
+_UNKNOWN = object()
+
+
+class StateMachine(ABC):
+    # Application logic. It runs on a worker thread or process.
+    # It must not change the given state, the data may be executed speculatively before it is committed.
+    @abstractmethod
+    def execute(self, state: Any, data: Data) -> Tuple[Any, Any]:
+        # Returns the new state and the result. Invalid data raises an exception.
+        raise NotImplementedError
+
+
+class ExecutionFailed(Exception):
+    # Committed data failed to execute. The pipeline stops, the state after it is unknown.
+    def __init__(self, data: Data, exception: Exception):
+        self.data = data
+        self.exception = exception
+
+
+@dataclass
+class ExecutionMetrics:
+    committed_number: int = -1
+    executed_number: int = -1
+    executed: int = 0
+    reused: int = 0  # Speculative results reused on commit
+    unverified: int = 0  # Data not connected to a known state. It is verified when it is committed.
+    elapsed: float = 0.0
+    failure: Optional[ExecutionFailed] = None
+
+    @property
+    def lag(self) -> int:
+        return self.committed_number - self.executed_number
+
+
+@dataclass
+class _Speculation:
+    number: int
+    base_state: Any
+    future: Future
+
+
+class ExecutionPipeline:
+    # Executes committed data in order, apart from the consensus loop.
+    # Up to window commits are in flight. If the window is full, the commit stream fills up and pushes back.
+    # If committed data fails to execute, the pipeline stops. on_failed is called with ExecutionFailed at once,
+    # and run() raises it.
+    # find_data finds uncommitted data. Their execution is chained up to the known state to speculate on their children.
+    def __init__(self, state_machine: StateMachine, state: Any = None, state_id: bytes = b'',
+                 executor: Optional[Executor] = None, window: int = 16, max_speculations: int = 64,
+                 on_executed: Optional[Callable[[Data, Any], None]] = None,
+                 on_failed: Optional[Callable[[ExecutionFailed], None]] = None,
+                 find_data: Optional[Callable[[bytes], Optional[Data]]] = None):
+        self._state_machine = state_machine
+        self._executor = executor or ThreadPoolExecutor(1)
+        self._window = max(window, 1)
+        self._max_speculations = max_speculations
+        self._on_executed = on_executed
+        self._on_failed = on_failed
+        self._find_data = find_data
+
+        # state is the state after the data of state_id. Verifiers read it from other threads.
+        self._lock = threading.Lock()
+        self._state = state
+        self._state_id = state_id
+        self._speculations: OrderedDict[bytes, _Speculation] = OrderedDict()
+        # Committed data not executed yet. Speculations on it run after it.
+        self._commits: Dict[bytes, Future] = {}
+
+        self._metrics = ExecutionMetrics()
+        self._commit_stream: Optional[CommitStream] = None
+        self._is_closed = False
+
+    @property
+    def state(self) -> Any:
+        return self._state
+
+    @property
+    def metrics(self) -> ExecutionMetrics:
+        return self._metrics
+
+    def initialize(self, state_id: bytes, state: Any):
+        # state is the state after the data of state_id, the commit consensus is initialized with.
+        with self._lock:
+            self._state = state
+            self._state_id = state_id
+            self._speculations.clear()
+
+    async def run(self, commit_stream: CommitStream):
+        self._commit_stream = commit_stream
+        window = asyncio.Semaphore(self._window)
+        prev_execution: Optional[asyncio.Future] = None
+        async for commit in commit_stream:
+            await window.acquire()
+            if self._metrics.failure:
+                window.release()
+                break
+            self._metrics.committed_number = commit.data.number
+            with self._lock:
+                self._commits[commit.data.id] = Future()
+            prev_execution = asyncio.ensure_future(self._execute_commit(commit.data, prev_execution, window))
+        if prev_execution:
+            await prev_execution
+        if self._metrics.failure:
+            raise self._metrics.failure
+
+    def speculate(self, data: Data) -> Optional[Future]:
+        # Executes data on the state after its prev data. The result is reused on commit.
+        # If the prev data is being executed, speculatively or committed, it runs after that.
+        # If the prev data is not executed at all, its uncommitted ancestors are executed first.
+        # Returns None if the data is not connected to the executed state.
+        with self._lock:
+            if self._is_closed:
+                return None
+            speculation = self._speculations.get(data.id)
+            if speculation:
+                return speculation.future
+
+            ancestors = self._find_unexecuted_ancestors(data)
+            if ancestors is None:
+                return None
+            for ancestor in ancestors:
+                self._speculate(ancestor)
+            return self._speculate(data).future
+
+    def close(self):
+        # Commits in flight are not executed after close.
+        with self._lock:
+            self._is_closed = True
+        self._executor.shutdown(wait=False)
+
+    def _speculate(self, data: Data) -> _Speculation:
+        # Called with the lock. The prev data is executed or being executed.
+        if data.prev_id == self._state_id:
+            future = self._executor.submit(self._state_machine.execute, self._state, data)
+            speculation = _Speculation(data.number, self._state, future)
+        else:
+            prev_speculation = self._speculations.get(data.prev_id)
+            prev_future = prev_speculation.future if prev_speculation else self._commits[data.prev_id]
+            speculation = self._chain_speculation(data, prev_future)
+
+        self._speculations[data.id] = speculation
+        while len(self._speculations) > self._max_speculations:
+            self._speculations.popitem(last=False)
+        return speculation
+
+    def _find_unexecuted_ancestors(self, data: Data) -> Optional[List[Data]]:
+        # Called with the lock. Ancestors from the oldest, up to the one next to the executed or executing data.
+        ancestors = []
+        prev_id = data.prev_id
+        while not self._is_executed(prev_id):
+            prev_data = self._find_data(prev_id) if self._find_data else None
+            if not prev_data or len(ancestors) >= self._max_speculations - 1:
+                return None
+            ancestors.append(prev_data)
+            prev_id = prev_data.prev_id
+        ancestors.reverse()
+        return ancestors
+
+    def _is_executed(self, data_id: bytes) -> bool:
+        # Called with the lock. Being executed, speculatively or committed, counts as well.
+        return data_id == self._state_id or data_id in self._speculations or data_id in self._commits
+
+    def _chain_speculation(self, data: Data, prev_future: Future) -> _Speculation:
+        # Called with the lock. If the prev execution failed, the data is invalid as well.
+        speculation = _Speculation(data.number, _UNKNOWN, Future())
+
+        def _execute(done: Future):
+            try:
+                base_state, _ = done.result()
+                speculation.base_state = base_state
+                execution = self._executor.submit(self._state_machine.execute, base_state, data)
+            except BaseException as e:
+                speculation.future.set_exception(e)
+            else:
+                execution.add_done_callback(partial(_copy_future, speculation.future))
+
+        prev_future.add_done_callback(_execute)
+        return speculation
+
+    async def _execute_commit(self, data: Data, prev_execution: Optional[asyncio.Future],
+                              window: asyncio.Semaphore):
+        try:
+            if prev_execution:
+                await prev_execution
+            if self._is_closed:
+                self._pop_commit(data).cancel()
+                return
+
+            start = time.monotonic()
+            with self._lock:
+                state = self._state
+                speculation = self._speculations.pop(data.id, None)
+
+            try:
+                if (speculation and speculation.base_state is state and
+                        speculation.future.done() and not speculation.future.exception()):
+                    new_state, result = speculation.future.result()
+                    self._metrics.reused += 1
+                else:
+                    loop = asyncio.get_event_loop()
+                    new_state, result = await loop.run_in_executor(self._executor, self._state_machine.execute,
+                                                                   state, data)
+            except Exception as e:
+                self._fail(data, e)
+                return
+
+            with self._lock:
+                self._state = new_state
+                self._state_id = data.id
+                for data_id in [data_id for data_id, speculation in self._speculations.items()
+                                if speculation.number <= data.number]:
+                    del self._speculations[data_id]
+            self._pop_commit(data).set_result((new_state, result))
+
+            self._metrics.executed_number = data.number
+            self._metrics.executed += 1
+            self._metrics.elapsed += time.monotonic() - start
+            if self._on_executed:
+                self._on_executed(data, result)
+        finally:
+            window.release()
+
+    def _fail(self, data: Data, exception: Exception):
+        # Later commits are not executed. Nothing can be speculated on the unknown state.
+        # The commit stream is closed not to push back on consensus.
+        failure = ExecutionFailed(data, exception)
+        with self._lock:
+            self._is_closed = True
+        self._pop_commit(data).set_exception(failure)
+        self._metrics.failure = failure
+        self._commit_stream.close()
+        if self._on_failed:
+            self._on_failed(failure)
+
+    def _pop_commit(self, data: Data) -> Future:
+        with self._lock:
+            return self._commits.pop(data.id)
+
+
+class SpeculativeDataVerifier(DataVerifier):
+    # Verifies data by executing it. The execution is reused when the data is committed.
+    # Data not connected to the executed state cannot be executed. It is not rejected for that,
+    # it is verified when it is committed, as without the verifier.
+    def __init__(self, pipeline: ExecutionPipeline):
+        self._pipeline = pipeline
+        self._logger = logging.getLogger(__name__)
+
+    async def verify(self, data: Data):
+        future = self._pipeline.speculate(data)
+        if not future:
+            self._pipeline.metrics.unverified += 1
+            self._logger.debug(f"Not connected to the executed state: {data.id.hex()}, {data.prev_id.hex()}")
+            return
+        await asyncio.wrap_future(future)
+
+
+def _copy_future(target: Future, source: Future):
+    if source.cancelled():
+        target.cancel()
+    elif source.exception():
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
@@ -0,0 +1,36 @@
+from hashlib import blake2b, sha3_256
+from struct import Struct, error
+from typing import Callable, Any
+
+__all__ = ("IdHasher", "ID_SIZE", "blake2b_id_hasher", "sha3_256_id_hasher", "pack_ints", "digest_id")
+
+ID_SIZE = 16
+
+# Returns a new hashlib object. Fields are fed into it with update() instead of concatenating them.
+IdHasher = Callable[[], Any]
+
+_int_structs = {}
+
+
+def blake2b_id_hasher():
+    return blake2b(digest_size=ID_SIZE)
+
+
+def sha3_256_id_hasher():
+    return sha3_256()
+
+
+def pack_ints(*nums: int) -> bytes:
+    # Fixed width, 8 bytes per unsigned int. Numbers, epochs and rounds are in [0, 2 ** 64).
+    try:
+        struct = _int_structs[len(nums)]
+    except KeyError:
+        struct = _int_structs[len(nums)] = Struct(">" + "Q" * len(nums))
+    try:
+        return struct.pack(*nums)
+    except error:
+        raise ValueError(f"Out of range [0, 2 ** 64): {nums}")
+
+
+def digest_id(hasher) -> bytes:
+    return hasher.digest()[:ID_SIZE]
@@ -1,68 +1,190 @@
-from typing import IO, Dict, Type, OrderedDict
-from lft.app.data import DefaultDataFactory
+import asyncio
+from pathlib import Path
+from typing import IO, Any, Dict, Type, Optional, List, Union
+from lft.app.data import DefaultDataFactory, PayloadData
+from lft.app.tx_pool import TxPool
 from lft.app.epoch import RotateEpoch
 from lft.app.vote import DefaultVoteFactory
 from lft.app.network import Network
 from lft.app.logger import Logger
+from lft.app.pacing import PacingPolicy, FixedDelayPacing, PaceRoundEvent
+from lft.app.commit_store import CommitStore
+from lft.app.execution import StateMachine, ExecutionPipeline, ExecutionFailed, SpeculativeDataVerifier
 from lft.consensus.messages.data import Data
 from lft.event import EventSystem, EventMediator
-from lft.event.mediators import DelayedEventMediator
+from lft.event.mediators import DelayedEventMediator, ExecutorEventMediator
 from lft.consensus.consensus import Consensus
-from lft.consensus.events import RoundStartEvent, RoundEndEvent, InitializeEvent
+from lft.consensus.events import RoundStartEvent, RoundEndEvent, InitializeEvent, RestoreEvent
+from lft.consensus.checkpoint import write_checkpoint
+from lft.consensus.wal import WriteAheadLog
+from lft.consensus.commit_stream import CommitStream
+from lft.consensus.sync import SyncFetcher
 
 __all__ = ("Node", )
 
 
 class Node:
-    def __init__(self, node_id: bytes):
+    def __init__(self, node_id: bytes, pacing_policy: Optional[PacingPolicy] = None,
+                 sync_fetcher: Optional[SyncFetcher] = None, commit_store: Optional[CommitStore] = None,
+                 wal: Optional[WriteAheadLog] = None, state_machine: Optional[StateMachine] = None,
+                 tx_pool: Optional[TxPool] = None, initial_state: Any = None):
         self.node_id = node_id
         self.logger = Logger(node_id).logger
         self.event_system = EventSystem(self.logger)
         self.event_system.set_mediator(DelayedEventMediator)
+        self.event_system.set_mediator(ExecutorEventMediator)
+
+        # Committed data is executed by the pipeline if state_machine exists.
+        # initial_state is the state after the commit the node is initialized with.
+        # Proposals are verified by executing them, the results are reused on commit.
+        self.execution: Optional[ExecutionPipeline] = None
+        self._initial_state = initial_state
+        data_verifier = None
+        if state_machine:
+            self.execution = ExecutionPipeline(state_machine, initial_state, on_failed=self._on_execution_failed,
+                                               find_data=self._find_data)
+            data_verifier = SpeculativeDataVerifier(self.execution)
+
+        # The loop the node runs on. Peers on other threads read its data on it.
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
 
         self._nodes = None
         self._network = Network(self.event_system)
         self._consensus = Consensus(
             self.event_system,
             self.node_id,
-            DefaultDataFactory(self.node_id),
-            DefaultVoteFactory(self.node_id)
+            DefaultDataFactory(self.node_id, data_verifier=data_verifier, tx_pool=tx_pool, find_data=self._find_data),
+            DefaultVoteFactory(self.node_id),
+            sync_fetcher=sync_fetcher,
+            wal=wal
         )
         self._epoch_num = -1
         self._round_num = -1
+        self._epochs: Dict[int, RotateEpoch] = {}
+        self._pacing_policy = pacing_policy or FixedDelayPacing()
 
-        # For store
-        self.commit_datums: OrderedDict[int, Data] = OrderedDict()
+        # Committed data is on disk. It is kept after close, to be read by tests and the console.
+        self.commit_datums = commit_store if commit_store is not None else CommitStore()
+        self._commit_task: Optional[asyncio.Task] = None
+
+        # Own data carries transactions of the pool. Committed ones are removed from it.
+        self.tx_pool = tx_pool
+        self._execution_task: Optional[asyncio.Task] = None
 
         self.event_system.simulator.register_handler(InitializeEvent, self._on_init_event)
+        self.event_system.simulator.register_handler(RestoreEvent, self._on_restore_event)
         self.event_system.simulator.register_handler(RoundEndEvent, self._on_round_end_event)
+        self.event_system.simulator.register_handler(PaceRoundEvent, self._on_pace_round_event)
 
     async def _on_init_event(self, init_event: InitializeEvent):
         self._nodes = init_event.epoch_pool[-1].voters
+        if self.execution:
+            self.execution.initialize(init_event.commit_id, self._initial_state)
+        self._start_store_commits()
 
-    async def _on_round_end_event(self, round_end_event: RoundEndEvent):
-        if round_end_event.is_success and round_end_event.commit_id:
-            data = self._consensus._data_pool.get_data(round_end_event.commit_id)
-            self.commit_datums[data.number] = data
+    async def _on_restore_event(self, restore_event: RestoreEvent):
+        checkpoint = restore_event.checkpoint
+        self._nodes = checkpoint.epochs[-1].voters
+        self._start_store_commits()
+
+        self._epoch_num, self._round_num = checkpoint.started_round_id
+        await self._start_new_round()
+
+    def _start_store_commits(self):
+        if not self._commit_task:
+            self._commit_task = asyncio.ensure_future(self._store_commits(self._consensus.commit_stream()))
+        if self.execution and not self._execution_task:
+            self._execution_task = asyncio.ensure_future(self.execution.run(self._consensus.commit_stream()))
+
+    async def _store_commits(self, commit_stream: CommitStream):
+        async for commit in commit_stream:
+            self.commit_datums[commit.data.number] = commit.data
+            if self.tx_pool is not None and isinstance(commit.data, PayloadData):
+                self.tx_pool.remove(commit.data.payload)
 
+    async def _on_round_end_event(self, round_end_event: RoundEndEvent):
         if (self._epoch_num, self._round_num) > (round_end_event.epoch_num, round_end_event.round_num):
             return
         self._epoch_num = round_end_event.epoch_num
         self._round_num = round_end_event.round_num + 1
         await self._start_new_round()
 
-    async def _start_new_round(self):
-        round_start_event = RoundStartEvent(
-            epoch=RotateEpoch(1, self._nodes),
-            round_num=self._round_num
-        )
-        round_start_event.deterministic = False
+    async def _on_pace_round_event(self, pace_round_event: PaceRoundEvent):
+        if (self._epoch_num, self._round_num) != (pace_round_event.epoch_num, pace_round_event.round_num):
+            return
+        await self._start_new_round(pace_round_event.waited)
+
+    async def _start_new_round(self, waited: float = 0.0):
+        epoch = self._get_epoch(1)
+        is_ready = self._pacing_policy.is_ready(epoch, self._round_num, waited)
+        delay = self._pacing_policy.delay(epoch, self._round_num, waited)
+        if is_ready:
+            event = RoundStartEvent(
+                epoch=epoch,
+                round_num=self._round_num
+            )
+        else:
+            event = PaceRoundEvent(self._epoch_num, self._round_num, waited + delay)
+        event.deterministic = False
         mediator = self.event_system.get_mediator(DelayedEventMediator)
-        mediator.execute(0.5, round_start_event)
+        mediator.execute(delay, event)
+
+    def save_checkpoint(self, path: Union[str, Path]):
+        write_checkpoint(path, self._consensus.checkpoint())
+
+    def get_datums(self, start_number: int, end_id: bytes, max_count: int) -> List[Data]:
+        # Up to max_count datums of the chain ending at end_id from start_number, for syncing peers.
+        # Committed ones are read by number. Only uncommitted ones are followed back from end_id.
+        # The link of the committed ones to end_id is verified by the syncing peer.
+        # It reads CommitStore and Consensus, so it must run on the loop of the node.
+        if not self._consensus:
+            return []
+        end_data = self._consensus.find_data(end_id)
+        if not end_data or end_data.number < start_number:
+            return []
+        last_number = min(start_number + max_count - 1, end_data.number)
+
+        datums = []
+        for number in range(start_number, last_number + 1):
+            data = self.commit_datums.get(number)
+            if not data:
+                break
+            datums.append(data)
+        if len(datums) == last_number - start_number + 1:
+            return datums
+
+        uncommitted_datums = []
+        data = end_data
+        while True:
+            if data.number <= last_number:
+                uncommitted_datums.append(data)
+            if data.number == start_number + len(datums):
+                break
+            data = self._consensus.find_data(data.prev_id)
+            if not data:
+                return datums
+        uncommitted_datums.reverse()
+        if datums and uncommitted_datums[0].prev_id != datums[-1].id:
+            return datums
+        return datums + uncommitted_datums
+
+    def _find_data(self, data_id: bytes) -> Optional[Data]:
+        return self._consensus.find_data(data_id) if self._consensus else None
+
+    def _get_epoch(self, epoch_num: int) -> RotateEpoch:
+        try:
+            return self._epochs[epoch_num]
+        except KeyError:
+            epoch = self._epochs[epoch_num] = RotateEpoch(epoch_num, self._nodes)
+            return epoch
 
     def __del__(self):
         self.close()
 
+    def _on_execution_failed(self, failure: ExecutionFailed):
+        # Consensus goes on, but the state after the failed data is unknown. Nothing is executed any more.
+        self.logger.error(f"Execution stopped at {failure.data.id.hex()}: {failure.exception!r}")
+
     def close(self):
         if self._network:
             self._network.close()
@@ -72,17 +194,23 @@ class Node:
             self._consensus.close()
             self._consensus = None
 
+        if self.execution:
+            self.execution.close()
+
         if self.event_system:
             self.event_system.close()
             self.event_system = None
 
     def start(self, blocking=True):
+        self.loop = asyncio.get_event_loop()
         self.event_system.start(blocking)
 
     def start_record(self, record_io: IO, mediator_ios: Dict[Type[EventMediator], IO]=None, blocking=True):
+        self.loop = asyncio.get_event_loop()
         self.event_system.start_record(record_io, mediator_ios, blocking)
 
     def start_replay(self, record_io: IO, mediator_ios: Dict[Type[EventMediator], IO]=None, blocking=True):
+        self.loop = asyncio.get_event_loop()
         self.event_system.start_replay(record_io, mediator_ios, blocking)
 
     def register_peer(self, peer: 'Node'):
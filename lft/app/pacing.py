@@ -0,0 +1,77 @@
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Optional
+from lft.consensus.epoch import Epoch
+from lft.event import Event
+
+__all__ = ("PacingPolicy", "FixedDelayPacing", "ImmediatePacing", "MinIntervalPacing", "PayloadPacing",
+           "PaceRoundEvent")
+
+
+@dataclass
+class PaceRoundEvent(Event):
+    # Node checks the policy again after the delay if the next round is not ready to start.
+    epoch_num: int
+    round_num: int
+    waited: float
+
+
+class PacingPolicy(ABC):
+    # Decides when Node starts the next round after a round ends.
+    @abstractmethod
+    def delay(self, epoch: Epoch, round_num: int, waited: float) -> float:
+        raise NotImplementedError
+
+    def is_ready(self, epoch: Epoch, round_num: int, waited: float) -> bool:
+        return True
+
+
+class FixedDelayPacing(PacingPolicy):
+    def __init__(self, delay: float = 0.5):
+        self._delay = delay
+
+    def delay(self, epoch: Epoch, round_num: int, waited: float) -> float:
+        return self._delay
+
+
+class ImmediatePacing(FixedDelayPacing):
+    def __init__(self):
+        super().__init__(0.0)
+
+
+class MinIntervalPacing(PacingPolicy):
+    # Rounds start at least min_interval apart. A slow round starts the next one at once.
+    def __init__(self, min_interval: float):
+        self._min_interval = min_interval
+        self._last_started_at: Optional[float] = None
+
+    def delay(self, epoch: Epoch, round_num: int, waited: float) -> float:
+        now = time.monotonic()
+        if self._last_started_at is None:
+            delay = 0.0
+        else:
+            delay = max(self._last_started_at + self._min_interval - now, 0.0)
+        self._last_started_at = now + delay
+        return delay
+
+
+class PayloadPacing(PacingPolicy):
+    # The proposer of the next round waits until it has payload, at most max_wait.
+    # The others start at once to be ready for its data.
+    def __init__(self, node_id: bytes, has_payload: Callable[[], bool],
+                 poll_interval: float = 0.05, max_wait: float = 2.0):
+        self._node_id = node_id
+        self._has_payload = has_payload
+        self._poll_interval = poll_interval
+        self._max_wait = max_wait
+
+    def delay(self, epoch: Epoch, round_num: int, waited: float) -> float:
+        if self.is_ready(epoch, round_num, waited):
+            return 0.0
+        return min(self._poll_interval, self._max_wait - waited)
+
+    def is_ready(self, epoch: Epoch, round_num: int, waited: float) -> bool:
+        if epoch.get_proposer_id(round_num) != self._node_id:
+            return True
+        return waited >= self._max_wait or self._has_payload()
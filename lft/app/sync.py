@@ -0,0 +1,33 @@
+import asyncio
+from typing import TYPE_CHECKING, Sequence, List
+from lft.consensus.messages.data import Data
+from lft.consensus.sync import SyncFetcher
+
+if TYPE_CHECKING:
+    from lft.app.node import Node
+
+__all__ = ("PeerSyncFetcher", )
+
+
+class PeerSyncFetcher(SyncFetcher):
+    # Fetches from in-process peer nodes. The first peer which has the chain serves the whole batch.
+    def __init__(self, peers: List['Node'] = None):
+        self.peers = peers if peers is not None else []
+
+    async def fetch(self, start_number: int, end_id: bytes, max_count: int) -> Sequence[Data]:
+        for peer in list(self.peers):
+            datums = await self._get_datums(peer, start_number, end_id, max_count)
+            if datums:
+                return datums
+        return []
+
+    async def _get_datums(self, peer: 'Node', start_number: int, end_id: bytes, max_count: int) -> List[Data]:
+        # fetch() runs on a worker thread. The CommitStore and the pools of the peer are read on its own loop.
+        if not peer.loop or peer.loop.is_closed():
+            return []
+
+        async def _get_datums():
+            return peer.get_datums(start_number, end_id, max_count)
+
+        future = asyncio.run_coroutine_threadsafe(_get_datums(), peer.loop)
+        return await asyncio.wrap_future(future)
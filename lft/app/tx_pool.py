@@ -0,0 +1,73 @@
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Iterable, Tuple, Collection
+from lft.app.id_hasher import ID_SIZE
+
+__all__ = ("TxPool", "tx_hash")
+
+
+def tx_hash(tx: bytes) -> bytes:
+    return blake2b(tx, digest_size=ID_SIZE).digest()
+
+
+class TxPool:
+    # Pending transactions in arrival order, deduplicated by hash.
+    # If it is full, the oldest transactions are evicted for new ones.
+    def __init__(self, max_count: int = 100000, max_bytes: int = 64 * 1024 * 1024):
+        self._max_count = max_count
+        self._max_bytes = max_bytes
+        self._txs: OrderedDict[bytes, bytes] = OrderedDict()
+        self._bytes = 0
+        self._evicted = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    @property
+    def evicted(self) -> int:
+        return self._evicted
+
+    def __len__(self):
+        return len(self._txs)
+
+    def __contains__(self, tx: bytes):
+        return tx_hash(tx) in self._txs
+
+    def submit(self, tx: bytes) -> bool:
+        if not tx or len(tx) > self._max_bytes:
+            return False
+        hash_ = tx_hash(tx)
+        if hash_ in self._txs:
+            return False
+
+        while self._txs and (len(self._txs) >= self._max_count or self._bytes + len(tx) > self._max_bytes):
+            _, evicted_tx = self._txs.popitem(last=False)
+            self._bytes -= len(evicted_tx)
+            self._evicted += 1
+        self._txs[hash_] = tx
+        self._bytes += len(tx)
+        return True
+
+    def get_batch(self, max_count: int, max_bytes: int, excluded: Collection[bytes] = ()) -> Tuple[bytes, ...]:
+        # The oldest transactions within both budgets. They stay in the pool until they are committed.
+        # Transactions of the excluded hashes are skipped, e.g. those carried by uncommitted data.
+        batch = []
+        size = 0
+        for hash_, tx in self._txs.items():
+            if hash_ in excluded:
+                continue
+            if len(batch) >= max_count or size + len(tx) > max_bytes:
+                break
+            batch.append(tx)
+            size += len(tx)
+        return tuple(batch)
+
+    def remove(self, txs: Iterable[bytes]) -> int:
+        removed = 0
+        for tx in txs:
+            tx = self._txs.pop(tx_hash(tx), None)
+            if tx is not None:
+                self._bytes -= len(tx)
+                removed += 1
+        return removed
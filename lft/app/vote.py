@@ -1,8 +1,10 @@
-from hashlib import sha3_256
-from typing import Type, TypeVar
-from lft.consensus.messages.vote import Vote, VoteVerifier, VoteFactory
+from functools import lru_cache
+from typing import Type, TypeVar, Sequence, Optional, Iterable
+from lft.app.id_hasher import IdHasher, blake2b_id_hasher, pack_ints, digest_id
+from lft.consensus.messages.vote import Vote, VoteVerifier, VoteFactory, QuorumCertificate
+from lft.consensus.exceptions import InvalidQuorumCertificate
 
-__all__ = ("DefaultVote", "DefaultVoteFactory", "DefaultVoteVerifier")
+__all__ = ("DefaultVote", "DefaultVoteFactory", "DefaultVoteVerifier", "DefaultQuorumCertificate")
 
 T = TypeVar("T")
 
@@ -11,13 +13,17 @@ class DefaultVote(Vote):
     NoneVote = bytes(16)
     LazyVote = bytes([255] * 16)
 
+    __slots__ = ("_id", "_data_id", "_commit_id", "_voter_id", "_epoch_num", "_round_num", "_hash")
+
     def __init__(self, id_: bytes, data_id: bytes, commit_id: bytes, voter_id: bytes, epoch_num: int, round_num: int):
-        self._id = id_
-        self._data_id = data_id
-        self._commit_id = commit_id
-        self._voter_id = voter_id
-        self._epoch_num = epoch_num
-        self._round_num = round_num
+        _set = object.__setattr__
+        _set(self, "_id", id_)
+        _set(self, "_data_id", data_id)
+        _set(self, "_commit_id", commit_id)
+        _set(self, "_voter_id", voter_id)
+        _set(self, "_epoch_num", epoch_num)
+        _set(self, "_round_num", round_num)
+        _set(self, "_hash", int.from_bytes(id_, "big"))
 
     @property
     def id(self) -> bytes:
@@ -49,6 +55,23 @@ class DefaultVote(Vote):
     def is_lazy(self) -> bool:
         return self._data_id == self.LazyVote
 
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{self.__class__.__qualname__} is immutable")
+
+    def __reduce__(self):
+        return self.__class__, (self._id, self._data_id, self._commit_id, self._voter_id,
+                                self._epoch_num, self._round_num)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, DefaultVote) and self._hash != other._hash:
+            return False
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return self._hash
+
     def _serialize(self) -> dict:
         return {
             "id": self.id,
@@ -78,19 +101,117 @@ class DefaultVote(Vote):
         return f"{self.__class__.__qualname__}({serialized})"
 
 
+class DefaultQuorumCertificate(QuorumCertificate):
+    # id is the aggregation of the signers' vote ids. Verifiers can recompute them from the signers.
+    __slots__ = ("_id", "_data_id", "_commit_id", "_signers", "_epoch_num", "_round_num")
+
+    def __init__(self, id_: bytes, data_id: bytes, commit_id: bytes, signers: int, epoch_num: int, round_num: int):
+        _set = object.__setattr__
+        _set(self, "_id", id_)
+        _set(self, "_data_id", data_id)
+        _set(self, "_commit_id", commit_id)
+        _set(self, "_signers", signers)
+        _set(self, "_epoch_num", epoch_num)
+        _set(self, "_round_num", round_num)
+
+    @property
+    def id(self) -> bytes:
+        return self._id
+
+    @property
+    def data_id(self) -> bytes:
+        return self._data_id
+
+    @property
+    def commit_id(self) -> bytes:
+        return self._commit_id
+
+    @property
+    def signers(self) -> int:
+        return self._signers
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{self.__class__.__qualname__} is immutable")
+
+    def __reduce__(self):
+        return self.__class__, (self._id, self._data_id, self._commit_id, self._signers,
+                                self._epoch_num, self._round_num)
+
+    @property
+    def epoch_num(self) -> int:
+        return self._epoch_num
+
+    @property
+    def round_num(self) -> int:
+        return self._round_num
+
+    def _serialize(self) -> dict:
+        return {
+            "id": self.id,
+            "data_id": self.data_id,
+            "commit_id": self.commit_id,
+            "signers": self.signers,
+            "epoch": self.epoch_num,
+            "round": self.round_num,
+        }
+
+    @classmethod
+    def _deserialize(cls: Type[T], **kwargs) -> T:
+        return DefaultQuorumCertificate(
+            id_=kwargs["id"],
+            data_id=kwargs["data_id"],
+            commit_id=kwargs["commit_id"],
+            signers=kwargs["signers"],
+            epoch_num=kwargs["epoch"],
+            round_num=kwargs["round"]
+        )
+
+    def __repr__(self):
+        return f"{self.__class__.__qualname__}({self._serialize()})"
+
+    def __str__(self):
+        serialized = {k: "0x" + v.hex() if isinstance(v, bytes) else v for k, v in self._serialize().items()}
+        return f"{self.__class__.__qualname__}({serialized})"
+
+
 class DefaultVoteVerifier(VoteVerifier):
+    def __init__(self, id_hasher: IdHasher = blake2b_id_hasher):
+        self._id_hasher = id_hasher
+
     async def verify(self, vote: 'DefaultVote'):
         pass
 
+    async def verify_quorum_certificate(self, quorum_certificate: DefaultQuorumCertificate, voters: Sequence[bytes]):
+        vote_ids = (
+            _create_vote_id(self._id_hasher, quorum_certificate.data_id, quorum_certificate.commit_id, voter,
+                            quorum_certificate.epoch_num, quorum_certificate.round_num)
+            for index, voter in enumerate(voters) if quorum_certificate.is_signed_by(index)
+        )
+        if _aggregate_vote_ids(self._id_hasher, vote_ids) != quorum_certificate.id:
+            raise InvalidQuorumCertificate(quorum_certificate.data_id)
+
 
 class DefaultVoteFactory(VoteFactory):
-    def __init__(self, node_id: bytes):
+    UNREAL_VOTES_CACHE_SIZE = 4096
+
+    def __init__(self, node_id: bytes, id_hasher: IdHasher = blake2b_id_hasher, aggregate_votes: bool = False):
         self._node_id = node_id
+        self._id_hasher = id_hasher
+
+        # If aggregate_votes, PrevVotes of own data are sent as DefaultQuorumCertificate instead of the votes.
+        # Every node must be able to verify it. Nodes without it keep sending the votes.
+        self._aggregate_votes = aggregate_votes
+
+        # NoneVote and LazyVote are deterministic by (voter, epoch, round). Votes are immutable, so they are shared.
+        self._create_unreal_vote = lru_cache(maxsize=self.UNREAL_VOTES_CACHE_SIZE)(self._create_unreal_vote)
 
     def _create_id(self,
                    data_id: bytes, commit_id: bytes, voter_id: bytes, epoch_num: int, round_num: int) -> bytes:
-        source = data_id + commit_id + voter_id + epoch_num.to_bytes(64, 'big') + round_num.to_bytes(64, 'big')
-        return sha3_256(source).digest()[:16]
+        return _create_vote_id(self._id_hasher, data_id, commit_id, voter_id, epoch_num, round_num)
+
+    def _create_unreal_vote(self, unreal_id: bytes, voter_id: bytes, epoch_num: int, round_num: int) -> DefaultVote:
+        vote_id = self._create_id(unreal_id, unreal_id, voter_id, epoch_num, round_num)
+        return DefaultVote(vote_id, unreal_id, unreal_id, voter_id, epoch_num, round_num)
 
     async def create_vote(self,
                           data_id: bytes, commit_id: bytes, epoch_num: int, round_num: int) -> DefaultVote:
@@ -98,12 +219,47 @@ class DefaultVoteFactory(VoteFactory):
         return DefaultVote(vote_id, data_id, commit_id, self._node_id, epoch_num, round_num)
 
     def create_none_vote(self, epoch_num: int, round_num: int) -> DefaultVote:
-        vote_id = self._create_id(DefaultVote.NoneVote, DefaultVote.NoneVote, self._node_id, epoch_num, round_num)
-        return DefaultVote(vote_id, DefaultVote.NoneVote, DefaultVote.NoneVote, self._node_id, epoch_num, round_num)
+        return self._create_unreal_vote(DefaultVote.NoneVote, self._node_id, epoch_num, round_num)
 
     def create_lazy_vote(self, voter_id: bytes, epoch_num: int, round_num: int) -> DefaultVote:
-        vote_id = self._create_id(voter_id, voter_id, voter_id, epoch_num, round_num)
-        return DefaultVote(vote_id, DefaultVote.LazyVote, DefaultVote.LazyVote, voter_id, epoch_num, round_num)
+        return self._create_unreal_vote(DefaultVote.LazyVote, voter_id, epoch_num, round_num)
 
     async def create_vote_verifier(self) -> DefaultVoteVerifier:
-        return DefaultVoteVerifier()
+        return DefaultVoteVerifier(self._id_hasher)
+
+    def create_quorum_certificate(self, votes: Sequence[Optional[DefaultVote]]) -> Optional[DefaultQuorumCertificate]:
+        if not self._aggregate_votes:
+            return None
+        first_vote = next((vote for vote in votes if vote), None)
+        if not first_vote:
+            return None
+
+        signers = 0
+        vote_ids = []
+        for index, vote in enumerate(votes):
+            if vote and vote.data_id == first_vote.data_id and vote.commit_id == first_vote.commit_id:
+                signers |= 1 << index
+                vote_ids.append(vote.id)
+        return DefaultQuorumCertificate(_aggregate_vote_ids(self._id_hasher, vote_ids),
+                                        first_vote.data_id,
+                                        first_vote.commit_id,
+                                        signers,
+                                        first_vote.epoch_num,
+                                        first_vote.round_num)
+
+
+def _create_vote_id(id_hasher: IdHasher,
+                    data_id: bytes, commit_id: bytes, voter_id: bytes, epoch_num: int, round_num: int) -> bytes:
+    hasher = id_hasher()
+    hasher.update(data_id)
+    hasher.update(commit_id)
+    hasher.update(voter_id)
+    hasher.update(pack_ints(epoch_num, round_num))
+    return digest_id(hasher)
+
+
+def _aggregate_vote_ids(id_hasher: IdHasher, vote_ids: Iterable[bytes]) -> bytes:
+    hasher = id_hasher()
+    for vote_id in vote_ids:
+        hasher.update(vote_id)
+    return digest_id(hasher)
@@ -0,0 +1,50 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence, Tuple, Union
+from lft.consensus.epoch import Epoch
+from lft.consensus.messages.data import Data
+from lft.consensus.messages.vote import Vote, QuorumCertificate
+from lft.serialization import Serializable, Serializer
+
+__all__ = ("Checkpoint", "RoundCheckpoint", "write_checkpoint", "read_checkpoint")
+
+
+@dataclass
+class RoundCheckpoint(Serializable):
+    epoch_num: int
+    round_num: int
+    candidate_id: bytes
+
+
+@dataclass
+class Checkpoint(Serializable):
+    # State of live rounds. Its size does not depend on the length of the chain.
+    started_round_id: Tuple[int, int]
+    epochs: Sequence[Epoch]
+    rounds: Sequence[RoundCheckpoint]  # The candidate round first
+    datums: Sequence[Data]  # The commit data and real datums of the rounds
+    votes: Sequence[Vote]
+    quorum_certificates: Sequence[QuorumCertificate]
+
+
+def write_checkpoint(path: Union[str, Path], checkpoint: Checkpoint):
+    # Written to a temporary file and renamed, so a crash leaves the old checkpoint or the new one.
+    path = Path(path)
+    temp_path = path.with_name(path.name + ".tmp")
+    with open(str(temp_path), "w") as f:
+        f.write(Serializer().serialize(checkpoint))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(str(temp_path), str(path))
+
+    dir_fd = os.open(str(path.parent), os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def read_checkpoint(path: Union[str, Path]) -> Checkpoint:
+    with open(str(path), "r") as f:
+        return Serializer().deserialize(f.read())
@@ -0,0 +1,91 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Deque, Optional
+from lft.consensus.messages.data import Data, PrevVotes
+from lft.consensus.exceptions import CommitStreamOverflow
+
+__all__ = ("Commit", "CommitStream", "SlowConsumerPolicy")
+
+
+@dataclass(frozen=True)
+class Commit:
+    data: Data
+    votes: PrevVotes  # Votes which committed the data. They are PrevVotes of the next data.
+
+
+class SlowConsumerPolicy(Enum):
+    block = "block"  # Consensus waits until the consumer takes commits
+    drop_oldest = "drop_oldest"  # The consumer sees the gap of data numbers
+    close = "close"  # The consumer gets CommitStreamOverflow after the buffered commits
+
+
+class CommitStream:
+    # Commits in number order. Consensus puts them and an application iterates them with async for.
+    def __init__(self, max_size: int = 1024, policy: SlowConsumerPolicy = SlowConsumerPolicy.block):
+        self._max_size = max(max_size, 1)
+        self._policy = policy
+        self._commits: Deque[Commit] = deque()
+        self._getter: Optional[asyncio.Future] = None
+        self._putter: Optional[asyncio.Future] = None
+        self._is_closed = False
+        self._exception: Optional[Exception] = None
+        self._dropped = 0
+
+    @property
+    def is_closed(self) -> bool:
+        return self._is_closed
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def __len__(self):
+        return len(self._commits)
+
+    async def put(self, commit: Commit):
+        while not self._is_closed and len(self._commits) >= self._max_size:
+            if self._policy == SlowConsumerPolicy.block:
+                self._putter = asyncio.get_event_loop().create_future()
+                await self._putter
+            elif self._policy == SlowConsumerPolicy.drop_oldest:
+                self._commits.popleft()
+                self._dropped += 1
+            else:
+                self.close(CommitStreamOverflow(self._max_size))
+        if self._is_closed:
+            return
+
+        self._commits.append(commit)
+        self._getter = _wake(self._getter)
+
+    def close(self, exception: Optional[Exception] = None):
+        if self._is_closed:
+            return
+        self._is_closed = True
+        self._exception = exception
+        self._getter = _wake(self._getter)
+        self._putter = _wake(self._putter)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Commit:
+        while not self._commits:
+            if self._is_closed:
+                if self._exception:
+                    raise self._exception
+                raise StopAsyncIteration
+            self._getter = asyncio.get_event_loop().create_future()
+            await self._getter
+
+        commit = self._commits.popleft()
+        self._putter = _wake(self._putter)
+        return commit
+
+
+def _wake(future: Optional[asyncio.Future]) -> None:
+    if future and not future.done():
+        future.set_result(None)
+    return None
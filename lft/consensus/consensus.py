@@ -1,20 +1,37 @@
+import asyncio
 import logging
+import time
+from itertools import groupby
+from concurrent.futures import Executor
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING, Iterable, Optional
+from typing import TYPE_CHECKING, Iterable, Optional, Sequence, List, Dict, Tuple
 from lft.event import EventRegister
+from lft.event.mediators import DelayedEventMediator, ExecutorEventMediator
 from lft.consensus.epoch import EpochPool
 from lft.consensus.messages.data import DataPool
-from lft.consensus.messages.vote import VotePool
-from lft.consensus.round import Round, RoundPool
-from lft.consensus.election import Election
-from lft.consensus.events import InitializeEvent, RoundStartEvent, ReceiveDataEvent, ReceiveVoteEvent
-from lft.consensus.exceptions import InvalidRound, InvalidEpoch, InvalidProposer, InvalidVoter
+from lft.consensus.messages.message import ReclaimCounters
+from lft.consensus.messages.future_message import FutureMessageBuffer, FutureMessageCounters
+from lft.consensus.messages.vote import Vote, VotePool, PendingVotePool, QuorumCertificate, verify_vote_batch
+from lft.consensus.round import Round, RoundMessages, RoundPool, PendingRound
+from lft.consensus.election import Election, new_prev_votes
+from lft.consensus.timeout_policy import TimeoutPolicy, FixedTimeoutPolicy
+from lft.consensus.sync import SyncFetcher, fetch_datums
+from lft.consensus.commit_stream import Commit, CommitStream, SlowConsumerPolicy
+from lft.consensus.checkpoint import Checkpoint, RoundCheckpoint
+from lft.consensus.wal import WriteAheadLog
+from lft.consensus.events import (InitializeEvent, RestoreEvent, RoundStartEvent, ReceiveDataEvent, ReceiveVoteEvent,
+                                  ReceiveDatumsEvent, ReceiveVotesEvent, VerifyVotesEvent, DataVerifiedEvent,
+                                  WalSyncedEvent,
+                                  RoundTimeoutEvent, RoundEndEvent, RoundMetricsEvent, ReclaimMessagesEvent,
+                                  SyncFetchedEvent, SyncEndEvent)
+from lft.consensus.exceptions import (InvalidRound, InvalidEpoch, InvalidProposer, InvalidVoter,
+                                      InvalidQuorumCertificate, NeedSync, AlreadySync)
 
 if TYPE_CHECKING:
     from lft.event import EventSystem
     from lft.consensus.epoch import Epoch
-    from lft.consensus.messages.data import Data, DataFactory
-    from lft.consensus.messages.vote import Vote, VoteFactory
+    from lft.consensus.messages.data import Data, DataFactory, PrevVotes
+    from lft.consensus.messages.vote import VoteFactory, VoteVerifier
     from lft.consensus.messages.message import Message
 
 __all__ = ("Consensus", )
@@ -22,7 +39,14 @@ __all__ = ("Consensus", )
 
 class Consensus(EventRegister):
     def __init__(self, event_system: 'EventSystem', node_id: bytes,
-                 data_factory: 'DataFactory', vote_factory: 'VoteFactory'):
+                 data_factory: 'DataFactory', vote_factory: 'VoteFactory',
+                 vote_batch_window: float = 0.0, vote_batch_executor: Optional[Executor] = None,
+                 data_verify_executor: Optional[Executor] = None,
+                 max_future_messages: int = 4096, max_future_messages_per_peer: int = 64,
+                 reclaim_interval: float = 0.0, reclaim_slice: int = 1024,
+                 timeout_policy: Optional[TimeoutPolicy] = None, speculative_proposal: bool = False,
+                 sync_fetcher: Optional[SyncFetcher] = None, sync_executor: Optional[Executor] = None,
+                 sync_batch_size: int = 256, sync_gap: int = 2, wal: Optional[WriteAheadLog] = None):
         super().__init__(event_system.simulator)
 
         self._event_system = event_system
@@ -32,14 +56,94 @@ class Consensus(EventRegister):
 
         self._epoch_pool = EpochPool()
         self._round_pool = RoundPool()
+        self._pending_rounds: Dict[Tuple[int, int], PendingRound] = {}
         self._data_pool = DataPool()
         self._vote_pool = VotePool()
 
+        # Votes are verified in batches only if vote_batch_window is positive.
+        # Received votes are pending for the window and verified together per round.
+        self._vote_batch_window = vote_batch_window
+        self._vote_batch_executor = vote_batch_executor
+        self._vote_verifier: Optional['VoteVerifier'] = None
+        self._pending_vote_pool = PendingVotePool()
+
+        # DataVerifier runs on the executor, not to block the event loop, if it exists.
+        self._data_verify_executor = data_verify_executor
+
+        # Messages of rounds beyond the next round do not create rounds until the node reaches the rounds
+        # or votes of a quorum of voters are buffered for one. The buffer is capped per peer and in total.
+        self._future_messages = FutureMessageBuffer(max_future_messages, max_future_messages_per_peer)
+        self._started_round_id = (0, 0)
+
+        # Pruning messages only raises the watermarks of the pools.
+        # Pruned messages are reclaimed up to reclaim_slice per ReclaimMessagesEvent, every reclaim_interval.
+        self._reclaim_interval = reclaim_interval
+        self._reclaim_slice = reclaim_slice
+        self._is_reclaim_scheduled = False
+        self._reclaim_counters = ReclaimCounters()
+
+        # Rounds wait for the data and the votes as long as the policy says.
+        # It observes the elapsed time of rounds through recorded RoundMetricsEvent.
+        self._timeout_policy = timeout_policy or FixedTimeoutPolicy()
+        self._round_started_at: Dict[Tuple[int, int], float] = {}
+
+        # If speculative_proposal, the proposer of the next round builds its data as soon as the candidate changes.
+        # It is proposed when the round starts, unless the candidate changes again.
+        self._speculative_proposal = speculative_proposal
+        self._speculative_data: Optional['Data'] = None
+
+        # If data arrives more than sync_gap ahead of the candidate and its prev data is unknown,
+        # committed data up to the prev data is fetched by sync_fetcher in batches before rejoining the rounds.
+        self._sync_fetcher = sync_fetcher
+        self._sync_executor = sync_executor
+        self._sync_batch_size = max(sync_batch_size, 2)
+        self._sync_gap = sync_gap
+        self._sync_target: Optional['Data'] = None
+        self._sync_tip: Optional['Data'] = None
+        self._synced_datums: List['Data'] = []
+
+        # Commits are put into the streams when the candidate changes, before its prev data can be pruned.
+        self._commit_streams: List[CommitStream] = []
+        self._commit_number: Optional[int] = None
+
+        # Own data and votes are logged before broadcast. They are restored on initialize not to propose or vote twice.
+        self._wal = wal
+
         self._logger = logging.getLogger(node_id.hex())
 
+    @property
+    def future_message_counters(self) -> FutureMessageCounters:
+        return self._future_messages.counters
+
+    @property
+    def reclaim_counters(self) -> ReclaimCounters:
+        return self._reclaim_counters
+
+    def commit_stream(self, max_size: int = 1024,
+                      policy: SlowConsumerPolicy = SlowConsumerPolicy.block) -> CommitStream:
+        commit_stream = CommitStream(max_size, policy)
+        self._commit_streams.append(commit_stream)
+        return commit_stream
+
+    def find_data(self, data_id: bytes) -> Optional['Data']:
+        # Received data which is not pruned yet
+        try:
+            return self._data_pool.get_data(data_id)
+        except KeyError:
+            return None
+
+    def close(self):
+        for commit_stream in self._commit_streams:
+            commit_stream.close()
+        self._commit_streams.clear()
+        super().close()
+
     async def _on_event_initialize(self, event: InitializeEvent):
         await self.initialize(event.commit_id, event.epoch_pool, event.data_pool, event.vote_pool)
 
+    async def _on_event_restore(self, event: RestoreEvent):
+        await self.restore(event.checkpoint)
+
     async def _on_event_round_start(self, event: RoundStartEvent):
         await self.round_start(event.epoch, event.round_num)
 
@@ -49,6 +153,60 @@ class Consensus(EventRegister):
     async def _on_event_receive_vote(self, event: ReceiveVoteEvent):
         await self.receive_vote(event.vote)
 
+    async def _on_event_receive_datums(self, event: ReceiveDatumsEvent):
+        await self.receive_datums(event.datums)
+
+    async def _on_event_receive_votes(self, event: ReceiveVotesEvent):
+        await self.receive_votes(event.votes)
+
+    async def _on_event_verify_votes(self, event: VerifyVotesEvent):
+        await self.verify_pending_votes(event.epoch_num, event.round_num)
+
+    async def _on_event_round_timeout(self, event: RoundTimeoutEvent):
+        await self.round_timeout(event.epoch_num, event.round_num)
+
+    async def _on_event_round_end(self, event: RoundEndEvent):
+        started_at = self._round_started_at.pop((event.epoch_num, event.round_num), None)
+        if started_at is None:
+            # Not started here or already observed
+            return
+
+        event = RoundMetricsEvent(event.epoch_num, event.round_num, event.is_success, time.monotonic() - started_at)
+        event.deterministic = False
+
+        mediator = self._event_system.get_mediator(DelayedEventMediator)
+        mediator.execute(0, event)
+
+    async def _on_event_round_metrics(self, event: RoundMetricsEvent):
+        self._timeout_policy.observe(event.is_success, event.elapsed)
+
+    async def _on_event_sync_fetched(self, event: SyncFetchedEvent):
+        await self.receive_synced_datums(event.end_id, event.datums)
+
+    async def _on_event_reclaim_messages(self, event: ReclaimMessagesEvent):
+        self._is_reclaim_scheduled = False
+        self.reclaim_messages()
+        self._schedule_reclaim_messages()
+
+    async def _on_event_data_verified(self, event: DataVerifiedEvent):
+        try:
+            round_ = self._round_pool.get_round(event.epoch_num, event.round_num)
+        except KeyError:
+            # Already pruned
+            return
+        await round_.receive_data_verified(event.data_id, event.is_valid)
+
+    async def _on_event_wal_synced(self, event: WalSyncedEvent):
+        try:
+            round_ = self._round_pool.get_round(event.epoch_num, event.round_num)
+        except KeyError:
+            # Already pruned
+            return
+        if event.is_success:
+            await round_.receive_wal_synced(event.message)
+        else:
+            round_.receive_wal_sync_failed(event.message, event.seq)
+
     async def initialize(self, commit_id: bytes,
                          epoch_pool: Iterable['Epoch'], data_pool: Iterable['Data'], vote_pool: Iterable['Vote']):
         for epoch in epoch_pool:
@@ -60,6 +218,11 @@ class Consensus(EventRegister):
             else:
                 self._new_round(data.epoch_num, data.round_num, commit_id)
 
+        if self._round_pool.rounds:
+            # The candidate round was started before. Messages of the rounds next to it are not far-future.
+            candidate_round = self._get_candidate_round()
+            self._started_round_id = max(self._started_round_id, (candidate_round.epoch_num, candidate_round.num))
+
         for round_ in self._round_pool.rounds:
             datums = (data for data in data_pool
                       if data.epoch_num == round_.epoch_num
@@ -71,7 +234,78 @@ class Consensus(EventRegister):
                      if vote.epoch_num == round_.epoch_num
                      if vote.round_num == round_.num)
             for vote in votes:
-                await self.receive_vote(vote)
+                await self._receive_vote(vote)
+        await self._restore_logged_messages()
+
+    def checkpoint(self) -> Checkpoint:
+        candidate_round = self._get_candidate_round()
+        try:
+            datums = [self._data_pool.get_data(candidate_round.candidate_id)]
+        except KeyError:
+            # Genesis round
+            datums = []
+
+        votes = []
+        quorum_certificates = []
+        for round_ in self._round_pool.rounds:
+            datums.extend(data for _, data in round_.messages.datums if data.is_real())
+            votes.extend(vote for _, vote in round_.messages.votes)
+            quorum_certificate = round_.result_id and self._vote_pool.get_quorum_certificate(round_.result_id)
+            if quorum_certificate:
+                quorum_certificates.append(quorum_certificate)
+
+        rounds = [RoundCheckpoint(round_.epoch_num, round_.num, round_.candidate_id)
+                  for round_ in self._round_pool.rounds]
+        return Checkpoint(self._started_round_id, self._epoch_pool.epochs, rounds, datums, votes, quorum_certificates)
+
+    async def restore(self, checkpoint: Checkpoint):
+        # Messages of the checkpoint were verified when they were received.
+        # They go to the pools and the rounds directly.
+        for epoch in checkpoint.epochs:
+            self._epoch_pool.add_epoch(epoch)
+        for data in checkpoint.datums:
+            self._data_pool.add_data(data)
+        self._vote_pool.add_votes(checkpoint.votes)
+        for quorum_certificate in checkpoint.quorum_certificates:
+            self._vote_pool.add_quorum_certificate(quorum_certificate)
+
+        for round_checkpoint in checkpoint.rounds:
+            round_ = self._round_pool.find_round(round_checkpoint.epoch_num, round_checkpoint.round_num)
+            if not round_:
+                round_ = self._new_round(round_checkpoint.epoch_num, round_checkpoint.round_num,
+                                         round_checkpoint.candidate_id)
+            round_.candidate_id = round_checkpoint.candidate_id
+
+        for round_ in self._round_pool.rounds:
+            round_id = (round_.epoch_num, round_.num)
+            for data in checkpoint.datums:
+                if _round_id(data) == round_id:
+                    await round_.receive_data(data)
+            await round_.receive_votes([vote for vote in checkpoint.votes if _round_id(vote) == round_id])
+            for quorum_certificate in checkpoint.quorum_certificates:
+                await round_.receive_quorum_certificate(quorum_certificate)
+
+        self._started_round_id = max(self._started_round_id, tuple(checkpoint.started_round_id))
+        await self._restore_logged_messages()
+        candidate_round = self._get_candidate_round()
+        if candidate_round.candidate_id in self._data_pool:
+            self._commit_number = self._data_pool.get_data(candidate_round.candidate_id).number
+
+    async def _restore_logged_messages(self):
+        # Own messages logged before the restart. They may not have been broadcast, so they are broadcast again.
+        if not self._wal:
+            return
+        for message in self._wal.messages:
+            if self._get_candidate_round().is_newer_than(message.epoch_num, message.round_num):
+                continue
+            round_ = self._new_or_get_round(message.epoch_num, message.round_num)
+            if isinstance(message, Vote):
+                self._vote_pool.add_vote(message)
+                await round_.receive_vote(message)
+            else:
+                self._data_pool.add_data(message)
+                await round_.receive_data(message)
+            await round_.receive_wal_synced(message)
 
     async def round_start(self, new_epoch: 'Epoch', new_round_num: int):
         if self._get_candidate_round().is_newer_than(new_epoch.num, new_round_num):
@@ -80,16 +314,39 @@ class Consensus(EventRegister):
 
         self._epoch_pool.add_epoch(new_epoch)
 
-        new_round = self._new_or_get_round(new_epoch.num, new_round_num)
+        new_round = await self._materialize_round(new_epoch.num, new_round_num)
+        self._round_started_at.setdefault((new_epoch.num, new_round_num), time.monotonic())
+        self._give_speculative_data(new_round)
         await new_round.round_start()
 
+        self._started_round_id = max(self._started_round_id, (new_epoch.num, new_round_num))
+        await self._release_future_messages(self._future_messages.pop_messages_until(new_epoch.num, new_round_num + 1))
+
+    def reclaim_messages(self) -> int:
+        start = time.perf_counter()
+        reclaimed = self._data_pool.reclaim(self._reclaim_slice)
+        reclaimed += self._vote_pool.reclaim(self._reclaim_slice - reclaimed)
+
+        self._reclaim_counters.reclaimed += reclaimed
+        self._reclaim_counters.slices += 1
+        self._reclaim_counters.elapsed += time.perf_counter() - start
+        return reclaimed
+
     async def receive_data(self, data: 'Data'):
+        if self._find_decided_round(data):
+            # The result of the round is already in DataPool. Others cannot change it.
+            return
         await self._receive_prev_votes(data)
+        await self._receive_data(data)
 
+    async def _receive_data(self, data: 'Data', buffering=True):
         try:
             self._verify_acceptable_data(data)
         except (InvalidEpoch, InvalidRound, InvalidProposer):
             return
+        if buffering and self._is_future_message(data):
+            self._future_messages.add_message(data, data.proposer_id)
+            return
         self._data_pool.add_data(data)
 
         try:
@@ -98,12 +355,67 @@ class Consensus(EventRegister):
             return
         await self._receive_data_and_change_candidate_if_available(data)
 
+    async def receive_datums(self, datums: Sequence['Data']):
+        # Older datums first. They may be the prev data of the others.
+        datums = sorted((data for data in datums if not self._find_decided_round(data)), key=_round_id)
+
+        prev_votes = []
+        for data in datums:
+            if isinstance(data.prev_votes, QuorumCertificate):
+                await self._receive_quorum_certificate(data.prev_votes)
+            else:
+                prev_votes.extend(prev_vote for prev_vote in data.prev_votes if prev_vote)
+        await self._receive_prev_vote_batch(prev_votes)
+        await self._receive_datums(datums)
+
     async def receive_vote(self, vote: 'Vote'):
+        if self._is_needless_vote(vote):
+            return
+        if self._is_vote_batch_enabled() and not vote.is_lazy():
+            self._add_pending_vote(vote)
+        else:
+            await self._receive_vote(vote)
+
+    async def receive_votes(self, votes: Sequence['Vote']):
+        votes = [vote for vote in votes if not self._is_needless_vote(vote)]
+        if self._is_vote_batch_enabled():
+            # Votes of a frame arrive together. They need not to wait for the window.
+            await self._receive_vote_batch(votes)
+        else:
+            await self._receive_votes(votes)
+
+    async def verify_pending_votes(self, epoch_num: int, round_num: int):
+        votes = self._pending_vote_pool.pop_votes(epoch_num, round_num)
+        await self._receive_vote_batch(votes)
+
+    async def round_timeout(self, epoch_num: int, round_num: int):
+        if self._get_candidate_round().is_newer_than(epoch_num, round_num):
+            return
+        try:
+            round_ = self._round_pool.get_round(epoch_num, round_num)
+        except KeyError:
+            # Already pruned
+            return
+        if round_.is_decided:
+            return
+
+        # Voters whose votes are missing vote for LazyData. They are tallied at once.
+        lazy_votes = [self._vote_factory.create_lazy_vote(voter, epoch_num, round_num)
+                      for voter in round_.missing_voters]
+        if lazy_votes:
+            await self._receive_votes(lazy_votes)
+
+    async def _receive_vote(self, vote: 'Vote', buffering=True):
         try:
             self._verify_acceptable_vote(vote)
         except (InvalidEpoch, InvalidRound, InvalidVoter):
             return
+        if buffering and self._is_future_message(vote):
+            await self._buffer_future_vote(vote)
+            return
         self._vote_pool.add_vote(vote)
+        if self._find_decided_round(vote):
+            return
 
         try:
             self._verify_round_message(vote)
@@ -111,28 +423,361 @@ class Consensus(EventRegister):
             return
         await self._receive_vote_and_change_candidate_if_available(vote)
 
+    async def _receive_votes(self, votes: Sequence['Vote']):
+        # Votes are received per round. Candidate change and pruning are evaluated once per round, not per vote.
+        for _, round_votes in groupby(sorted(votes, key=_round_id), key=_round_id):
+            await self._receive_round_votes(list(round_votes))
+
+    async def _receive_round_votes(self, votes: List['Vote']):
+        acceptable_votes = []
+        for vote in self._filter_acceptable_votes(votes):
+            if self._is_future_message(vote):
+                await self._buffer_future_vote(vote)
+            else:
+                acceptable_votes.append(vote)
+        if not acceptable_votes:
+            return
+        self._vote_pool.add_votes(acceptable_votes)
+        if self._find_decided_round(acceptable_votes[0]):
+            return
+
+        try:
+            self._verify_round_message(acceptable_votes[0])
+        except InvalidRound:
+            return
+        await self._receive_votes_and_change_candidate_if_available(acceptable_votes)
+
+    async def _receive_datums(self, datums: Sequence['Data']):
+        # Datums are received per round. Candidate change and pruning are evaluated once per round, not per data.
+        for _, round_datums in groupby(sorted(datums, key=_round_id), key=_round_id):
+            await self._receive_round_datums(list(round_datums))
+
+    async def _receive_round_datums(self, datums: List['Data']):
+        acceptable_datums = []
+        for data in self._filter_acceptable_datums(datums):
+            if self._is_future_message(data):
+                self._future_messages.add_message(data, data.proposer_id)
+            else:
+                acceptable_datums.append(data)
+        if not acceptable_datums:
+            return
+        for data in acceptable_datums:
+            self._data_pool.add_data(data)
+
+        try:
+            self._verify_round_message(acceptable_datums[0])
+        except InvalidRound:
+            return
+        await self._receive_datums_and_change_candidate_if_available(acceptable_datums)
+
+    async def _receive_vote_batch(self, votes: Sequence['Vote']):
+        votes = list(self._filter_acceptable_votes(votes))
+        if not votes:
+            return
+
+        results = await self._verify_vote_batch(votes)
+        valid_votes = []
+        for vote, result in zip(votes, results):
+            if result is None:
+                valid_votes.append(vote)
+            else:
+                self._logger.debug(f"Invalid vote: {vote}, {result!r}")
+        await self._receive_votes(valid_votes)
+
+    async def _verify_vote_batch(self, votes: List['Vote']):
+        vote_verifier = await self._get_vote_verifier()
+        if self._vote_batch_executor:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self._vote_batch_executor,
+                                              verify_vote_batch, vote_verifier, votes)
+        else:
+            return await vote_verifier.verify_batch(votes)
+
+    async def _get_vote_verifier(self) -> 'VoteVerifier':
+        if not self._vote_verifier:
+            self._vote_verifier = await self._vote_factory.create_vote_verifier()
+        return self._vote_verifier
+
+    def _filter_acceptable_datums(self, datums: Iterable['Data']):
+        for data in datums:
+            try:
+                self._verify_acceptable_data(data)
+            except (InvalidEpoch, InvalidRound, InvalidProposer):
+                continue
+            yield data
+
+    def _filter_acceptable_votes(self, votes: Iterable['Vote']):
+        for vote in votes:
+            try:
+                self._verify_acceptable_vote(vote)
+            except (InvalidEpoch, InvalidRound, InvalidVoter):
+                continue
+            yield vote
+
+    def _add_pending_vote(self, vote: 'Vote'):
+        if not self._pending_vote_pool.add_vote(vote):
+            return
+
+        event = VerifyVotesEvent(vote.epoch_num, vote.round_num)
+        event.deterministic = False
+
+        mediator = self._event_system.get_mediator(DelayedEventMediator)
+        mediator.execute(self._vote_batch_window, event)
+
+    def _is_vote_batch_enabled(self):
+        return self._vote_batch_window > 0
+
     async def _receive_prev_votes(self, data: 'Data'):
-        for prev_vote in data.prev_votes:
-            if prev_vote:
-                await self.receive_vote(prev_vote)
+        if isinstance(data.prev_votes, QuorumCertificate):
+            await self._receive_quorum_certificate(data.prev_votes)
+            return
+
+        prev_votes = [prev_vote for prev_vote in data.prev_votes if prev_vote]
+        await self._receive_prev_vote_batch(prev_votes)
+
+    async def _receive_prev_vote_batch(self, prev_votes: Sequence['Vote']):
+        if self._is_vote_batch_enabled():
+            # PrevVotes arrive together. They need not to wait for the window.
+            await self._receive_vote_batch(prev_votes)
+        else:
+            await self._receive_votes(prev_votes)
+
+    def _is_future_message(self, message: 'Message'):
+        if message.epoch_num == self._started_round_id[0]:
+            is_future = message.round_num > self._started_round_id[1] + 1
+        else:
+            is_future = (message.epoch_num, message.round_num) > (self._started_round_id[0] + 1, 0)
+        if not is_future:
+            return False
+        try:
+            self._round_pool.get_round(message.epoch_num, message.round_num)
+        except KeyError:
+            return True
+        else:
+            return False
+
+    async def _buffer_future_vote(self, vote: 'Vote'):
+        if not self._future_messages.add_message(vote, vote.voter_id):
+            return
+
+        # Others are at the round. Messages of it are needed to follow them.
+        epoch = self._get_epoch(vote.epoch_num)
+        if self._future_messages.reach_quorum(vote.epoch_num, vote.round_num, epoch.quorum_num):
+            await self._release_future_messages(self._future_messages.pop_messages(vote.epoch_num, vote.round_num))
+
+    async def _release_future_messages(self, messages: Iterable['Message']):
+        for message in messages:
+            if isinstance(message, Vote):
+                await self._receive_vote(message, buffering=False)
+            else:
+                await self._receive_data(message, buffering=False)
+
+    async def _receive_quorum_certificate(self, quorum_certificate: 'QuorumCertificate'):
+        if self._vote_pool.get_quorum_certificate(quorum_certificate.data_id) == quorum_certificate:
+            return
+
+        try:
+            await self._verify_acceptable_quorum_certificate(quorum_certificate)
+        except (InvalidEpoch, InvalidRound, InvalidQuorumCertificate) as e:
+            self._logger.debug(f"Invalid quorum certificate: {quorum_certificate}, {e!r}")
+            return
+        self._vote_pool.add_quorum_certificate(quorum_certificate)
+
+        try:
+            self._verify_round_message(quorum_certificate)
+        except InvalidRound:
+            return
+
+        round_ = await self._materialize_round(quorum_certificate.epoch_num, quorum_certificate.round_num)
+        async with self._try_change_candidate(round_, pruning_messages=True):
+            await round_.receive_quorum_certificate(quorum_certificate)
 
     async def _receive_data_and_change_candidate_if_available(self, data: 'Data'):
-        round_ = self._new_or_get_round(data.epoch_num, data.round_num)
+        round_ = await self._get_or_pend_round(data)
+        if not round_:
+            return
+
         if data.is_real():
             if data.is_genesis() or data.prev_id in self._data_pool:
                 async with self._try_change_candidate(round_, pruning_messages=True):
                     await round_.receive_data(data)
+            else:
+                self._sync_if_needed(data)
         else:
             await round_.receive_data(data)
 
+    async def _receive_datums_and_change_candidate_if_available(self, datums: List['Data']):
+        # Datums are pended until the round is materialized. The rest go to the round at once.
+        datums = iter(datums)
+        for data in datums:
+            round_ = await self._get_or_pend_round(data)
+            if round_:
+                break
+        else:
+            return
+
+        connected_datums = []
+        for data in [data, *datums]:
+            if not data.is_real() or data.is_genesis() or data.prev_id in self._data_pool:
+                connected_datums.append(data)
+            else:
+                self._sync_if_needed(data)
+
+        async with self._try_change_candidate(round_, pruning_messages=True):
+            for data in connected_datums:
+                await round_.receive_data(data)
+
     async def _receive_vote_and_change_candidate_if_available(self, vote: 'Vote'):
-        round_ = self._new_or_get_round(vote.epoch_num, vote.round_num)
+        round_ = await self._get_or_pend_round(vote)
+        if not round_:
+            return
+
         if not vote.is_none() and not vote.is_lazy():
             async with self._try_change_candidate(round_, pruning_messages=True):
                 await round_.receive_vote(vote)
         else:
             await round_.receive_vote(vote)
 
+    async def _receive_votes_and_change_candidate_if_available(self, votes: List['Vote']):
+        # Votes are pended until the round is materialized. The rest go to the round at once.
+        votes = iter(votes)
+        for vote in votes:
+            round_ = await self._get_or_pend_round(vote)
+            if round_:
+                break
+        else:
+            return
+
+        async with self._try_change_candidate(round_, pruning_messages=True):
+            await round_.receive_votes([vote, *votes])
+
+    async def receive_synced_datums(self, end_id: bytes, datums: Sequence['Data']):
+        if not self._sync_target or self._sync_target.prev_id != end_id:
+            return
+
+        try:
+            certified = await self._verify_synced_datums(datums)
+        except (NeedSync, InvalidEpoch, InvalidProposer, InvalidVoter, InvalidQuorumCertificate) as e:
+            self._logger.debug(f"Sync failed: {e!r}")
+            await self._end_sync(is_success=False)
+            return
+
+        for data, prev_votes in certified:
+            self._data_pool.add_data(data)
+            if isinstance(prev_votes, QuorumCertificate):
+                self._vote_pool.add_quorum_certificate(prev_votes)
+            else:
+                self._vote_pool.add_votes([prev_vote for prev_vote in prev_votes if prev_vote])
+            self._synced_datums.append(data)
+        self._sync_tip = certified[-1][0]
+
+        if self._sync_tip.id == end_id:
+            await self._end_sync(is_success=True)
+        else:
+            self._fetch_synced_datums()
+
+    def _sync_if_needed(self, data: 'Data'):
+        if not self._sync_fetcher:
+            return
+        try:
+            self._verify_data_synced(data)
+        except NeedSync:
+            self._sync_target = data
+            self._sync_tip = self._get_candidate_data()
+            self._synced_datums = [self._sync_tip]
+            self._fetch_synced_datums()
+        except AlreadySync:
+            pass
+
+    def _verify_data_synced(self, data: 'Data'):
+        if self._sync_target:
+            raise AlreadySync(self._sync_target.prev_id)
+        candidate_data = self._get_candidate_data()
+        if data.number > candidate_data.number + self._sync_gap:
+            raise NeedSync(candidate_data.id, data.prev_id)
+        # Prev data may be on the way
+
+    def _fetch_synced_datums(self):
+        end_id = self._sync_target.prev_id
+
+        def _to_event(result):
+            event = SyncFetchedEvent(end_id=end_id, datums=[] if isinstance(result, Exception) else list(result))
+            event.deterministic = False
+            return event
+
+        mediator = self._event_system.get_mediator(ExecutorEventMediator)
+        mediator.execute(self._sync_executor, fetch_datums,
+                         (self._sync_fetcher, self._sync_tip.number + 1, end_id, self._sync_batch_size), _to_event)
+
+    async def _verify_synced_datums(self, datums: Sequence['Data']):
+        # Returns pairs of data and its votes.
+        # The last data is not certified until the next batch, if it is not the end.
+        prev_data = self._sync_tip
+        for data in datums:
+            if data.prev_id != prev_data.id or data.number != prev_data.number + 1:
+                raise NeedSync(prev_data.id, data.prev_id)
+            self._get_epoch(data.epoch_num).verify_proposer(data.proposer_id, data.round_num)
+            prev_data = data
+
+        next_datums = list(datums[1:])
+        if datums and datums[-1].id == self._sync_target.prev_id:
+            next_datums.append(self._sync_target)
+        certified = [(data, next_data.prev_votes) for data, next_data in zip(datums, next_datums)]
+        if not certified:
+            raise NeedSync(self._sync_tip.id, self._sync_target.prev_id)
+
+        votes = []
+        for data, prev_votes in certified:
+            epoch = self._get_epoch(data.epoch_num)
+            if isinstance(prev_votes, QuorumCertificate):
+                if prev_votes.data_id != data.id:
+                    raise InvalidQuorumCertificate(data.id)
+                await self._verify_acceptable_quorum_certificate(prev_votes)
+                continue
+
+            data_votes = [prev_vote for prev_vote in prev_votes
+                          if prev_vote and prev_vote.data_id == data.id
+                          if prev_vote.epoch_num == data.epoch_num and prev_vote.round_num == data.round_num]
+            for vote in data_votes:
+                epoch.verify_voter(vote.voter_id)
+            if len({vote.voter_id for vote in data_votes}) < epoch.quorum_num:
+                raise InvalidQuorumCertificate(data.id)
+            votes.extend(data_votes)
+
+        if votes:
+            results = await self._verify_vote_batch(votes)
+            for vote, result in zip(votes, results):
+                if result is not None:
+                    raise InvalidQuorumCertificate(vote.data_id) from result
+        return certified
+
+    async def _end_sync(self, is_success: bool):
+        target, candidate_data = self._sync_target, self._sync_tip
+        # The last two are committed by the rounds of the synced candidate and the target
+        synced_datums = self._synced_datums
+        commit_datums = synced_datums[:-2]
+        self._sync_target = None
+        self._sync_tip = None
+        self._synced_datums = []
+
+        if not is_success:
+            self._event_system.simulator.raise_event(SyncEndEvent(is_success=False, commit_datums=[]))
+            return
+        self._event_system.simulator.raise_event(SyncEndEvent(is_success=True, commit_datums=commit_datums))
+        for data, next_data in zip(commit_datums, synced_datums[1:]):
+            await self._publish_commit(data, next_data.prev_votes)
+
+        # The synced candidate is decided by its votes in the data synced for, like a live round.
+        round_ = self._new_or_get_round(candidate_data.epoch_num, candidate_data.round_num)
+        self._prune_round(candidate_data.epoch_num, candidate_data.round_num)
+        round_.candidate_id = candidate_data.prev_id
+        async with self._try_change_candidate(round_, pruning_messages=True):
+            await round_.receive_data(candidate_data)
+            if isinstance(target.prev_votes, QuorumCertificate):
+                await round_.receive_quorum_certificate(target.prev_votes)
+            else:
+                await round_.receive_votes([prev_vote for prev_vote in target.prev_votes if prev_vote])
+
     def _verify_acceptable_message(self, message: 'Message'):
         # To avoid MMO attack, app must prevent to receive newer messages than current round's.
         # To get the messages at the round of messages the app has to gossip.
@@ -163,6 +808,22 @@ class Consensus(EventRegister):
         epoch = self._get_epoch(vote.epoch_num)
         epoch.verify_voter(vote.voter_id)
 
+    async def _verify_acceptable_quorum_certificate(self, quorum_certificate: 'QuorumCertificate'):
+        self._verify_acceptable_message(quorum_certificate)
+        epoch = self._get_epoch(quorum_certificate.epoch_num)
+        if quorum_certificate.signers_num < epoch.quorum_num:
+            raise InvalidQuorumCertificate(quorum_certificate.data_id)
+        if quorum_certificate.signers >> epoch.voters_num:
+            raise InvalidQuorumCertificate(quorum_certificate.data_id)
+
+        vote_verifier = await self._get_vote_verifier()
+        try:
+            await vote_verifier.verify_quorum_certificate(quorum_certificate, epoch.voters)
+        except InvalidQuorumCertificate:
+            raise
+        except Exception as e:
+            raise InvalidQuorumCertificate(quorum_certificate.data_id) from e
+
     def _verify_round_message(self, message: 'Message'):
         candidate_round = self._get_candidate_round()
         if candidate_round.is_newer_than(message.epoch_num, message.round_num):
@@ -176,10 +837,12 @@ class Consensus(EventRegister):
 
     def _new_round(self, epoch_num: int, round_num: int, candidate_id: bytes):
         epoch = self._get_epoch(epoch_num)
+        messages = RoundMessages(epoch)
         election = Election(self._node_id, epoch, round_num, self._event_system,
-                            self._data_factory, self._vote_factory, self._data_pool, self._vote_pool)
+                            self._data_factory, self._vote_factory, self._data_pool, self._vote_pool,
+                            self._data_verify_executor, messages, self._wal)
         new_round = Round(election, self._node_id, epoch, round_num,
-                          self._event_system, self._data_factory, self._vote_factory)
+                          self._event_system, self._data_factory, self._vote_factory, messages, self._timeout_policy)
         new_round.candidate_id = candidate_id
         self._round_pool.add_round(new_round)
         return new_round
@@ -192,16 +855,87 @@ class Consensus(EventRegister):
             round_ = self._new_round(epoch_num, round_num, candidate_round.result_id)
             return round_
 
+    async def _get_or_pend_round(self, message: 'Message') -> Optional[Round]:
+        try:
+            return self._round_pool.get_round(message.epoch_num, message.round_num)
+        except KeyError:
+            pass
+
+        round_id = (message.epoch_num, message.round_num)
+        pending_round = self._pending_rounds.get(round_id)
+        if not pending_round:
+            pending_round = PendingRound(self._get_epoch(message.epoch_num), message.round_num)
+            self._pending_rounds[round_id] = pending_round
+        pending_round.add_message(message)
+
+        if pending_round.reach_quorum():
+            # The message is received by the round with the others.
+            await self._materialize_round(message.epoch_num, message.round_num)
+        return None
+
+    async def _materialize_round(self, epoch_num: int, round_num: int) -> Round:
+        round_ = self._new_or_get_round(epoch_num, round_num)
+        pending_round = self._pending_rounds.pop((epoch_num, round_num), None)
+        if pending_round:
+            for data in pending_round.datums:
+                await self._receive_data_and_change_candidate_if_available(data)
+            for vote in pending_round.votes:
+                await self._receive_vote_and_change_candidate_if_available(vote)
+        return round_
+
+    def _is_needless_vote(self, vote: 'Vote'):
+        # Only votes for the result of a decided round are needed later, as PrevVotes of the next data.
+        decided_round = self._find_decided_round(vote)
+        return decided_round is not None and vote.data_id != decided_round.result_id
+
+    def _find_decided_round(self, message: 'Message') -> Optional[Round]:
+        round_ = self._round_pool.find_round(message.epoch_num, message.round_num)
+        if round_ and round_.is_decided:
+            return round_
+        return None
+
+    def _get_candidate_data(self) -> 'Data':
+        candidate_round = self._get_candidate_round()
+        try:
+            return self._data_pool.get_data(candidate_round.result_id)
+        except KeyError:
+            return self._data_pool.get_data(candidate_round.candidate_id)
+
     def _get_candidate_round(self):
         return self._round_pool.first_round()
 
     def _prune_round(self, latest_epoch_num: int, latest_round_num: int):
         self._epoch_pool.prune_epoch(latest_epoch_num - 1)  # Need prev epoch
         self._round_pool.prune_round(latest_epoch_num, latest_round_num)
+        if self._wal:
+            self._wal.prune(latest_epoch_num, latest_round_num)
+        self._future_messages.prune_message(latest_epoch_num, latest_round_num)
+        self._pending_rounds = {
+            round_id: pending_round for round_id, pending_round in self._pending_rounds.items()
+            if round_id >= (latest_epoch_num, latest_round_num)
+        }
+        self._round_started_at = {
+            round_id: started_at for round_id, started_at in self._round_started_at.items()
+            if round_id >= (latest_epoch_num, latest_round_num)
+        }
 
     def _prune_messages(self, latest_epoch_num: int, latest_round_num: int):
         self._data_pool.prune_data(latest_epoch_num, latest_round_num)
         self._vote_pool.prune_vote(latest_epoch_num, latest_round_num)
+        self._schedule_reclaim_messages()
+
+    def _schedule_reclaim_messages(self):
+        if self._is_reclaim_scheduled:
+            return
+        if not self._data_pool.reclaimable and not self._vote_pool.reclaimable:
+            return
+
+        event = ReclaimMessagesEvent()
+        event.deterministic = False
+
+        mediator = self._event_system.get_mediator(DelayedEventMediator)
+        mediator.execute(self._reclaim_interval, event)
+        self._is_reclaim_scheduled = True
 
     def _prune_messages_before_commit(self):
         candidate_round = self._get_candidate_round()
@@ -221,20 +955,70 @@ class Consensus(EventRegister):
             yield
         finally:
             if is_candidate_changed():
+                await self._publish_candidate_commit(target_round)
                 self._prune_round(target_round.epoch_num, target_round.num)
                 await self._propagate_candidate_changed(target_round)
                 await self._try_change_candidate_connected_datums(target_round.result_id)
+                await self._speculate_next_data(target_round)
 
                 if pruning_messages:
                     self._prune_messages_before_commit()
 
+    async def _publish_candidate_commit(self, candidate_round: Round):
+        candidate = self._data_pool.get_data(candidate_round.result_id)
+        try:
+            commit = self._data_pool.get_data(candidate.prev_id)
+        except KeyError:
+            # Genesis data
+            return
+        await self._publish_commit(commit, candidate.prev_votes)
+
+    async def _publish_commit(self, data: 'Data', votes: 'PrevVotes'):
+        if self._commit_number is not None and data.number <= self._commit_number:
+            return
+        self._commit_number = data.number
+
+        commit = Commit(data, votes)
+        self._commit_streams = [commit_stream for commit_stream in self._commit_streams
+                                if not commit_stream.is_closed]
+        for commit_stream in self._commit_streams:
+            await commit_stream.put(commit)
+
     async def _try_change_candidate_connected_datums(self, prev_id: bytes):
         datums = self._data_pool.get_datums_connected(prev_id)
         for data in datums:
-            round_ = self._new_or_get_round(data.epoch_num, data.round_num)
+            round_ = await self._materialize_round(data.epoch_num, data.round_num)
             async with self._try_change_candidate(round_):
                 await self.receive_data(data)
 
+    async def _speculate_next_data(self, candidate_round: Round):
+        self._speculative_data = None
+        if not self._speculative_proposal:
+            return
+        if self._get_candidate_round() is not candidate_round:
+            # The candidate is changed again by its connected datums
+            return
+
+        epoch = self._get_epoch(candidate_round.epoch_num)
+        next_round_num = candidate_round.num + 1
+        if epoch.get_proposer_id(next_round_num) != self._node_id:
+            return
+
+        candidate_data = self._data_pool.get_data(candidate_round.result_id)
+        self._speculative_data = await self._data_factory.create_data(
+            data_number=candidate_data.number + 1,
+            prev_id=candidate_data.id,
+            epoch_num=epoch.num,
+            round_num=next_round_num,
+            prev_votes=new_prev_votes(self._vote_pool, self._vote_factory, epoch, candidate_data)
+        )
+
+    def _give_speculative_data(self, new_round: Round):
+        data = self._speculative_data
+        if data and data.epoch_num == new_round.epoch_num and data.round_num == new_round.num:
+            new_round.receive_speculative_data(data)
+            self._speculative_data = None
+
     async def _propagate_candidate_changed(self, target_round: Round):
         candidate = self._data_pool.get_data(target_round.result_id)
         self._round_pool.change_candidate(candidate.prev_id)
@@ -253,7 +1037,22 @@ class Consensus(EventRegister):
 
     _handler_prototypes = {
         InitializeEvent: _on_event_initialize,
+        RestoreEvent: _on_event_restore,
         RoundStartEvent: _on_event_round_start,
         ReceiveDataEvent: _on_event_receive_data,
         ReceiveVoteEvent: _on_event_receive_vote,
+        ReceiveDatumsEvent: _on_event_receive_datums,
+        ReceiveVotesEvent: _on_event_receive_votes,
+        VerifyVotesEvent: _on_event_verify_votes,
+        DataVerifiedEvent: _on_event_data_verified,
+        WalSyncedEvent: _on_event_wal_synced,
+        RoundTimeoutEvent: _on_event_round_timeout,
+        RoundEndEvent: _on_event_round_end,
+        RoundMetricsEvent: _on_event_round_metrics,
+        ReclaimMessagesEvent: _on_event_reclaim_messages,
+        SyncFetchedEvent: _on_event_sync_fetched,
     }
+
+
+def _round_id(message: 'Message'):
+    return message.epoch_num, message.round_num
@@ -1,14 +1,19 @@
+import asyncio
 import logging
-from typing import DefaultDict, OrderedDict, Set, Optional, Dict
-from lft.consensus.messages.data import Data, DataFactory, DataPool, DataVerifier
-from lft.consensus.messages.vote import Vote, VoteFactory, VotePool
+from concurrent.futures import Executor
+from typing import OrderedDict, Optional, List, Set, Sequence, Union
+from lft.consensus.messages.data import Data, DataFactory, DataPool, DataVerifier, PrevVotes, verify_data
+from lft.consensus.messages.vote import Vote, VoteFactory, VotePool, QuorumCertificate
 from lft.consensus.events import (RoundEndEvent, BroadcastDataEvent, BroadcastVoteEvent,
-                                  ReceiveDataEvent, ReceiveVoteEvent)
-from lft.consensus.epoch import Epoch
+                                  ReceiveDataEvent, ReceiveVoteEvent, DataVerifiedEvent, WalSyncedEvent)
+from lft.consensus.epoch import Epoch, VotersBitmap
+from lft.consensus.round_messages import RoundMessages
+from lft.consensus.wal import WriteAheadLog, sync_wal
 from lft.consensus.exceptions import InvalidProposer
 from lft.event import EventSystem
+from lft.event.mediators import ExecutorEventMediator
 
-__all__ = ("Election", "ElectionMessages")
+__all__ = ("Election", "ElectionMessages", "new_prev_votes")
 
 
 class Election:
@@ -20,7 +25,10 @@ class Election:
                  data_factory: DataFactory,
                  vote_factory: VoteFactory,
                  data_pool: DataPool,
-                 vote_pool: VotePool):
+                 vote_pool: VotePool,
+                 data_verify_executor: Optional[Executor] = None,
+                 round_messages: Optional[RoundMessages] = None,
+                 wal: Optional[WriteAheadLog] = None):
         self._node_id: bytes = node_id
         self._epoch = epoch
         self._round_num = round_num
@@ -35,11 +43,22 @@ class Election:
 
         self._data_verifier: DataVerifier = None
 
+        # If data_verify_executor exists, DataVerifier runs on it instead of the event loop.
+        # The vote is broadcast when DataVerifiedEvent arrives.
+        self._data_verify_executor = data_verify_executor
+        self._data_verifying: Optional[asyncio.Future] = None
+        self._data_verifying_id: Optional[bytes] = None
+
+        # If wal exists, own data and votes are broadcast after they are logged.
+        # The logging is grouped with others on the worker threads and WalSyncedEvent releases them.
+        self._wal = wal
+
         self._candidate_id: bytes = None
-        self._messages: ElectionMessages = ElectionMessages(epoch, round_num, data_factory)
+        self._messages: ElectionMessages = ElectionMessages(epoch, round_num, data_factory, round_messages)
 
         self._is_proposed = False
         self._is_voted = False
+        self._speculative_data: Optional[Data] = None
 
         self._is_ended = False
         self._is_started = False
@@ -52,6 +71,19 @@ class Election:
         else:
             return None
 
+    @property
+    def is_ended(self):
+        return self._is_ended
+
+    @property
+    def missing_voters(self) -> List[bytes]:
+        # Voters whose votes are not tallied. A vote is not tallied until its data arrives.
+        return [voter for voter in self._epoch.voters if voter not in self._messages.voters]
+
+    def receive_speculative_data(self, data: Data):
+        # Own data built before the round starts. It is proposed if it still extends the candidate.
+        self._speculative_data = data
+
     async def round_start(self):
         self._is_started = True
         self._data_verifier = await self._data_factory.create_data_verifier()
@@ -69,13 +101,50 @@ class Election:
         await self._vote_if_available(data)
 
     async def receive_vote(self, vote: Vote):
-        if vote.is_real() and vote.voter_id == self._node_id:
-            self._is_voted = True
+        self._add_vote(vote)
+        await self._update_result()
 
-        self._messages.add_vote(vote)
+    async def receive_votes(self, votes: Sequence[Vote]):
+        for vote in votes:
+            self._add_vote(vote)
+        await self._update_result()
+
+    async def receive_quorum_certificate(self, quorum_certificate: QuorumCertificate):
+        self._messages.add_quorum_certificate(quorum_certificate)
         await self._update_result()
 
-    async def _raise_broadcast_data(self, data):
+    async def receive_data_verified(self, data_id: bytes, is_valid: bool):
+        if self._data_verifying_id != data_id:
+            return
+        self._data_verifying = None
+        self._data_verifying_id = None
+
+        if self._is_ended:
+            return
+        await self._broadcast_vote(data_id, is_valid)
+
+    async def receive_wal_synced(self, message: Union[Data, Vote]):
+        if isinstance(message, Vote):
+            await self._raise_broadcast_vote(message, is_logged=True)
+        else:
+            await self._raise_broadcast_data(message, is_logged=True)
+
+    def receive_wal_sync_failed(self, message: Union[Data, Vote], seq: int):
+        # The record is still pending in the log. It is not broadcast until it is on disk.
+        self._logger.warning(f"WAL sync failed, retrying: {message}")
+        self._sync_wal(message, seq)
+
+    def close(self):
+        # Cancel in-flight verification. Its result is useless after the round ends or is pruned.
+        if self._data_verifying:
+            self._data_verifying.cancel()
+        self._data_verifying = None
+        self._data_verifying_id = None
+
+    async def _raise_broadcast_data(self, data, is_logged=False):
+        if self._wal and not is_logged:
+            self._log_message(data)
+            return
         self._event_system.simulator.raise_event(
             BroadcastDataEvent(
                 data=data
@@ -87,7 +156,10 @@ class Election:
             )
         )
 
-    async def _raise_broadcast_vote(self, vote: Vote):
+    async def _raise_broadcast_vote(self, vote: Vote, is_logged=False):
+        if self._wal and not is_logged:
+            self._log_message(vote)
+            return
         self._event_system.simulator.raise_event(
             BroadcastVoteEvent(
                 vote=vote)
@@ -98,6 +170,22 @@ class Election:
             )
         )
 
+    def _log_message(self, message: Union[Data, Vote]):
+        self._sync_wal(message, self._wal.append(message))
+
+    def _sync_wal(self, message: Union[Data, Vote], seq: int):
+        def _to_event(result: Optional[Exception]):
+            event = WalSyncedEvent(epoch_num=self._epoch.num,
+                                   round_num=self._round_num,
+                                   message=message,
+                                   seq=seq,
+                                   is_success=not isinstance(result, Exception))
+            event.deterministic = False
+            return event
+
+        mediator = self._event_system.get_mediator(ExecutorEventMediator)
+        mediator.execute(None, sync_wal, (self._wal, seq), _to_event)
+
     async def _raise_round_end(self, result: Data):
         if result.is_real():
             new_candidate = result
@@ -139,21 +227,35 @@ class Election:
             return
 
         candidate_data = self._data_pool.get_data(self._candidate_id)
-        candidate_votes = self._vote_pool.get_votes(candidate_data.epoch_num, candidate_data.round_num)
-        candidate_votes = {vote.voter_id: vote for vote in candidate_votes if vote.data_id == self._candidate_id}
-        candidate_votes = tuple(candidate_votes[voter] if voter in candidate_votes else None
-                                for voter in self._epoch.voters)
-
-        new_data = await self._data_factory.create_data(
-            data_number=candidate_data.number + 1,
-            prev_id=self._candidate_id,
-            epoch_num=self._epoch.num,
-            round_num=self._round_num,
-            prev_votes=candidate_votes
-        )
+        new_data = self._pop_speculative_data(candidate_data)
+        if not new_data:
+            new_data = await self._data_factory.create_data(
+                data_number=candidate_data.number + 1,
+                prev_id=self._candidate_id,
+                epoch_num=self._epoch.num,
+                round_num=self._round_num,
+                prev_votes=new_prev_votes(self._vote_pool, self._vote_factory, self._epoch, candidate_data)
+            )
         await self._raise_broadcast_data(new_data)
         self._is_proposed = True
 
+    def _pop_speculative_data(self, candidate_data: Data) -> Optional[Data]:
+        data, self._speculative_data = self._speculative_data, None
+        if not data:
+            return None
+        if data.prev_id != candidate_data.id or data.number != candidate_data.number + 1:
+            # The candidate changed after the data was built.
+            return None
+        if data.epoch_num != self._epoch.num or data.round_num != self._round_num:
+            return None
+        return data
+
+    def _add_vote(self, vote: Vote):
+        # Own votes come back in batches as well, e.g. restored from a checkpoint
+        if vote.is_real() and vote.voter_id == self._node_id:
+            self._is_voted = True
+        self._messages.add_vote(vote)
+
     async def _update_result(self):
         if not self._messages.result or not self._messages.result.is_determinative():
             self._messages.update()
@@ -164,8 +266,13 @@ class Election:
             return
         await self._raise_round_end(self._messages.result)
         self._is_ended = self._messages.result and self._messages.result.is_determinative()
+        if self._is_ended:
+            self.close()
 
     async def _vote_if_real_data_exist(self):
+        if self._is_voted:
+            # Voted before the round started, e.g. restored from a checkpoint
+            return
         first_real_data = self._messages.first_real_data
         if first_real_data:
             await self._verify_and_broadcast_vote(first_real_data)
@@ -184,8 +291,16 @@ class Election:
         self._is_voted = True
 
     async def _verify_and_broadcast_vote(self, data):
-        if await self._verify_data(data):
-            vote = await self._vote_factory.create_vote(data_id=data.id,
+        if (self._data_verify_executor and
+                data.proposer_id != self._node_id and
+                self._verify_data_connected(data)):
+            self._verify_data_in_executor(data)
+        else:
+            await self._broadcast_vote(data.id, await self._verify_data(data))
+
+    async def _broadcast_vote(self, data_id: bytes, is_valid: bool):
+        if is_valid:
+            vote = await self._vote_factory.create_vote(data_id=data_id,
                                                         commit_id=self._candidate_id,
                                                         epoch_num=self._epoch.num,
                                                         round_num=self._round_num)
@@ -194,15 +309,24 @@ class Election:
                                                        round_num=self._round_num)
         await self._raise_broadcast_vote(vote)
 
+    def _verify_data_in_executor(self, data: Data):
+        def _to_event(result: Optional[Exception]):
+            event = DataVerifiedEvent(epoch_num=self._epoch.num,
+                                      round_num=self._round_num,
+                                      data_id=data.id,
+                                      is_valid=result is None)
+            event.deterministic = False
+            return event
+
+        mediator = self._event_system.get_mediator(ExecutorEventMediator)
+        self._data_verifying = mediator.execute(self._data_verify_executor,
+                                                verify_data, (self._data_verifier, data), _to_event)
+        self._data_verifying_id = data.id
+
     async def _verify_data(self, data):
         if data.proposer_id == self._node_id:
             return True
-        if self._candidate_id != data.prev_id:
-            return False
-        candidate_data = self._data_pool.get_data(self._candidate_id)
-        if candidate_data.number + 1 != data.number:
-            return False
-        if data.is_lazy():
+        if not self._verify_data_connected(data):
             return False
         try:
             await self._data_verifier.verify(data)
@@ -211,37 +335,92 @@ class Election:
         else:
             return True
 
+    def _verify_data_connected(self, data):
+        if self._candidate_id != data.prev_id:
+            return False
+        candidate_data = self._data_pool.get_data(self._candidate_id)
+        if candidate_data.number + 1 != data.number:
+            return False
+        if data.is_lazy():
+            return False
+        return True
+
+
+def new_prev_votes(vote_pool: VotePool, vote_factory: VoteFactory, epoch: Epoch, candidate_data: Data) -> PrevVotes:
+    quorum_certificate = vote_pool.get_quorum_certificate(candidate_data.id)
+    if quorum_certificate:
+        return quorum_certificate
+
+    candidate_votes = vote_pool.get_prev_votes(candidate_data, epoch.voters)
+    # Signers of QuorumCertificate are indexed by the voters of its epoch.
+    if candidate_data.epoch_num == epoch.num:
+        quorum_certificate = vote_factory.create_quorum_certificate(candidate_votes)
+        if quorum_certificate:
+            return quorum_certificate
+    return candidate_votes
+
 
 Datums = OrderedDict[bytes, Data]  # dict[data_id] = data
-Votes = DefaultDict[bytes, Dict[bytes, Vote]]  # dict[data_id][voter_id] = vote
 
 
 class ElectionMessages:
-    def __init__(self, epoch: Epoch, round_num: int, data_factory: DataFactory):
+    def __init__(self, epoch: Epoch, round_num: int, data_factory: DataFactory,
+                 round_messages: Optional[RoundMessages] = None):
         self._epoch = epoch
         self._round_num = round_num
         self._data_factory = data_factory
 
-        self._datums: Datums = OrderedDict()
-        self._votes: Votes = DefaultDict(dict)
+        # Datums and votes are stored in RoundMessages shared with Round. Only the tallies are kept here.
+        self._round_messages = round_messages or RoundMessages(epoch)
 
-        self._voters: Set[bytes] = set()
+        # Voters of the votes for the datums received. It differs from the voters of RoundMessages.
+        self._voters = VotersBitmap(epoch.voter_indices)
+        self._certified_ids: Set[bytes] = set()
         self._result: Optional[Data] = None
 
+        # Tallies are updated on every message. The result is recomputed only if they cross the thresholds.
+        self._quorum_datums: Datums = OrderedDict()
+        self._first_real_data: Optional[Data] = None
+        self._first_lazy_data: Optional[Data] = None
+        self._is_dirty = True
+
     @property
     def result(self):
         return self._result
 
+    @property
+    def voters(self) -> VotersBitmap:
+        return self._voters
+
     @property
     def first_real_data(self):
-        return next((data for data in self._datums.values() if data.is_real()), None)
+        return self._first_real_data
 
     def add_data(self, data: Data):
-        self._datums[data.id] = data
+        if data not in self._round_messages:
+            self._round_messages.add_data(data)
+
+        if not self._first_real_data and data.is_real():
+            self._first_real_data = data
+        if not self._first_lazy_data and data.is_lazy():
+            self._first_lazy_data = data
+            self._is_dirty = True
+        self._add_quorum_data_if_reached(data.id)
 
     def add_vote(self, vote: Vote):
-        self._voters.add(vote.voter_id)
-        self._votes[vote.data_id][vote.voter_id] = vote
+        if vote not in self._round_messages:
+            self._round_messages.add_vote(vote)
+        self._add_quorum_data_if_reached(vote.data_id)
+
+        if vote.voter_id not in self._voters:
+            self._voters.add(vote.voter_id)
+            if len(self._voters) == self._epoch.voters_num:
+                self._is_dirty = True
+
+    def add_quorum_certificate(self, quorum_certificate: QuorumCertificate):
+        # QuorumCertificate is already verified. It stands for the quorum of votes of its data.
+        self._certified_ids.add(quorum_certificate.data_id)
+        self._add_quorum_data_if_reached(quorum_certificate.data_id)
 
     def update(self):
         # RealData : Determine round success and round end
@@ -249,6 +428,10 @@ class ElectionMessages:
         # LazyData : Cannot determine but round end
         # None : Nothing changes
 
+        if not self._is_dirty:
+            return
+        self._is_dirty = False
+
         if self._update_quorum_data():
             return
 
@@ -257,10 +440,19 @@ class ElectionMessages:
 
         self._result = None
 
+    def _add_quorum_data_if_reached(self, data_id: bytes):
+        if data_id in self._quorum_datums:
+            return
+        data = self._round_messages.get_data(data_id)
+        if not data:
+            return
+        if (data_id in self._certified_ids or
+                self._round_messages.get_voters_num(data_id) >= self._epoch.quorum_num):
+            self._quorum_datums[data_id] = data
+            self._is_dirty = True
+
     def _update_quorum_data(self):
-        quorum_datums = [data for data in self._datums.values()
-                         if len(self._votes[data.id]) >= self._epoch.quorum_num]
-        quorum_datums.sort(key=lambda data: not data.is_determinative())
+        quorum_datums = sorted(self._quorum_datums.values(), key=lambda data: not data.is_determinative())
         assert ((len(quorum_datums) <= 1) or
                 (len(quorum_datums) == 2 and quorum_datums[0].is_determinative() and quorum_datums[1].is_lazy()))
 
@@ -270,16 +462,14 @@ class ElectionMessages:
         return False
 
     def _update_lazy_data(self):
-        assert len(self._voters) <= len(self._epoch.voters)
-        if len(self._voters) == len(self._epoch.voters):
+        assert len(self._voters) <= self._epoch.voters_num
+        if len(self._voters) == self._epoch.voters_num:
             self._result = self._find_lazy_data()
             return True
         return False
 
     def _find_lazy_data(self):
-        try:
-            return next(data for data in self._datums.values() if data.is_lazy())
-        except StopIteration:
-            proposer_id = self._epoch.get_proposer_id(self._round_num)
-            return self._data_factory.create_lazy_data(self._epoch.num, self._round_num, proposer_id)
-
+        if self._first_lazy_data:
+            return self._first_lazy_data
+        proposer_id = self._epoch.get_proposer_id(self._round_num)
+        return self._data_factory.create_lazy_data(self._epoch.num, self._round_num, proposer_id)
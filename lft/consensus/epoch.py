@@ -12,12 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from abc import abstractmethod
-from typing import Sequence, Dict
+from typing import Sequence, Dict, Mapping, List
 
 from lft.consensus.messages.data import Data, Vote
+from lft.consensus.exceptions import InvalidVoter
 from lft.serialization import Serializable
 
-__all__ = ("Epoch", "EpochPool")
+__all__ = ("Epoch", "EpochPool", "VotersBitmap")
 
 
 class Epoch(Serializable):
@@ -41,6 +42,11 @@ class Epoch(Serializable):
     def voters(self) -> Sequence[bytes]:
         raise NotImplementedError
 
+    @property
+    def voter_indices(self) -> Mapping[bytes, int]:
+        # Override it to precompute the indices.
+        return {voter: index for index, voter in enumerate(self.voters)}
+
     @abstractmethod
     def verify_data(self, data: Data):
         raise NotImplementedError
@@ -74,10 +80,49 @@ class Epoch(Serializable):
         raise NotImplementedError
 
 
+class VotersBitmap:
+    # A set of voters as a bitmap keyed by the index of voters in an epoch.
+    __slots__ = ("_voter_indices", "_bitmap", "_count")
+
+    def __init__(self, voter_indices: Mapping[bytes, int]):
+        self._voter_indices = voter_indices
+        self._bitmap = 0
+        self._count = 0
+
+    @property
+    def bitmap(self) -> int:
+        return self._bitmap
+
+    def add(self, voter: bytes):
+        bit = 1 << self._get_index(voter)
+        if not self._bitmap & bit:
+            self._bitmap |= bit
+            self._count += 1
+
+    def _get_index(self, voter: bytes):
+        try:
+            return self._voter_indices[voter]
+        except KeyError:
+            raise InvalidVoter(voter, bytes(0))
+
+    def __contains__(self, voter: bytes):
+        index = self._voter_indices.get(voter)
+        if index is None:
+            return False
+        return bool(self._bitmap >> index & 1)
+
+    def __len__(self):
+        return self._count
+
+
 class EpochPool:
     def __init__(self):
         self._epochs: Dict[int, Epoch] = {}
 
+    @property
+    def epochs(self) -> List[Epoch]:
+        return sorted(self._epochs.values(), key=lambda epoch: epoch.num)
+
     def add_epoch(self, epoch: Epoch):
         self._epochs[epoch.num] = epoch
 
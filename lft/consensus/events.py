@@ -1,12 +1,17 @@
 from dataclasses import dataclass
-from typing import Sequence, Optional
+from typing import Sequence, Optional, Union
 
 from lft.consensus.epoch import Epoch
 from lft.event import Event
 from lft.consensus.messages.data import Data, Vote
+from lft.consensus.checkpoint import Checkpoint
 
-__all__ = ("InitializeEvent", "ReceiveDataEvent", "ReceiveVoteEvent",
-           "BroadcastDataEvent", "BroadcastVoteEvent", "RoundStartEvent", "RoundEndEvent")
+__all__ = ("InitializeEvent", "RestoreEvent", "ReceiveDataEvent", "ReceiveVoteEvent",
+           "ReceiveDatumsEvent", "ReceiveVotesEvent",
+           "VerifyVotesEvent", "DataVerifiedEvent", "WalSyncedEvent", "RoundTimeoutEvent",
+           "RoundMetricsEvent", "ReclaimMessagesEvent",
+           "SyncFetchedEvent", "SyncEndEvent", "BroadcastDataEvent", "BroadcastVoteEvent", "RoundStartEvent",
+           "RoundEndEvent")
 
 
 @dataclass
@@ -17,6 +22,11 @@ class InitializeEvent(Event):
     vote_pool: Sequence['Vote']
 
 
+@dataclass
+class RestoreEvent(Event):
+    checkpoint: 'Checkpoint'
+
+
 @dataclass
 class ReceiveDataEvent(Event):
     data: 'Data'
@@ -27,6 +37,71 @@ class ReceiveVoteEvent(Event):
     vote: 'Vote'
 
 
+@dataclass
+class ReceiveDatumsEvent(Event):
+    datums: Sequence['Data']
+
+
+@dataclass
+class ReceiveVotesEvent(Event):
+    votes: Sequence['Vote']
+
+
+@dataclass
+class VerifyVotesEvent(Event):
+    epoch_num: int
+    round_num: int
+
+
+@dataclass
+class DataVerifiedEvent(Event):
+    epoch_num: int
+    round_num: int
+    data_id: bytes
+    is_valid: bool
+
+
+@dataclass
+class WalSyncedEvent(Event):
+    # Own data or vote is on disk. It can be broadcast. If the sync failed, it is retried with seq.
+    epoch_num: int
+    round_num: int
+    message: Union['Data', 'Vote']
+    seq: int
+    is_success: bool
+
+
+@dataclass
+class RoundTimeoutEvent(Event):
+    epoch_num: int
+    round_num: int
+
+
+@dataclass
+class RoundMetricsEvent(Event):
+    epoch_num: int
+    round_num: int
+    is_success: bool
+    elapsed: float
+
+
+@dataclass
+class ReclaimMessagesEvent(Event):
+    pass
+
+
+@dataclass
+class SyncFetchedEvent(Event):
+    end_id: bytes
+    datums: Sequence['Data']
+
+
+@dataclass
+class SyncEndEvent(Event):
+    is_success: bool
+    commit_datums: Sequence['Data']
+
+
 @dataclass
 class BroadcastDataEvent(Event):
     data: 'Data'
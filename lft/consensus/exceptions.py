@@ -19,6 +19,11 @@ class AlreadySync(Exception):
         self.data_id = data_id
 
 
+class CommitStreamOverflow(Exception):
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+
+
 class InvalidEpoch(Exception):
     def __init__(self, epoch: int, expected: int):
         self.epoch = epoch
@@ -39,6 +44,11 @@ class InvalidProposer(Exception):
         self.expected = expected
 
 
+class InvalidQuorumCertificate(Exception):
+    def __init__(self, data_id: bytes):
+        self.data_id = data_id
+
+
 class InvalidVoter(Exception):
     def __init__(self, voter: bytes, expected: bytes):
         self.voter = voter
@@ -1,13 +1,18 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Sequence, Iterable
+from typing import Sequence, Iterable, Optional, Union
 
 from lft.consensus.messages.message import Message, MessagePool
-from lft.consensus.messages.vote import Vote
+from lft.consensus.messages.vote import Vote, QuorumCertificate
 
-__all__ = ("Data", "DataFactory", "DataPool", "DataVerifier")
+__all__ = ("Data", "DataFactory", "DataPool", "DataVerifier", "PrevVotes", "verify_data")
+
+PrevVotes = Union[Sequence[Optional[Vote]], QuorumCertificate]
 
 
 class Data(Message):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def number(self) -> int:
@@ -25,7 +30,7 @@ class Data(Message):
 
     @property
     @abstractmethod
-    def prev_votes(self) -> Sequence['Vote']:
+    def prev_votes(self) -> PrevVotes:
         raise NotImplementedError
 
     @abstractmethod
@@ -46,6 +51,8 @@ class Data(Message):
         return self.epoch_num == 0 and self.round_num == 0
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return self.id == other.id \
                and self.number == other.number \
                and self.prev_id == other.prev_id \
@@ -64,6 +71,19 @@ class DataVerifier(ABC):
         raise NotImplementedError
 
 
+def verify_data(data_verifier: DataVerifier, data: 'Data') -> Optional[Exception]:
+    # Entry point of executors. It runs on a worker thread or process which has no running event loop.
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(data_verifier.verify(data))
+    except Exception as e:
+        return e
+    else:
+        return None
+    finally:
+        loop.close()
+
+
 class DataFactory(ABC):
     @abstractmethod
     async def create_data(self,
@@ -71,7 +91,7 @@ class DataFactory(ABC):
                           prev_id: bytes,
                           epoch_num: int,
                           round_num: int,
-                          prev_votes: Sequence['Vote']) -> 'Data':
+                          prev_votes: PrevVotes) -> 'Data':
         raise NotImplementedError
 
     @abstractmethod
@@ -101,7 +121,7 @@ class DataPool(MessagePool):
             # To avoid id collision dummy_id is generated.
             # Unreal data must be added for node recovery and removed by only pruning
             dummy_id = self._int_to_bytes(data.epoch_num) + data.id + self._int_to_bytes(data.round_num)
-            self._messages[dummy_id] = data
+            self._put_message(dummy_id, data)
 
     def get_data(self, data_id: bytes) -> Data:
         # Only real data can be gotten.
@@ -112,7 +132,7 @@ class DataPool(MessagePool):
 
     def get_datums_connected(self, prev_id: bytes) -> Iterable[Data]:
         for data in self._messages.values():
-            if data.prev_id == prev_id:
+            if data.prev_id == prev_id and self._is_visible(data):
                 yield data
 
     def prune_data(self, latest_epoch_num: int, latest_round_num: int):
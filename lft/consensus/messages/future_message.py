@@ -0,0 +1,126 @@
+from collections import defaultdict, Counter
+from dataclasses import dataclass
+from typing import DefaultDict, Dict, Iterable, List, Tuple
+
+from lft.consensus.messages.message import Message
+from lft.consensus.messages.vote import Vote
+
+__all__ = ("FutureMessageBuffer", "FutureMessageCounters")
+
+RoundID = Tuple[int, int]  # (epoch_num, round_num)
+
+
+@dataclass
+class FutureMessageCounters:
+    buffered: int = 0
+    released: int = 0
+    evicted: int = 0
+    dropped: int = 0
+
+
+class FutureMessageBuffer:
+    # Messages of rounds beyond the next round are buffered here instead of creating their rounds.
+    # If a cap is reached, the message of the farthest round is evicted first. Nearer rounds are needed sooner.
+    def __init__(self, max_messages: int, max_messages_per_peer: int):
+        if max_messages < 0 or max_messages_per_peer < 0:
+            raise ValueError(f"Negative cap: {max_messages}, {max_messages_per_peer}")
+        self._max_messages = max_messages
+        self._max_messages_per_peer = max_messages_per_peer
+
+        self._messages: DefaultDict[RoundID, Dict[bytes, Message]] = defaultdict(dict)
+        self._messages_by_peer: DefaultDict[bytes, Dict[bytes, Message]] = defaultdict(dict)
+        self._peers: Dict[bytes, bytes] = {}  # dict[message_id] = peer_id
+        self._voters: DefaultDict[RoundID, Counter] = defaultdict(Counter)
+
+        self.counters = FutureMessageCounters()
+
+    def add_message(self, message: Message, peer_id: bytes) -> bool:
+        if message.id in self._peers:
+            return True
+
+        round_id = _round_id(message)
+        peer_messages = self._messages_by_peer[peer_id]
+        if len(peer_messages) >= self._max_messages_per_peer:
+            if not self._evict_farther_than(round_id, peer_messages.values()):
+                self._drop_message(peer_id)
+                return False
+        if len(self._peers) >= self._max_messages:
+            farthest_messages = self._messages[max(self._messages)].values() if self._messages else ()
+            if not self._evict_farther_than(round_id, farthest_messages):
+                self._drop_message(peer_id)
+                return False
+
+        self._messages[round_id][message.id] = message
+        self._messages_by_peer[peer_id][message.id] = message
+        self._peers[message.id] = peer_id
+        if isinstance(message, Vote):
+            self._voters[round_id][peer_id] += 1
+        self.counters.buffered += 1
+        return True
+
+    def reach_quorum(self, epoch_num: int, round_num: int, quorum_num: int) -> bool:
+        return len(self._voters.get((epoch_num, round_num), ())) >= quorum_num
+
+    def pop_messages(self, epoch_num: int, round_num: int) -> List[Message]:
+        messages = list(self._messages.get((epoch_num, round_num), {}).values())
+        for message in messages:
+            self._remove_message(message)
+        self.counters.released += len(messages)
+        return messages
+
+    def pop_messages_until(self, epoch_num: int, round_num: int) -> List[Message]:
+        round_ids = sorted(round_id for round_id in self._messages if round_id <= (epoch_num, round_num))
+        return [message for round_id in round_ids for message in self.pop_messages(*round_id)]
+
+    def prune_message(self, latest_epoch_num: int, latest_round_num: int):
+        round_ids = [round_id for round_id in self._messages if round_id < (latest_epoch_num, latest_round_num)]
+        for round_id in round_ids:
+            for message in list(self._messages[round_id].values()):
+                self._remove_message(message)
+
+    def __contains__(self, message_id: bytes):
+        return message_id in self._peers
+
+    def __len__(self):
+        return len(self._peers)
+
+    def _evict_farther_than(self, round_id: RoundID, messages: Iterable[Message]) -> bool:
+        # Nothing to evict if the cap is zero. The incoming message is dropped.
+        farthest = max(messages, key=_round_id, default=None)
+        if farthest is None or _round_id(farthest) <= round_id:
+            return False
+
+        self._remove_message(farthest)
+        self.counters.evicted += 1
+        return True
+
+    def _drop_message(self, peer_id: bytes):
+        if not self._messages_by_peer[peer_id]:
+            del self._messages_by_peer[peer_id]
+        self.counters.dropped += 1
+
+    def _remove_message(self, message: Message):
+        round_id = _round_id(message)
+        peer_id = self._peers.pop(message.id)
+
+        round_messages = self._messages[round_id]
+        del round_messages[message.id]
+        if not round_messages:
+            del self._messages[round_id]
+
+        peer_messages = self._messages_by_peer[peer_id]
+        del peer_messages[message.id]
+        if not peer_messages:
+            del self._messages_by_peer[peer_id]
+
+        if isinstance(message, Vote):
+            voters = self._voters[round_id]
+            voters[peer_id] -= 1
+            if voters[peer_id] <= 0:
+                del voters[peer_id]
+            if not voters:
+                del self._voters[round_id]
+
+
+def _round_id(message: Message) -> RoundID:
+    return message.epoch_num, message.round_num
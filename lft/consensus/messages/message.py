@@ -14,14 +14,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from abc import abstractmethod
-from typing import Dict, Iterable
+from collections import defaultdict
+from dataclasses import dataclass
+from heapq import heappush, heappop
+from typing import DefaultDict, Dict, Iterable, List, Tuple
 
 from lft.serialization import Serializable
 
-__all__ = ("Message", "MessagePool")
+__all__ = ("Message", "MessagePool", "ReclaimCounters")
+
+RoundID = Tuple[int, int]  # (epoch_num, round_num)
 
 
 class Message(Serializable):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def id(self) -> bytes:
@@ -38,28 +45,73 @@ class Message(Serializable):
         raise NotImplementedError
 
 
+@dataclass
+class ReclaimCounters:
+    reclaimed: int = 0
+    slices: int = 0
+    elapsed: float = 0.0
+
+
 class MessagePool:
     def __init__(self):
         self._messages: Dict[bytes, Message] = {}
 
+        # Pruning only raises the watermark. Messages under it are hidden at once and reclaimed later in slices.
+        self._watermark: RoundID = (0, 0)
+        self._message_ids: DefaultDict[RoundID, List[bytes]] = defaultdict(list)
+        self._round_ids: List[RoundID] = []  # heap of the keys of _message_ids
+
+    @property
+    def reclaimable(self) -> bool:
+        return bool(self._round_ids) and self._round_ids[0] < self._watermark
+
     def __contains__(self, id_: bytes):
         assert isinstance(id_, bytes)
-        return id_ in self._messages
+        message = self._messages.get(id_)
+        return message is not None and self._is_visible(message)
 
     def add_message(self, message: Message):
-        self._messages[message.id] = message
+        self._put_message(message.id, message)
 
     def get_message(self, message_id: bytes) -> Message:
-        return self._messages[message_id]
+        message = self._messages[message_id]
+        if not self._is_visible(message):
+            raise KeyError(message_id)
+        return message
 
     def get_messages(self, epoch_num: int, round_num: int) -> Iterable[Message]:
-        for message in self._messages.values():
-            if message.epoch_num == epoch_num and message.round_num == round_num:
-                yield message
+        if (epoch_num, round_num) < self._watermark:
+            return
+        for message_id in self._message_ids.get((epoch_num, round_num), ()):
+            yield self._messages[message_id]
 
     def prune_message(self, latest_epoch_num: int, latest_round_num: int):
-        self._messages = {
-            mid: message for mid, message in self._messages.items()
-            if ((message.epoch_num > latest_epoch_num) or
-                (message.epoch_num == latest_epoch_num and message.round_num >= latest_round_num))
-        }
+        self._watermark = max(self._watermark, (latest_epoch_num, latest_round_num))
+
+    def reclaim(self, max_count: int) -> int:
+        # Removes up to max_count messages under the watermark, oldest round first.
+        reclaimed = 0
+        while reclaimed < max_count and self.reclaimable:
+            round_id = self._round_ids[0]
+            message_ids = self._message_ids[round_id]
+            while reclaimed < max_count and message_ids:
+                self._reclaim_message(self._messages.pop(message_ids.pop()))
+                reclaimed += 1
+            if not message_ids:
+                heappop(self._round_ids)
+                del self._message_ids[round_id]
+        return reclaimed
+
+    def _put_message(self, message_id: bytes, message: Message):
+        if message_id not in self._messages:
+            round_id = (message.epoch_num, message.round_num)
+            if round_id not in self._message_ids:
+                heappush(self._round_ids, round_id)
+            self._message_ids[round_id].append(message_id)
+        self._messages[message_id] = message
+
+    def _reclaim_message(self, message: Message):
+        pass
+
+    def _is_visible(self, message: Message):
+        return (message.epoch_num, message.round_num) >= self._watermark
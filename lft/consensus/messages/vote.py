@@ -1,12 +1,20 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Iterable
+from collections import defaultdict
+from typing import TYPE_CHECKING, Iterable, Sequence, Optional, DefaultDict, Dict, Tuple, List
 
 from lft.consensus.messages.message import Message, MessagePool
 
-__all__ = ("Vote", "VoteFactory", "VotePool", "VoteVerifier")
+if TYPE_CHECKING:
+    from lft.consensus.messages.data import Data
+
+__all__ = ("Vote", "VoteFactory", "VotePool", "VoteVerifier", "PendingVotePool", "QuorumCertificate",
+           "verify_vote_batch")
 
 
 class Vote(Message):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def data_id(self) -> bytes:
@@ -34,6 +42,8 @@ class Vote(Message):
         return not self.is_lazy()
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return self.id == other.id \
                and self.data_id == other.data_id \
                and self.commit_id == other.commit_id \
@@ -45,11 +55,78 @@ class Vote(Message):
         return int.from_bytes(self.id, "big")
 
 
+class QuorumCertificate(Message):
+    # Aggregated votes for a data. It replaces the votes in Data.prev_votes.
+    # Signers are a bitmap keyed by the index of voters in the epoch of the votes.
+    __slots__ = ()
+
+    @property
+    @abstractmethod
+    def data_id(self) -> bytes:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def commit_id(self) -> bytes:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def signers(self) -> int:
+        raise NotImplementedError
+
+    @property
+    def signers_num(self) -> int:
+        return bin(self.signers).count("1")
+
+    def is_signed_by(self, voter_index: int) -> bool:
+        return bool(self.signers >> voter_index & 1)
+
+    def __eq__(self, other):
+        return isinstance(other, QuorumCertificate) \
+               and self.id == other.id \
+               and self.data_id == other.data_id \
+               and self.commit_id == other.commit_id \
+               and self.signers == other.signers \
+               and self.epoch_num == other.epoch_num \
+               and self.round_num == other.round_num
+
+    def __hash__(self):
+        return int.from_bytes(self.id, "big")
+
+
 class VoteVerifier(ABC):
     @abstractmethod
     async def verify(self, vote: 'Vote'):
         raise NotImplementedError
 
+    async def verify_batch(self, votes: Sequence['Vote']) -> Sequence[Optional[Exception]]:
+        # Override it if the signature scheme supports batch verification.
+        # Each result is None if the vote is valid, otherwise the exception raised by verification.
+        results = []
+        for vote in votes:
+            try:
+                await self.verify(vote)
+            except Exception as e:
+                results.append(e)
+            else:
+                results.append(None)
+        return results
+
+    async def verify_quorum_certificate(self, quorum_certificate: 'QuorumCertificate', voters: Sequence[bytes]):
+        # Override it if VoteFactory creates QuorumCertificate.
+        # voters are of the epoch of the certificate.
+        raise NotImplementedError
+
+
+def verify_vote_batch(vote_verifier: VoteVerifier, votes: Sequence['Vote']) -> Sequence[Optional[Exception]]:
+    # Entry point of executors. It runs on a worker thread or process which has no running event loop.
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(vote_verifier.verify_batch(votes))
+    finally:
+        loop.close()
+
 
 class VoteFactory(ABC):
     async def create_vote(self, data_id: bytes, commit_id: bytes, epoch_num: int, round_num: int) -> 'Vote':
@@ -64,10 +141,35 @@ class VoteFactory(ABC):
     async def create_vote_verifier(self) -> 'VoteVerifier':
         raise NotImplementedError
 
+    def create_quorum_certificate(self, votes: Sequence[Optional['Vote']]) -> Optional['QuorumCertificate']:
+        # Aggregation hook. votes are in order of epoch voters, None if the voter did not vote.
+        # Returns None if aggregation is not supported, then the votes are used as they are.
+        return None
+
 
 class VotePool(MessagePool):
+    def __init__(self):
+        super().__init__()
+        # Only real votes are indexed. None and lazy votes share data ids across rounds.
+        self._votes_by_data_id: DefaultDict[bytes, Dict[bytes, Vote]] = defaultdict(dict)
+        self._prev_votes: Dict[bytes, Tuple[Sequence[bytes], Tuple[Optional[Vote], ...]]] = {}
+        self._quorum_certificates: Dict[bytes, QuorumCertificate] = {}
+
     def add_vote(self, vote: Vote):
         self.add_message(vote)
+        if not vote.is_none() and not vote.is_lazy():
+            self._votes_by_data_id[vote.data_id][vote.voter_id] = vote
+            self._prev_votes.pop(vote.data_id, None)
+
+    def add_votes(self, votes: Iterable[Vote]):
+        data_ids = set()
+        for vote in votes:
+            self.add_message(vote)
+            if not vote.is_none() and not vote.is_lazy():
+                self._votes_by_data_id[vote.data_id][vote.voter_id] = vote
+                data_ids.add(vote.data_id)
+        for data_id in data_ids:
+            self._prev_votes.pop(data_id, None)
 
     def get_vote(self, vote_id) -> Vote:
         return self.get_message(vote_id)
@@ -75,5 +177,80 @@ class VotePool(MessagePool):
     def get_votes(self, epoch_num: int, round_num: int) -> Iterable[Vote]:
         return self.get_messages(epoch_num, round_num)
 
+    def add_quorum_certificate(self, quorum_certificate: QuorumCertificate):
+        self._quorum_certificates[quorum_certificate.data_id] = quorum_certificate
+
+    def get_quorum_certificate(self, data_id: bytes) -> Optional[QuorumCertificate]:
+        quorum_certificate = self._quorum_certificates.get(data_id)
+        if quorum_certificate and self._is_visible(quorum_certificate):
+            return quorum_certificate
+        return None
+
+    def get_votes_by_data_id(self, data_id: bytes) -> Dict[bytes, Vote]:
+        votes = self._votes_by_data_id.get(data_id)
+        # Votes for a data are of the same round. Checking one of them is enough.
+        if not votes or not self._is_visible(next(iter(votes.values()))):
+            return {}
+        return votes
+
+    def get_prev_votes(self, data: 'Data', voters: Sequence[bytes]) -> Tuple[Optional[Vote], ...]:
+        # Votes for the data in order of the voters. It is cached until a new vote for the data is added.
+        try:
+            cached_voters, prev_votes = self._prev_votes[data.id]
+        except KeyError:
+            pass
+        else:
+            if cached_voters == voters:
+                return prev_votes
+
+        votes = self.get_votes_by_data_id(data.id)
+        prev_votes = tuple(self._get_vote_of_data(votes.get(voter), data) for voter in voters)
+        self._prev_votes[data.id] = (voters, prev_votes)
+        return prev_votes
+
+    def _get_vote_of_data(self, vote: Optional[Vote], data: 'Data'):
+        if vote and vote.epoch_num == data.epoch_num and vote.round_num == data.round_num:
+            return vote
+        return None
+
     def prune_vote(self, latest_epoch_num: int, latest_round_num: int):
         super().prune_message(latest_epoch_num, latest_round_num)
+        self._prev_votes = {}
+
+    def reclaim(self, max_count: int) -> int:
+        reclaimed = super().reclaim(max_count)
+        if reclaimed < max_count and not self.reclaimable:
+            # QuorumCertificates are one per round at most, they are reclaimed after the votes.
+            quorum_certificates = {
+                data_id: quorum_certificate for data_id, quorum_certificate in self._quorum_certificates.items()
+                if self._is_visible(quorum_certificate)
+            }
+            reclaimed += len(self._quorum_certificates) - len(quorum_certificates)
+            self._quorum_certificates = quorum_certificates
+        return reclaimed
+
+    def _reclaim_message(self, vote: Vote):
+        votes = self._votes_by_data_id.get(vote.data_id)
+        if votes and votes.get(vote.voter_id) is vote:
+            del votes[vote.voter_id]
+            if not votes:
+                del self._votes_by_data_id[vote.data_id]
+        self._prev_votes.pop(vote.data_id, None)
+
+
+class PendingVotePool:
+    def __init__(self):
+        self._votes: DefaultDict[Tuple[int, int], Dict[bytes, Vote]] = defaultdict(dict)
+
+    def __len__(self):
+        return sum(len(votes) for votes in self._votes.values())
+
+    def add_vote(self, vote: Vote) -> bool:
+        # Returns True if the vote opens a new batch of the round.
+        votes = self._votes[vote.epoch_num, vote.round_num]
+        votes[vote.id] = vote
+        return len(votes) == 1
+
+    def pop_votes(self, epoch_num: int, round_num: int) -> List[Vote]:
+        votes = self._votes.pop((epoch_num, round_num), {})
+        return list(votes.values())
@@ -1,20 +1,19 @@
 import logging
 from bisect import insort
-from typing import List, OrderedDict, DefaultDict, Set, Union, Sequence
+from typing import List, Dict, Union, Sequence, Optional, Tuple
 from lft.consensus.messages.data import Data, DataFactory
-from lft.consensus.messages.vote import Vote, VoteFactory
-from lft.consensus.events import ReceiveDataEvent, ReceiveVoteEvent
-from lft.consensus.epoch import Epoch
+from lft.consensus.messages.vote import Vote, VoteFactory, QuorumCertificate
+from lft.consensus.events import ReceiveDataEvent, RoundTimeoutEvent
+from lft.consensus.epoch import Epoch, VotersBitmap
 from lft.consensus.election import Election
+from lft.consensus.round_messages import RoundMessages
+from lft.consensus.timeout_policy import TimeoutPolicy, FixedTimeoutPolicy, TIMEOUT_PROPOSE, TIMEOUT_VOTE
 from lft.consensus.exceptions import InvalidRound, InvalidEpoch, AlreadyProposed, AlreadyVoted
 from lft.event import EventSystem
 from lft.event.mediators import DelayedEventMediator
 
 
-__all__ = ("Round", "RoundMessages", "RoundPool", "TIMEOUT_PROPOSE", "TIMEOUT_VOTE")
-
-TIMEOUT_PROPOSE = 2.0
-TIMEOUT_VOTE = 2.0
+__all__ = ("Round", "RoundMessages", "RoundPool", "PendingRound", "TIMEOUT_PROPOSE", "TIMEOUT_VOTE")
 
 
 class Round:
@@ -25,7 +24,9 @@ class Round:
                  round_num: int,
                  event_system: EventSystem,
                  data_factory: DataFactory,
-                 vote_factory: VoteFactory):
+                 vote_factory: VoteFactory,
+                 messages: Optional[RoundMessages] = None,
+                 timeout_policy: Optional[TimeoutPolicy] = None):
         self._election = election
         self._node_id = node_id
 
@@ -37,7 +38,8 @@ class Round:
         self._vote_factory = vote_factory
 
         self._logger = logging.getLogger(node_id.hex())
-        self._messages = RoundMessages()
+        self._messages = messages or RoundMessages(epoch)
+        self._timeout_policy = timeout_policy or FixedTimeoutPolicy()
 
         self._vote_timeout_started = False
 
@@ -53,6 +55,18 @@ class Round:
     def result_id(self):
         return self._election.result_id
 
+    @property
+    def messages(self) -> RoundMessages:
+        return self._messages
+
+    @property
+    def is_decided(self):
+        return self._election.is_ended
+
+    @property
+    def missing_voters(self) -> List[bytes]:
+        return self._election.missing_voters
+
     @property
     def candidate_id(self):
         return self._election._candidate_id
@@ -68,7 +82,11 @@ class Round:
     async def receive_data(self, data: Data):
         try:
             await self._receive_data(data)
-        except (InvalidEpoch, InvalidRound, AlreadyProposed):
+        except AlreadyProposed:
+            if data.is_lazy():
+                # Election stores its LazyData at round start. The propose timeout still lets it vote.
+                await self._election.receive_data(data)
+        except (InvalidEpoch, InvalidRound):
             pass
 
     async def receive_vote(self, vote: Vote):
@@ -77,6 +95,44 @@ class Round:
         except (InvalidEpoch, InvalidRound, AlreadyVoted):
             pass
 
+    async def receive_votes(self, votes: Sequence[Vote]):
+        # Votes of a frame are tallied at once, the result is updated once.
+        votes_with_data = []
+        for vote in votes:
+            try:
+                self._verify_acceptable_vote(vote)
+            except (InvalidEpoch, InvalidRound, AlreadyVoted):
+                continue
+            self._messages.add_vote(vote)
+            if self._messages.get_data(vote.data_id):
+                votes_with_data.append(vote)
+
+        if votes_with_data:
+            await self._election.receive_votes(votes_with_data)
+        await self._raise_lazy_votes_if_available()
+
+    async def receive_quorum_certificate(self, quorum_certificate: QuorumCertificate):
+        if self._epoch.num != quorum_certificate.epoch_num:
+            return
+        if self._num != quorum_certificate.round_num:
+            return
+        await self._election.receive_quorum_certificate(quorum_certificate)
+
+    def receive_speculative_data(self, data: Data):
+        self._election.receive_speculative_data(data)
+
+    async def receive_data_verified(self, data_id: bytes, is_valid: bool):
+        await self._election.receive_data_verified(data_id, is_valid)
+
+    async def receive_wal_synced(self, message: Union[Data, Vote]):
+        await self._election.receive_wal_synced(message)
+
+    def receive_wal_sync_failed(self, message: Union[Data, Vote], seq: int):
+        self._election.receive_wal_sync_failed(message, seq)
+
+    def close(self):
+        self._election.close()
+
     async def _receive_data(self, data: Data):
         self._verify_acceptable_data(data)
 
@@ -98,8 +154,8 @@ class Round:
         mediator = self._event_system.get_mediator(DelayedEventMediator)
         mediator.execute(delay, event)
 
-    async def _raise_receive_vote(self, delay: float, vote: Vote):
-        event = ReceiveVoteEvent(vote)
+    async def _raise_round_timeout(self, delay: float):
+        event = RoundTimeoutEvent(self._epoch.num, self._num)
         event.deterministic = False
 
         mediator = self._event_system.get_mediator(DelayedEventMediator)
@@ -114,9 +170,7 @@ class Round:
             return
 
         self._vote_timeout_started = True
-        for voter in self._epoch.get_voters_id():
-            vote = self._vote_factory.create_lazy_vote(voter, self._epoch.num, self._num)
-            await self._raise_receive_vote(delay=TIMEOUT_VOTE, vote=vote)
+        await self._raise_round_timeout(delay=self._timeout_policy.vote_timeout(self._epoch.num, self._num))
 
     async def _new_unreal_datums(self):
         none_data = self._data_factory.create_none_data(epoch_num=self._epoch.num,
@@ -129,7 +183,8 @@ class Round:
         lazy_data = self._data_factory.create_lazy_data(self._epoch.num,
                                                         self._num,
                                                         expected_proposer)
-        await self._raise_receive_data(delay=TIMEOUT_PROPOSE, data=lazy_data)
+        await self._raise_receive_data(delay=self._timeout_policy.propose_timeout(self._epoch.num, self._num),
+                                       data=lazy_data)
 
     async def _receive_votes_if_exist(self, data: Data):
         votes_by_data_id = self._messages.get_votes(data_id=data.id)
@@ -176,66 +231,10 @@ class Round:
         return self.is_older_than(other.epoch_num, other.num)
 
 
-Datums = OrderedDict[bytes, Data]
-
-Votes = OrderedDict[bytes, Vote]
-VotesByDataID = DefaultDict[bytes, OrderedDict[bytes, Vote]]
-
-Voters = Set[bytes]
-VotersByDataID = DefaultDict[bytes, Set[bytes]]
-
-
-class RoundMessages:
-    def __init__(self):
-        self._datums: Datums = Datums()
-
-        self._votes: Votes = Votes()
-        self._votes_by_data_id: VotesByDataID = DefaultDict(OrderedDict)
-
-        self._voters = set()
-        self._voters_by_data_id = DefaultDict(set)
-
-    @property
-    def datums(self):
-        return self._datums.items()
-
-    @property
-    def votes(self):
-        return self._votes.items()
-
-    def add_data(self, data: Data):
-        self._datums[data.id] = data
-
-    def get_data(self, data_id: bytes, default=None):
-        return self._datums.get(data_id, default)
-
-    def add_vote(self, vote: Vote):
-        self._votes[vote.id] = vote
-        self._votes_by_data_id[vote.data_id][vote.id] = vote
-
-        self._voters.add(vote.voter_id)
-        self._voters_by_data_id[vote.data_id].add(vote.voter_id)
-
-    def get_votes(self, data_id: bytes):
-        return self._votes_by_data_id[data_id]
-
-    def reach_quorum(self, quorum: int):
-        return len(self._voters) >= quorum
-
-    def reach_quorum_consensus(self, quorum: int):
-        return any(len(voters) >= quorum for voters in self._voters_by_data_id.values())
-
-    def __contains__(self, item: Union[Data, Vote]):
-        if isinstance(item, Data):
-            return item.id in self._datums
-        if isinstance(item, Vote):
-            return item.id in self._votes
-        return False
-
-
 class RoundPool:
     def __init__(self):
         self._rounds: List[Round] = []
+        self._rounds_by_id: Dict[Tuple[int, int], Round] = {}
 
     @property
     def rounds(self) -> Sequence[Round]:
@@ -246,21 +245,66 @@ class RoundPool:
 
     def add_round(self, round_: Round):
         insort(self._rounds, round_)
+        self._rounds_by_id[(round_.epoch_num, round_.num)] = round_
 
     def get_round(self, epoch_num: int, round_num: int):
         try:
-            return next(round_ for round_ in self._rounds
-                        if round_.epoch_num == epoch_num and round_.num == round_num)
-        except StopIteration:
+            return self._rounds_by_id[(epoch_num, round_num)]
+        except KeyError:
             raise KeyError(epoch_num, round_num)
 
+    def find_round(self, epoch_num: int, round_num: int) -> Optional[Round]:
+        return self._rounds_by_id.get((epoch_num, round_num))
+
     def prune_round(self, latest_epoch_num: int, latest_round_num: int):
-        self._rounds = [round_ for round_ in self._rounds
-                        if (round_.is_newer_than(latest_epoch_num, latest_round_num) or
-                            round_.is_equal_to(latest_epoch_num, latest_round_num))]
+        rounds = []
+        for round_ in self._rounds:
+            if (round_.is_newer_than(latest_epoch_num, latest_round_num) or
+                    round_.is_equal_to(latest_epoch_num, latest_round_num)):
+                rounds.append(round_)
+            else:
+                round_.close()
+        self._rounds = rounds
+        self._rounds_by_id = {(round_.epoch_num, round_.num): round_ for round_ in rounds}
 
     def change_candidate(self, commit_id: bytes):
         candidate_round = self.first_round()
         candidate_round.candidate_id = commit_id
         for round_ in self._rounds[1:]:
             round_.candidate_id = candidate_round.result_id
+
+
+class PendingRound:
+    # Messages of a round which has no Round yet. Round and Election are created only if they are needed,
+    # when the round starts or votes of a quorum of voters arrive. Until then it costs a dict and a bitmap.
+    __slots__ = ("_epoch", "_num", "_messages", "_voters")
+
+    def __init__(self, epoch: Epoch, round_num: int):
+        self._epoch = epoch
+        self._num = round_num
+        self._messages: Dict[bytes, Union[Data, Vote]] = {}
+        self._voters = VotersBitmap(epoch.voter_indices)
+
+    @property
+    def num(self):
+        return self._num
+
+    @property
+    def epoch_num(self):
+        return self._epoch.num
+
+    @property
+    def datums(self) -> Sequence[Data]:
+        return [message for message in self._messages.values() if isinstance(message, Data)]
+
+    @property
+    def votes(self) -> Sequence[Vote]:
+        return [message for message in self._messages.values() if isinstance(message, Vote)]
+
+    def add_message(self, message: Union[Data, Vote]):
+        self._messages[message.id] = message
+        if isinstance(message, Vote) and message.voter_id not in self._voters:
+            self._voters.add(message.voter_id)
+
+    def reach_quorum(self):
+        return len(self._voters) >= self._epoch.quorum_num
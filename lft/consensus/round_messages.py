@@ -0,0 +1,75 @@
+from collections import defaultdict
+from functools import partial
+from typing import DefaultDict, Dict, Set, Union, Optional, List, Tuple
+from lft.consensus.messages.data import Data
+from lft.consensus.messages.vote import Vote
+from lft.consensus.epoch import Epoch, VotersBitmap
+
+__all__ = ("RoundMessages", )
+
+# Plain dicts keep the insertion order as well. OrderedDict costs a linked node per entry.
+Datums = Dict[bytes, Data]
+
+VotesByDataID = DefaultDict[bytes, Dict[bytes, Vote]]
+
+Voters = Union[Set[bytes], VotersBitmap]
+VotersByDataID = DefaultDict[bytes, Voters]
+
+
+class RoundMessages:
+    # Messages of a round. Round and Election of the round share it, each message is stored once.
+    # Messages are the same objects in DataPool and VotePool.
+    def __init__(self, epoch: Optional[Epoch] = None):
+        self._datums: Datums = {}
+        self._votes_by_data_id: VotesByDataID = defaultdict(dict)
+
+        # Voters are tracked as bitmaps if the epoch is known.
+        if epoch:
+            new_voters = partial(VotersBitmap, epoch.voter_indices)
+        else:
+            new_voters = set
+        self._voters: Voters = new_voters()
+        self._voters_by_data_id: VotersByDataID = defaultdict(new_voters)
+
+    @property
+    def datums(self):
+        return self._datums.items()
+
+    @property
+    def votes(self) -> List[Tuple[bytes, Vote]]:
+        return [item for votes in self._votes_by_data_id.values() for item in votes.items()]
+
+    @property
+    def voters(self) -> Voters:
+        return self._voters
+
+    def add_data(self, data: Data):
+        self._datums[data.id] = data
+
+    def get_data(self, data_id: bytes, default=None):
+        return self._datums.get(data_id, default)
+
+    def add_vote(self, vote: Vote):
+        self._votes_by_data_id[vote.data_id][vote.id] = vote
+
+        self._voters.add(vote.voter_id)
+        self._voters_by_data_id[vote.data_id].add(vote.voter_id)
+
+    def get_votes(self, data_id: bytes) -> Dict[bytes, Vote]:
+        return self._votes_by_data_id.get(data_id, {})
+
+    def get_voters_num(self, data_id: bytes) -> int:
+        return len(self._voters_by_data_id.get(data_id, ()))
+
+    def reach_quorum(self, quorum: int):
+        return len(self._voters) >= quorum
+
+    def reach_quorum_consensus(self, quorum: int):
+        return any(len(voters) >= quorum for voters in self._voters_by_data_id.values())
+
+    def __contains__(self, item: Union[Data, Vote]):
+        if isinstance(item, Data):
+            return item.id in self._datums
+        if isinstance(item, Vote):
+            return item.id in self._votes_by_data_id.get(item.data_id, ())
+        return False
@@ -0,0 +1,27 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Sequence, Union
+from lft.consensus.messages.data import Data
+
+__all__ = ("SyncFetcher", "fetch_datums")
+
+
+class SyncFetcher(ABC):
+    # Fetches committed data of peers for a lagging node.
+    @abstractmethod
+    async def fetch(self, start_number: int, end_id: bytes, max_count: int) -> Sequence[Data]:
+        # Returns up to max_count datums from start_number in number order, of the chain ending at end_id.
+        # Votes for each data are PrevVotes of the next one. Votes for end_id are PrevVotes of the data synced for.
+        raise NotImplementedError
+
+
+def fetch_datums(fetcher: SyncFetcher, start_number: int, end_id: bytes,
+                 max_count: int) -> Union[Sequence[Data], Exception]:
+    # Entry point of executors. It runs on a worker thread which has no running event loop.
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(fetcher.fetch(start_number, end_id, max_count))
+    except Exception as e:
+        return e
+    finally:
+        loop.close()
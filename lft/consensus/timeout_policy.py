@@ -0,0 +1,86 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque
+
+__all__ = ("TimeoutPolicy", "FixedTimeoutPolicy", "AdaptiveTimeoutPolicy", "TIMEOUT_PROPOSE", "TIMEOUT_VOTE")
+
+TIMEOUT_PROPOSE = 2.0
+TIMEOUT_VOTE = 2.0
+
+
+class TimeoutPolicy(ABC):
+    # Observations come from recorded RoundMetricsEvent, so a replay gets the same timeouts.
+    @abstractmethod
+    def propose_timeout(self, epoch_num: int, round_num: int) -> float:
+        raise NotImplementedError
+
+    @abstractmethod
+    def vote_timeout(self, epoch_num: int, round_num: int) -> float:
+        raise NotImplementedError
+
+    def observe(self, is_success: bool, elapsed: float):
+        pass
+
+
+class FixedTimeoutPolicy(TimeoutPolicy):
+    def __init__(self, propose_timeout: float = TIMEOUT_PROPOSE, vote_timeout: float = TIMEOUT_VOTE):
+        self._propose_timeout = propose_timeout
+        self._vote_timeout = vote_timeout
+
+    def propose_timeout(self, epoch_num: int, round_num: int) -> float:
+        return self._propose_timeout
+
+    def vote_timeout(self, epoch_num: int, round_num: int) -> float:
+        return self._vote_timeout
+
+
+class AdaptiveTimeoutPolicy(TimeoutPolicy):
+    # Backs off exponentially on consecutive failed rounds.
+    # On success, decays toward a percentile of the recent round latencies times the margin.
+    def __init__(self,
+                 initial_timeout: float = TIMEOUT_PROPOSE,
+                 min_timeout: float = 0.1,
+                 max_timeout: float = 30.0,
+                 backoff: float = 2.0,
+                 decay: float = 0.25,
+                 percentile: float = 0.9,
+                 margin: float = 1.5,
+                 window: int = 32):
+        self._min_timeout = min_timeout
+        self._max_timeout = max_timeout
+        self._backoff = backoff
+        self._decay = decay
+        self._percentile = percentile
+        self._margin = margin
+
+        self._base_timeout = initial_timeout
+        self._failures = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    @property
+    def timeout(self) -> float:
+        timeout = self._base_timeout * self._backoff ** self._failures
+        return min(max(timeout, self._min_timeout), self._max_timeout)
+
+    def propose_timeout(self, epoch_num: int, round_num: int) -> float:
+        return self.timeout
+
+    def vote_timeout(self, epoch_num: int, round_num: int) -> float:
+        return self.timeout
+
+    def observe(self, is_success: bool, elapsed: float):
+        if not is_success:
+            if self.timeout < self._max_timeout:
+                self._failures += 1
+            return
+
+        self._failures = 0
+        self._latencies.append(elapsed)
+        target = self._latency_percentile() * self._margin
+        self._base_timeout += (target - self._base_timeout) * self._decay
+        self._base_timeout = min(max(self._base_timeout, self._min_timeout), self._max_timeout)
+
+    def _latency_percentile(self):
+        latencies = sorted(self._latencies)
+        index = min(int(len(latencies) * self._percentile), len(latencies) - 1)
+        return latencies[index]
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Tuple, Union
+from lft.consensus.messages.message import Message
+from lft.serialization import Serializer
+
+__all__ = ("WriteAheadLog", "sync_wal")
+
+
+class WriteAheadLog:
+    # Own data and votes, logged before they are broadcast.
+    # Records are appended on the event loop and written by sync() on worker threads.
+    # A sync waits flush_interval for other records, then writes all pending records with one fsync.
+    def __init__(self, path: Union[str, Path], flush_interval: float = 0.005, compact_threshold: int = 1024):
+        self.path = Path(path)
+        self._flush_interval = flush_interval
+        self._compact_threshold = compact_threshold
+        self._serializer = Serializer()
+
+        self._lock = threading.Lock()
+        self._synced = threading.Condition(self._lock)
+        self._is_syncing = False
+
+        self._records: List[Tuple[Tuple[int, int], str]] = []  # Live records in order of seq
+        self._pending: List[str] = []
+        self._seq = 0
+        self._synced_seq = 0
+        self._pruned = 0
+        self._fsyncs = 0
+
+        self._messages, is_torn = self._read()
+        self._file = open(str(self.path), "a")
+        if is_torn:
+            self._compact([record for _, record in self._records])
+            self._fsyncs += 1
+
+    @property
+    def messages(self) -> List[Message]:
+        # Messages logged before the last restart
+        return self._messages
+
+    @property
+    def fsyncs(self) -> int:
+        return self._fsyncs
+
+    def append(self, message: Message) -> int:
+        record = self._serializer.serialize(message)
+        with self._lock:
+            self._seq += 1
+            self._records.append(((message.epoch_num, message.round_num), record))
+            self._pending.append(record)
+            return self._seq
+
+    def sync(self, seq: int):
+        # Blocks until the record of seq is on disk.
+        with self._lock:
+            while self._synced_seq < seq:
+                if self._is_syncing:
+                    self._synced.wait()
+                    continue
+                self._is_syncing = True
+                try:
+                    self._lock.release()
+                    try:
+                        time.sleep(self._flush_interval)
+                    finally:
+                        self._lock.acquire()
+                    self._write()
+                finally:
+                    self._is_syncing = False
+                    self._synced.notify_all()
+
+    def prune(self, latest_epoch_num: int, latest_round_num: int):
+        # Records of rounds before the latest are needless. The file is rewritten once enough of them are pruned.
+        with self._lock:
+            records = [(round_id, record) for round_id, record in self._records
+                       if round_id >= (latest_epoch_num, latest_round_num)]
+            self._pruned += len(self._records) - len(records)
+            self._records = records
+            self._messages = [message for message in self._messages
+                              if (message.epoch_num, message.round_num) >= (latest_epoch_num, latest_round_num)]
+
+    def close(self):
+        with self._lock:
+            while self._is_syncing:
+                self._synced.wait()
+            if self._file.closed:
+                return
+            self._is_syncing = True
+            try:
+                self._write()
+            finally:
+                self._is_syncing = False
+                self._synced.notify_all()
+            self._file.close()
+
+    def _write(self):
+        # Called with the lock by the only syncing thread. The pending records are taken under the lock,
+        # then written and fsynced without it. append() on the event loop never waits for the disk.
+        seq = self._seq
+        pending, self._pending = self._pending, []
+        pruned = self._pruned
+        records = [record for _, record in self._records] if pruned >= self._compact_threshold else None
+        if records is None and not pending:
+            self._synced_seq = seq
+            return
+
+        self._lock.release()
+        try:
+            if records is not None:
+                self._compact(records)
+            else:
+                self._append(pending)
+        except BaseException:
+            self._lock.acquire()
+            # They are written by the next sync
+            self._pending[:0] = pending
+            raise
+        self._lock.acquire()
+
+        if records is not None:
+            self._pruned -= pruned
+        self._fsyncs += 1
+        self._synced_seq = seq
+
+    def _append(self, records: List[str]):
+        self._file.write("".join(record + "\n" for record in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _compact(self, records: List[str]):
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(str(temp_path), "w") as f:
+            f.write("".join(record + "\n" for record in records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(str(temp_path), str(self.path))
+
+        self._file.close()
+        self._file = open(str(self.path), "a")
+
+    def _read(self) -> Tuple[List[Message], bool]:
+        if not self.path.exists():
+            return [], False
+        with open(str(self.path), "r") as f:
+            lines = f.read().split("\n")
+
+        # The last line is empty unless a crash tore it while writing. A torn record was not broadcast.
+        messages = []
+        for line in lines[:-1]:
+            try:
+                message = self._serializer.deserialize(line)
+            except ValueError:
+                return messages, True
+            messages.append(message)
+            self._records.append(((message.epoch_num, message.round_num), line))
+        return messages, bool(lines[-1])
+
+
+def sync_wal(wal: WriteAheadLog, seq: int):
+    # Entry point of executors.
+    wal.sync(seq)
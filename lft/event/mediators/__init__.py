@@ -1,3 +1,4 @@
 from .delayed_event_mediator import DelayedEventMediator
 from .timestamp_event_mediator import TimestampEventMediator
 from .json_rpc_event_mediator import JsonRpcEventMediator
+from .executor_event_mediator import ExecutorEventMediator
@@ -0,0 +1,83 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, Optional, Sequence
+from lft.event import (Event, EventSimulator, EventMediator,
+                       EventInstantMediatorExecutor, EventReplayerMediatorExecutor, EventRecorderMediatorExecutor)
+
+__all__ = ("ExecutorHandlerMixin", "ExecutorEventMediator", "ExecutorEventInstantMediatorExecutor",
+           "ExecutorEventRecorderMediatorExecutor", "ExecutorEventReplayerMediatorExecutor")
+
+ToEvent = Callable[[Any], Event]
+
+
+class ExecutorHandlerMixin:
+    def _handle(self,
+                loop: asyncio.AbstractEventLoop,
+                executor: Optional[Executor],
+                func: Callable,
+                args: Sequence,
+                to_event: ToEvent,
+                event_simulator: EventSimulator):
+        loop = loop or asyncio.get_event_loop()
+        future = loop.run_in_executor(executor, func, *args)
+
+        def _raise_event(done: asyncio.Future):
+            if done.cancelled():
+                return
+            try:
+                result = done.result()
+            except Exception as e:
+                result = e
+
+            event = to_event(result)
+            _is_valid_event(event)
+            event_simulator.raise_event(event)
+
+        future.add_done_callback(_raise_event)
+        return future
+
+
+class ExecutorEventInstantMediatorExecutor(EventInstantMediatorExecutor, ExecutorHandlerMixin):
+    def execute(self, executor: Optional[Executor], func: Callable, args: Sequence, to_event: ToEvent,
+                loop: asyncio.AbstractEventLoop=None):
+        return self._handle(loop, executor, func, args, to_event, self._event_simulator)
+
+    async def execute_async(self, executor: Optional[Executor], func: Callable, args: Sequence, to_event: ToEvent,
+                            loop: asyncio.AbstractEventLoop=None):
+        return self.execute(executor, func, args, to_event, loop)
+
+
+class ExecutorEventRecorderMediatorExecutor(EventRecorderMediatorExecutor, ExecutorHandlerMixin):
+    def execute(self, executor: Optional[Executor], func: Callable, args: Sequence, to_event: ToEvent,
+                loop: asyncio.AbstractEventLoop=None):
+        return self._handle(loop, executor, func, args, to_event, self._event_recorder.event_simulator)
+
+    async def execute_async(self, executor: Optional[Executor], func: Callable, args: Sequence, to_event: ToEvent,
+                            loop: asyncio.AbstractEventLoop=None):
+        return self.execute(executor, func, args, to_event, loop)
+
+
+class ExecutorEventReplayerMediatorExecutor(EventReplayerMediatorExecutor):
+    def execute(self, executor: Optional[Executor], func: Callable, args: Sequence, to_event: ToEvent,
+                loop: asyncio.AbstractEventLoop=None):
+        # do nothing, the result event is replayed from records.
+        return None
+
+    async def execute_async(self, executor: Optional[Executor], func: Callable, args: Sequence, to_event: ToEvent,
+                            loop: asyncio.AbstractEventLoop=None):
+        return self.execute(executor, func, args, to_event, loop)
+
+
+class ExecutorEventMediator(EventMediator):
+    InstantExecutorType = ExecutorEventInstantMediatorExecutor
+    RecorderExecutorType = ExecutorEventRecorderMediatorExecutor
+    ReplayerExecutorType = ExecutorEventReplayerMediatorExecutor
+
+    def execute(self, executor: Optional[Executor], func: Callable, args: Sequence, to_event: ToEvent,
+                loop: asyncio.AbstractEventLoop=None) -> Optional[asyncio.Future]:
+        return super().execute(executor=executor, func=func, args=args, to_event=to_event, loop=loop)
+
+
+def _is_valid_event(event: Event):
+    if event.deterministic:
+        raise RuntimeError(f"Executor result event must not be deterministic :{event.serialize()}")
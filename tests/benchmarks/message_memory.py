@@ -0,0 +1,54 @@
+"""
+Memory used by votes kept in pools.
+
+    python -m tests.benchmarks.message_memory [count]
+
+DictVote has the attribute layout DefaultVote had before it was slotted. It is the baseline.
+"""
+import gc
+import os
+import sys
+import tracemalloc
+from lft.app.vote import DefaultVote
+
+
+class DictVote:
+    def __init__(self, id_: bytes, data_id: bytes, commit_id: bytes, voter_id: bytes, epoch_num: int, round_num: int):
+        self._id = id_
+        self._data_id = data_id
+        self._commit_id = commit_id
+        self._voter_id = voter_id
+        self._epoch_num = epoch_num
+        self._round_num = round_num
+
+    def __hash__(self):
+        return int.from_bytes(self._id, "big")
+
+
+def measure(vote_type: type, count: int):
+    # Ids, data ids and voters are shared by both types, so only the object layout is measured.
+    data_id = os.urandom(16)
+    commit_id = os.urandom(16)
+    voters = [os.urandom(16) for _ in range(100)]
+    ids = [os.urandom(16) for _ in range(count)]
+
+    gc.collect()
+    tracemalloc.start()
+    votes = {vote_type(id_, data_id, commit_id, voters[i % len(voters)], 1, i // len(voters))
+             for i, id_ in enumerate(ids)}
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert len(votes) == count
+    return size
+
+
+def main(count: int):
+    for vote_type in (DictVote, DefaultVote):
+        size = measure(vote_type, count)
+        print(f"{vote_type.__qualname__:>12}: {size / 2 ** 20:8.1f} MiB per {count} votes "
+              f"({size / count:.0f} bytes per vote, including the set)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,47 @@
+"""
+Committed data per second of in-process nodes, by pacing policy.
+
+    python -m tests.benchmarks.round_throughput [node_num] [duration]
+
+FixedDelayPacing is the baseline. ImmediatePacing shows the throughput ceiling of consensus itself.
+"""
+import asyncio
+import os
+import sys
+from typing import List
+from lft.app import InstantApp, Node
+from lft.app.pacing import FixedDelayPacing, ImmediatePacing
+
+
+class PacedApp(InstantApp):
+    def __init__(self, number: int, pacing_type: type):
+        super().__init__(number)
+        self.pacing_type = pacing_type
+
+    def _gen_nodes(self) -> List[Node]:
+        return [Node(os.urandom(16), self.pacing_type()) for _ in range(self.number)]
+
+
+async def measure(pacing_type: type, node_num: int, duration: float):
+    app = PacedApp(node_num, pacing_type)
+    app.nodes = app._gen_nodes()
+    app._connect_nodes()
+    app._start(app.nodes)
+    await asyncio.sleep(duration)
+
+    committed = min(max(node.commit_datums, default=0) for node in app.nodes)
+    for node in app.nodes:
+        node.close()
+    return committed
+
+
+async def main(node_num: int, duration: float):
+    for pacing_type in (FixedDelayPacing, ImmediatePacing):
+        committed = await measure(pacing_type, node_num, duration)
+        print(f"{pacing_type.__qualname__:>16}: {committed} data in {duration}s "
+              f"({committed / duration:.1f} per second)")
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(main(int(sys.argv[1]) if len(sys.argv) > 1 else 4,
+                                                     float(sys.argv[2]) if len(sys.argv) > 2 else 10.0))
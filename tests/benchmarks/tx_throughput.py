@@ -0,0 +1,64 @@
+"""
+Committed transactions per second of in-process nodes, by batch size.
+
+    python -m tests.benchmarks.tx_throughput [node_num] [duration]
+
+Every node has the same transactions in its pool, as if clients broadcast them.
+"""
+import asyncio
+import os
+import sys
+from typing import List
+from lft.app import InstantApp, Node
+from lft.app.data import PayloadData
+from lft.app.pacing import ImmediatePacing
+from lft.app.tx_pool import TxPool, tx_hash
+
+TX_SIZE = 200
+TX_NUM = 200000
+
+
+class TxApp(InstantApp):
+    def __init__(self, number: int, batch_size: int, txs: List[bytes]):
+        super().__init__(number)
+        self.batch_size = batch_size
+        self.txs = txs
+
+    def _gen_nodes(self) -> List[Node]:
+        nodes = []
+        for _ in range(self.number):
+            tx_pool = TxPool(max_count=len(self.txs), max_bytes=len(self.txs) * TX_SIZE)
+            for tx in self.txs:
+                tx_pool.submit(tx)
+            node = Node(os.urandom(16), ImmediatePacing(), tx_pool=tx_pool)
+            node._consensus._data_factory._max_batch_count = self.batch_size
+            nodes.append(node)
+        return nodes
+
+
+async def measure(batch_size: int, node_num: int, duration: float, txs: List[bytes]):
+    app = TxApp(node_num, batch_size, txs)
+    app.nodes = app._gen_nodes()
+    app._connect_nodes()
+    app._start(app.nodes)
+    await asyncio.sleep(duration)
+
+    # Transactions are counted once even if data carried them again
+    committed = min(len({tx_hash(tx) for data in node.commit_datums.values() if isinstance(data, PayloadData)
+                         for tx in data.payload})
+                    for node in app.nodes)
+    for node in app.nodes:
+        node.close()
+    return committed
+
+
+async def main(node_num: int, duration: float):
+    txs = [os.urandom(TX_SIZE) for _ in range(TX_NUM)]
+    for batch_size in (1, 100, 1000, 5000):
+        committed = await measure(batch_size, node_num, duration, txs)
+        print(f"{batch_size:>5} txs per data: {committed} txs in {duration}s ({committed / duration:.1f} TPS)")
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(main(int(sys.argv[1]) if len(sys.argv) > 1 else 4,
+                                                     float(sys.argv[2]) if len(sys.argv) > 2 else 10.0))
@@ -1,5 +1,6 @@
 import os
 from lft.app import Node
+from lft.app.data import DefaultData
 from lft.event import EventRegister
 from lft.consensus.events import RoundStartEvent, ReceiveDataEvent, BroadcastDataEvent
 
@@ -37,8 +38,9 @@ class DoubleProposer(EventRegister):
         prev_votes = tuple(prev_votes[voter] if voter in prev_votes else None
                            for voter in prev_epoch.voters)
 
-        fake_data = await self.data_factory.create_data(prev_data.number + 1, prev_id, epoch_num, round_num, prev_votes)
-        fake_data._id = os.urandom(16)
+        data = await self.data_factory.create_data(prev_data.number + 1, prev_id, epoch_num, round_num, prev_votes)
+        fake_data = DefaultData(os.urandom(16), data.prev_id, data.proposer_id, data.number,
+                                data.epoch_num, data.round_num, data.prev_votes)
 
         event = BroadcastDataEvent(fake_data)
         event.deterministic = False
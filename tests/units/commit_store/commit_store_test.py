@@ -0,0 +1,57 @@
+import os
+import pytest
+from lft.app.commit_store import CommitStore, INDEX_NAME
+from lft.app.data import DefaultData
+from lft.app.vote import DefaultVoteFactory
+
+
+@pytest.mark.asyncio
+async def test_commit_store(tmp_path):
+    datums = await new_datums(10)
+    commit_store = CommitStore(tmp_path, tip_size=2, index_growth=4)
+    for data in datums:
+        commit_store[data.number] = data
+
+    assert len(commit_store) == 10
+    assert list(commit_store) == list(range(10))
+    assert max(commit_store.keys()) == commit_store.last_number == 9
+    assert len(commit_store._tip) == 2
+
+    # Read from the segment, not from the tip
+    assert commit_store[0] == datums[0]
+    assert commit_store[0] is not datums[0]
+    assert commit_store[5].prev_votes == datums[5].prev_votes
+    assert 10 not in commit_store
+    assert commit_store.get(10) is None
+
+    # The index grows by index_growth entries
+    assert os.path.getsize(str(tmp_path.joinpath(INDEX_NAME))) == 12 * 8
+    commit_store.close()
+
+    commit_store = CommitStore(tmp_path)
+    assert len(commit_store) == 10
+    assert (commit_store.first_number, commit_store.last_number) == (0, 9)
+    assert commit_store[9] == datums[9]
+    commit_store.close()
+
+
+def test_temporary_commit_store():
+    commit_store = CommitStore()
+    path = commit_store.path
+    assert path.exists()
+    commit_store.close()
+    assert not path.exists()
+
+
+async def new_datums(count: int):
+    voters = [os.urandom(16) for _ in range(4)]
+    datums = []
+    prev_id, prev_votes = b'genesis', ()
+    for number in range(count):
+        data = DefaultData(id_=os.urandom(16), prev_id=prev_id, proposer_id=voters[number % 4], number=number,
+                           epoch_num=1, round_num=number, prev_votes=prev_votes)
+        datums.append(data)
+        prev_id = data.id
+        prev_votes = tuple([await DefaultVoteFactory(voter).create_vote(data.id, data.prev_id, 1, number)
+                            for voter in voters[:3]] + [None])
+    return datums
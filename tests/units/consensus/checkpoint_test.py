@@ -0,0 +1,54 @@
+import os
+import pytest
+from mock import MagicMock
+from lft.app.data import DefaultDataFactory
+from lft.app.vote import DefaultVoteFactory
+from lft.consensus import Consensus
+from lft.consensus.checkpoint import write_checkpoint, read_checkpoint
+from lft.consensus.events import BroadcastDataEvent, BroadcastVoteEvent, RoundEndEvent
+from lft.event import EventSystem
+from tests.units.consensus.setup_consensus import setup_real_consensus, decide_round_0, get_raised_events
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_restore(tmp_path):
+    voters = [os.urandom(16) for _ in range(4)]
+    event_system, consensus, _ = await setup_real_consensus(voters[1], voters)
+    data10 = await decide_round_0(consensus, voters)
+
+    # Own data and vote of round 1
+    await consensus.round_start(consensus._get_epoch(1), 1)
+    data11 = get_raised_events(event_system, BroadcastDataEvent)[-1].data
+    await consensus.receive_data(data11)
+    vote11 = get_raised_events(event_system, BroadcastVoteEvent)[-1].vote
+    assert vote11.data_id == data11.id
+    await consensus.receive_vote(vote11)
+
+    checkpoint_path = tmp_path.joinpath("checkpoint")
+    write_checkpoint(checkpoint_path, consensus.checkpoint())
+    checkpoint = read_checkpoint(checkpoint_path)
+    assert [data.id for data in checkpoint.datums] == [b'genesis', data10.id, data11.id]
+    assert tuple(checkpoint.started_round_id) == (1, 1)
+    assert not tmp_path.joinpath("checkpoint.tmp").exists()
+
+    node_id = voters[1]
+    event_system = MagicMock(EventSystem())
+    restored = Consensus(event_system, node_id=node_id,
+                         data_factory=DefaultDataFactory(node_id), vote_factory=DefaultVoteFactory(node_id))
+    await restored.restore(checkpoint)
+
+    candidate_round = restored._get_candidate_round()
+    assert (candidate_round.epoch_num, candidate_round.num) == (1, 0)
+    assert candidate_round.result_id == data10.id
+    assert get_raised_events(event_system, RoundEndEvent)[0].candidate_id == data10.id
+
+    round1 = restored._round_pool.get_round(1, 1)
+    assert round1.candidate_id == data10.id
+    assert round1._election._is_proposed
+    assert round1._election._is_voted
+
+    # It neither proposes nor votes again
+    event_system.simulator.raise_event.reset_mock()
+    await restored.round_start(restored._get_epoch(1), 1)
+    assert not get_raised_events(event_system, BroadcastDataEvent)
+    assert not get_raised_events(event_system, BroadcastVoteEvent)
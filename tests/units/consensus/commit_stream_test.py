@@ -0,0 +1,72 @@
+import asyncio
+import os
+import pytest
+from mock import MagicMock
+from lft.app.data import DefaultData
+from lft.app.vote import DefaultVoteFactory
+from lft.consensus.commit_stream import Commit, CommitStream, SlowConsumerPolicy
+from lft.consensus.exceptions import CommitStreamOverflow
+from tests.units.consensus.setup_consensus import setup_real_consensus, decide_round_0
+
+
+@pytest.mark.asyncio
+async def test_commit_stream_block():
+    commits = [Commit(MagicMock(number=number), ()) for number in range(3)]
+    commit_stream = CommitStream(max_size=2, policy=SlowConsumerPolicy.block)
+    await commit_stream.put(commits[0])
+    await commit_stream.put(commits[1])
+
+    put = asyncio.ensure_future(commit_stream.put(commits[2]))
+    await asyncio.sleep(0)
+    assert not put.done()
+
+    assert await commit_stream.__anext__() is commits[0]
+    await put
+    commit_stream.close()
+    assert [commit async for commit in commit_stream] == commits[1:]
+
+
+@pytest.mark.asyncio
+async def test_commit_stream_drop_oldest():
+    commits = [Commit(MagicMock(number=number), ()) for number in range(3)]
+    commit_stream = CommitStream(max_size=2, policy=SlowConsumerPolicy.drop_oldest)
+    for commit in commits:
+        await commit_stream.put(commit)
+    commit_stream.close()
+
+    assert [commit async for commit in commit_stream] == commits[1:]
+    assert commit_stream.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_commit_stream_close():
+    commits = [Commit(MagicMock(number=number), ()) for number in range(3)]
+    commit_stream = CommitStream(max_size=2, policy=SlowConsumerPolicy.close)
+    for commit in commits:
+        await commit_stream.put(commit)
+    assert commit_stream.is_closed
+
+    assert await commit_stream.__anext__() is commits[0]
+    assert await commit_stream.__anext__() is commits[1]
+    with pytest.raises(CommitStreamOverflow):
+        await commit_stream.__anext__()
+
+
+@pytest.mark.asyncio
+async def test_consensus_commit_stream():
+    voters = [os.urandom(16) for _ in range(4)]
+    event_system, consensus, _ = await setup_real_consensus(voters[1], voters)
+    commit_stream = consensus.commit_stream()
+
+    data10 = await decide_round_0(consensus, voters)
+    data10_votes = [await DefaultVoteFactory(voter).create_vote(data10.id, b'genesis', 1, 0) for voter in voters[:3]]
+    data11 = DefaultData(id_=os.urandom(16), prev_id=data10.id, proposer_id=voters[1], number=2,
+                         epoch_num=1, round_num=1, prev_votes=tuple(data10_votes + [None]))
+    await consensus.receive_data(data11)
+    await consensus.receive_votes([await DefaultVoteFactory(voter).create_vote(data11.id, data10.id, 1, 1)
+                                   for voter in voters[:3]])
+    consensus.close()
+
+    commits = [commit async for commit in commit_stream]
+    assert [commit.data.id for commit in commits] == [b'genesis', data10.id]
+    assert commits[1].votes == data11.prev_votes
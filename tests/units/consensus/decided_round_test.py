@@ -0,0 +1,41 @@
+import os
+import pytest
+from mock import MagicMock
+from lft.app.data import DefaultData
+from lft.app.vote import DefaultVoteFactory
+from tests.units.consensus.setup_consensus import setup_real_consensus
+
+
+@pytest.mark.asyncio
+async def test_late_messages_of_decided_round():
+    event_system, consensus, voters = await setup_real_consensus()
+    await consensus.round_start(consensus._get_epoch(1), 0)
+
+    data = DefaultData(id_=os.urandom(16), prev_id=b'genesis', proposer_id=voters[0], number=1,
+                       epoch_num=1, round_num=0, prev_votes=())
+    await consensus.receive_data(data)
+    for voter in voters[:3]:
+        await consensus.receive_vote(await DefaultVoteFactory(voter).create_vote(data.id, b'genesis', 1, 0))
+
+    round_ = consensus._round_pool.get_round(1, 0)
+    assert round_.is_decided
+    round_._election.receive_vote = MagicMock()
+    round_._election.receive_data = MagicMock()
+
+    late_vote = await DefaultVoteFactory(voters[3]).create_vote(data.id, b'genesis', 1, 0)
+    await consensus.receive_vote(late_vote)
+    assert late_vote.id in consensus._vote_pool
+    assert late_vote not in round_._messages
+
+    none_vote = DefaultVoteFactory(voters[3]).create_none_vote(1, 0)
+    await consensus.receive_vote(none_vote)
+    assert none_vote.id not in consensus._vote_pool
+
+    late_data = DefaultData(id_=os.urandom(16), prev_id=b'genesis', proposer_id=voters[0], number=1,
+                            epoch_num=1, round_num=0, prev_votes=())
+    await consensus.receive_data(late_data)
+    assert late_data.id not in consensus._data_pool
+    assert late_data not in round_._messages
+
+    round_._election.receive_vote.assert_not_called()
+    round_._election.receive_data.assert_not_called()
@@ -22,7 +22,7 @@ async def test_receive_invalid_proposer_data():
 
     # WHEN
     data = await create_valid_data(0, voters, vote_factories)
-    data._proposer_id = voters[1]
+    data = DefaultData(data.id, data.prev_id, voters[1], data.number, data.epoch_num, data.round_num, data.prev_votes)
     await consensus.receive_data(data)
 
     # THEN
@@ -0,0 +1,149 @@
+import os
+import pytest
+from mock import MagicMock
+from lft.app.data import DefaultData, DefaultDataFactory
+from lft.app.epoch import RotateEpoch
+from lft.app.vote import DefaultVoteFactory
+from lft.consensus import Consensus
+from lft.consensus.events import RoundEndEvent
+from lft.consensus.messages.future_message import FutureMessageBuffer
+from lft.event import EventSystem
+from tests.units.consensus.setup_consensus import setup_real_consensus, start_round
+
+
+def test_buffer_evicts_farthest_round_per_peer():
+    voters = [os.urandom(16) for _ in range(2)]
+    buffer = FutureMessageBuffer(max_messages=100, max_messages_per_peer=2)
+    votes = [DefaultVoteFactory(voters[0]).create_none_vote(1, round_num) for round_num in (5, 9, 7, 10)]
+
+    assert buffer.add_message(votes[0], voters[0])
+    assert buffer.add_message(votes[1], voters[0])
+    # Round 7 is nearer than round 9
+    assert buffer.add_message(votes[2], voters[0])
+    assert votes[1].id not in buffer
+    # Round 10 is the farthest
+    assert not buffer.add_message(votes[3], voters[0])
+
+    other_vote = DefaultVoteFactory(voters[1]).create_none_vote(1, 10)
+    assert buffer.add_message(other_vote, voters[1])
+
+    assert len(buffer) == 3
+    assert buffer.counters.buffered == 4
+    assert buffer.counters.evicted == 1
+    assert buffer.counters.dropped == 1
+
+
+def test_buffer_evicts_farthest_round_in_total():
+    voters = [os.urandom(16) for _ in range(4)]
+    buffer = FutureMessageBuffer(max_messages=3, max_messages_per_peer=100)
+    votes = [DefaultVoteFactory(voter).create_none_vote(1, round_num)
+             for voter, round_num in zip(voters, (3, 6, 4, 5))]
+
+    for vote in votes:
+        assert buffer.add_message(vote, vote.voter_id)
+
+    assert len(buffer) == 3
+    assert votes[1].id not in buffer
+    assert [vote.round_num for vote in buffer.pop_messages_until(1, 4)] == [3, 4]
+    assert buffer.counters.released == 2
+    assert len(buffer) == 1
+
+
+@pytest.mark.parametrize("max_messages,max_messages_per_peer", [(0, 100), (100, 0), (0, 0)])
+def test_buffer_zero_cap(max_messages: int, max_messages_per_peer: int):
+    voter = os.urandom(16)
+    buffer = FutureMessageBuffer(max_messages=max_messages, max_messages_per_peer=max_messages_per_peer)
+
+    assert not buffer.add_message(DefaultVoteFactory(voter).create_none_vote(1, 5), voter)
+    assert len(buffer) == 0
+    assert buffer.counters.dropped == 1
+    assert buffer.counters.evicted == 0
+
+
+def test_buffer_negative_cap():
+    with pytest.raises(ValueError):
+        FutureMessageBuffer(max_messages=-1, max_messages_per_peer=100)
+    with pytest.raises(ValueError):
+        FutureMessageBuffer(max_messages=100, max_messages_per_peer=-1)
+
+
+def test_buffer_reach_quorum():
+    voters = [os.urandom(16) for _ in range(4)]
+    buffer = FutureMessageBuffer(max_messages=100, max_messages_per_peer=100)
+    for voter in voters[:2]:
+        buffer.add_message(DefaultVoteFactory(voter).create_none_vote(1, 5), voter)
+        buffer.add_message(DefaultVoteFactory(voter).create_none_vote(1, 6), voter)
+    assert not buffer.reach_quorum(1, 5, 3)
+
+    buffer.add_message(DefaultVoteFactory(voters[2]).create_none_vote(1, 5), voters[2])
+    assert buffer.reach_quorum(1, 5, 3)
+    assert not buffer.reach_quorum(1, 6, 3)
+
+    buffer.prune_message(1, 6)
+    assert not buffer.reach_quorum(1, 5, 3)
+    assert len(buffer) == 2
+
+
+@pytest.mark.asyncio
+async def test_future_messages_released_by_round_start():
+    event_system, consensus, voters = await setup_real_consensus()
+    epoch = await start_round(event_system, consensus, 0)
+    data = DefaultData(id_=b'data', prev_id=b'genesis', proposer_id=epoch.get_proposer_id(3), number=1,
+                       epoch_num=1, round_num=3)
+    await consensus.receive_data(data)
+
+    assert data.id not in consensus._data_pool
+    with pytest.raises(KeyError):
+        consensus._round_pool.get_round(1, 3)
+    assert consensus.future_message_counters.buffered == 1
+
+    await consensus.round_start(epoch, 2)
+
+    assert data.id in consensus._data_pool
+    assert (1, 3) in consensus._pending_rounds
+    assert consensus.future_message_counters.released == 1
+
+
+@pytest.mark.asyncio
+async def test_future_messages_released_by_quorum():
+    event_system, consensus, voters = await setup_real_consensus()
+    epoch = await start_round(event_system, consensus, 0)
+    data = DefaultData(id_=b'data', prev_id=b'genesis', proposer_id=epoch.get_proposer_id(3), number=1,
+                       epoch_num=1, round_num=3)
+    await consensus.receive_data(data)
+
+    votes = [await DefaultVoteFactory(voter).create_vote(data.id, b'genesis', 1, 3) for voter in voters]
+    for vote in votes[:epoch.quorum_num - 1]:
+        await consensus.receive_vote(vote)
+    assert len(consensus._future_messages) == epoch.quorum_num
+    event_system.simulator.raise_event.assert_not_called()
+
+    await consensus.receive_vote(votes[epoch.quorum_num - 1])
+    assert len(consensus._future_messages) == 0
+
+    round_end = event_system.simulator.raise_event.call_args_list[0][0][0]
+    assert isinstance(round_end, RoundEndEvent)
+    assert round_end.candidate_id == data.id
+
+
+@pytest.mark.asyncio
+async def test_future_messages_after_initialize_from_non_genesis():
+    voters = [os.urandom(16) for _ in range(4)]
+    epoch = RotateEpoch(1, voters)
+    commit_data = DefaultData(id_=b'commit', prev_id=b'genesis', proposer_id=epoch.get_proposer_id(4), number=5,
+                              epoch_num=1, round_num=4)
+    candidate_data = DefaultData(id_=b'candidate', prev_id=commit_data.id, proposer_id=epoch.get_proposer_id(5),
+                                 number=6, epoch_num=1, round_num=5)
+    event_system = MagicMock(EventSystem())
+    consensus = Consensus(event_system, node_id=b'x',
+                          data_factory=DefaultDataFactory(b'x'), vote_factory=DefaultVoteFactory(b'x'))
+    await consensus.initialize(commit_data.id, [RotateEpoch(0, []), epoch], [commit_data, candidate_data], [])
+    assert consensus._started_round_id == (1, 5)
+
+    next_vote = DefaultVoteFactory(voters[0]).create_none_vote(1, 6)
+    await consensus.receive_vote(next_vote)
+    assert next_vote.id in consensus._vote_pool
+
+    far_vote = DefaultVoteFactory(voters[0]).create_none_vote(1, 7)
+    await consensus.receive_vote(far_vote)
+    assert far_vote.id in consensus._future_messages
@@ -13,6 +13,7 @@ class RoundMock(Round):
         self._messages = MagicMock()
 
         self._election = MagicMock()
+        self._election.is_ended = False
         self._node_id = MagicMock()
 
         self._event_system = MagicMock()
@@ -23,7 +24,9 @@ class RoundMock(Round):
         self._messages = MagicMock()
 
         self._vote_timeout_started = MagicMock()
+        self._timeout_policy = MagicMock()
 
         self.round_start = AsyncMock()
         self.receive_vote = AsyncMock()
+        self.receive_votes = AsyncMock()
         self.receive_data = AsyncMock()
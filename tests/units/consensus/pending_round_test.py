@@ -0,0 +1,62 @@
+import pytest
+from lft.app.data import DefaultData
+from lft.app.vote import DefaultVoteFactory
+from lft.consensus.events import RoundEndEvent
+from tests.units.consensus.setup_consensus import setup_real_consensus, start_round
+
+
+@pytest.mark.asyncio
+async def test_pending_round_materialized_by_round_start():
+    event_system, consensus, voters = await setup_real_consensus()
+    epoch = await start_round(event_system, consensus, 0)
+    data = DefaultData(id_=b'data', prev_id=b'genesis', proposer_id=epoch.get_proposer_id(1), number=1,
+                       epoch_num=1, round_num=1)
+    vote = await DefaultVoteFactory(voters[0]).create_vote(data.id, b'genesis', 1, 1)
+    await consensus.receive_data(data)
+    await consensus.receive_vote(vote)
+
+    assert data.id in consensus._data_pool
+    assert vote.id in consensus._vote_pool
+    with pytest.raises(KeyError):
+        consensus._round_pool.get_round(1, 1)
+
+    await consensus.round_start(epoch, 1)
+
+    assert (1, 1) not in consensus._pending_rounds
+    round_ = consensus._round_pool.get_round(1, 1)
+    assert data in round_._messages
+    assert vote in round_._messages
+
+
+@pytest.mark.asyncio
+async def test_pending_round_materialized_by_quorum():
+    event_system, consensus, voters = await setup_real_consensus()
+    epoch = await start_round(event_system, consensus, 0)
+    data = DefaultData(id_=b'data', prev_id=b'genesis', proposer_id=epoch.get_proposer_id(1), number=1,
+                       epoch_num=1, round_num=1)
+    votes = [await DefaultVoteFactory(voter).create_vote(data.id, b'genesis', 1, 1) for voter in voters]
+    await consensus.receive_data(data)
+    for vote in votes[:epoch.quorum_num - 1]:
+        await consensus.receive_vote(vote)
+
+    assert (1, 1) in consensus._pending_rounds
+    event_system.simulator.raise_event.assert_not_called()
+
+    await consensus.receive_vote(votes[epoch.quorum_num - 1])
+
+    assert (1, 1) not in consensus._pending_rounds
+    round_end = event_system.simulator.raise_event.call_args_list[0][0][0]
+    assert isinstance(round_end, RoundEndEvent)
+    assert round_end.candidate_id == data.id
+
+
+@pytest.mark.asyncio
+async def test_pending_round_pruned():
+    event_system, consensus, voters = await setup_real_consensus()
+    await start_round(event_system, consensus, 0)
+    none_vote = DefaultVoteFactory(voters[0]).create_none_vote(1, 1)
+    await consensus.receive_vote(none_vote)
+    assert (1, 1) in consensus._pending_rounds
+
+    consensus._prune_round(1, 2)
+    assert (1, 1) not in consensus._pending_rounds
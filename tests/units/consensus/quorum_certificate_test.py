@@ -0,0 +1,95 @@
+import os
+import pytest
+from lft.app.data import DefaultData
+from lft.app.vote import DefaultVoteFactory, DefaultVoteVerifier, DefaultQuorumCertificate
+from lft.consensus.events import RoundEndEvent, BroadcastDataEvent
+from lft.consensus.exceptions import InvalidQuorumCertificate
+from tests.units.consensus.setup_consensus import setup_real_consensus, decide_round_0, get_raised_events
+
+
+@pytest.mark.asyncio
+async def test_create_and_verify_quorum_certificate():
+    voters = [os.urandom(16) for _ in range(4)]
+    votes = [await DefaultVoteFactory(voter).create_vote(b'data', b'commit', 1, 0) for voter in voters]
+    votes[1] = None
+
+    assert not DefaultVoteFactory(voters[0]).create_quorum_certificate(votes)
+
+    quorum_certificate = DefaultVoteFactory(voters[0], aggregate_votes=True).create_quorum_certificate(votes)
+    assert quorum_certificate.data_id == b'data'
+    assert quorum_certificate.commit_id == b'commit'
+    assert quorum_certificate.signers == 0b1101
+    assert quorum_certificate.signers_num == 3
+    assert not quorum_certificate.is_signed_by(1)
+
+    await DefaultVoteVerifier().verify_quorum_certificate(quorum_certificate, voters)
+
+    forged = DefaultQuorumCertificate(quorum_certificate.id, quorum_certificate.data_id, quorum_certificate.commit_id,
+                                      0b1110, quorum_certificate.epoch_num, quorum_certificate.round_num)
+    with pytest.raises(InvalidQuorumCertificate):
+        await DefaultVoteVerifier().verify_quorum_certificate(forged, voters)
+
+
+@pytest.mark.asyncio
+async def test_quorum_certificate_serialization():
+    voters = [os.urandom(16) for _ in range(4)]
+    votes = [await DefaultVoteFactory(voter).create_vote(b'data', b'commit', 1, 0) for voter in voters]
+    quorum_certificate = DefaultVoteFactory(voters[0], aggregate_votes=True).create_quorum_certificate(votes)
+
+    data = DefaultData(id_=b'next', prev_id=b'data', proposer_id=voters[1], number=2,
+                       epoch_num=1, round_num=1, prev_votes=quorum_certificate)
+    deserialized = DefaultData.deserialize(data.serialize())
+    assert deserialized == data
+    assert deserialized.prev_votes == quorum_certificate
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("is_valid", [True, False])
+async def test_round_end_by_quorum_certificate(is_valid):
+    event_system, consensus, voters = await setup_real_consensus()
+
+    data10 = DefaultData(id_=b'data10', prev_id=b'genesis', proposer_id=voters[0], number=1,
+                         epoch_num=1, round_num=0, prev_votes=())
+    await consensus.receive_data(data10)
+    event_system.simulator.raise_event.reset_mock()
+
+    votes = [await DefaultVoteFactory(voter).create_vote(data10.id, b'genesis', 1, 0) for voter in voters]
+    vote_factory = DefaultVoteFactory(voters[0], aggregate_votes=True)
+    quorum_certificate = vote_factory.create_quorum_certificate(votes[:3] + [None])
+    if not is_valid:
+        quorum_certificate = DefaultQuorumCertificate(os.urandom(16), quorum_certificate.data_id,
+                                                      quorum_certificate.commit_id, quorum_certificate.signers,
+                                                      quorum_certificate.epoch_num, quorum_certificate.round_num)
+
+    data11 = DefaultData(id_=b'data11', prev_id=data10.id, proposer_id=voters[1], number=2,
+                         epoch_num=1, round_num=1, prev_votes=quorum_certificate)
+    await consensus.receive_data(data11)
+
+    round_ends = [call[0][0] for call in event_system.simulator.raise_event.call_args_list
+                  if isinstance(call[0][0], RoundEndEvent)]
+    if is_valid:
+        assert consensus._vote_pool.get_quorum_certificate(data10.id) == quorum_certificate
+        assert round_ends[0].is_success
+        assert round_ends[0].candidate_id == data10.id
+    else:
+        assert not consensus._vote_pool.get_quorum_certificate(data10.id)
+        assert not round_ends
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("aggregate_votes", [False, True])
+async def test_prev_votes_of_own_data(aggregate_votes):
+    voters = [os.urandom(16) for _ in range(4)]
+    event_system, consensus, _ = await setup_real_consensus(
+        voters[1], voters, vote_factory=DefaultVoteFactory(voters[1], aggregate_votes=aggregate_votes))
+    data10 = await decide_round_0(consensus, voters)
+
+    event_system.simulator.raise_event.reset_mock()
+    await consensus.round_start(consensus._get_epoch(1), 1)
+    prev_votes = get_raised_events(event_system, BroadcastDataEvent)[0].data.prev_votes
+    if aggregate_votes:
+        assert isinstance(prev_votes, DefaultQuorumCertificate)
+        assert prev_votes.data_id == data10.id
+    else:
+        assert isinstance(prev_votes, tuple)
+        assert [vote.data_id for vote in prev_votes if vote] == [data10.id] * 3
@@ -0,0 +1,81 @@
+import os
+import pytest
+from mock import MagicMock
+from lft.app.data import DefaultData
+from lft.app.vote import DefaultVoteFactory
+from lft.consensus.events import RoundEndEvent, ReceiveVotesEvent, ReceiveDatumsEvent
+from tests.units.consensus.setup_consensus import setup_real_consensus
+
+
+@pytest.mark.asyncio
+async def test_receive_votes():
+    event_system, consensus, voters = await setup_real_consensus()
+    await consensus.round_start(consensus._get_epoch(1), 0)
+
+    data = DefaultData(id_=os.urandom(16), prev_id=b'genesis', proposer_id=voters[0], number=1,
+                       epoch_num=1, round_num=0, prev_votes=())
+    await consensus.receive_data(data)
+    round_ = consensus._round_pool.get_round(1, 0)
+    election_receive_votes = round_._election.receive_votes
+    round_._election.receive_votes = MagicMock(side_effect=election_receive_votes)
+    event_system.simulator.raise_event.reset_mock()
+
+    votes = [await DefaultVoteFactory(voter).create_vote(data.id, b'genesis', 1, 0) for voter in voters]
+    await consensus._on_event_receive_votes(ReceiveVotesEvent(votes + votes[:1]))
+
+    for vote in votes:
+        assert vote.id in consensus._vote_pool
+    round_._election.receive_votes.assert_called_once()
+    assert round_._election.receive_votes.call_args[0][0] == votes
+
+    round_ends = [call[0][0] for call in event_system.simulator.raise_event.call_args_list
+                  if isinstance(call[0][0], RoundEndEvent)]
+    assert len(round_ends) == 1
+    assert round_ends[0].is_success
+    assert round_ends[0].candidate_id == data.id
+
+
+@pytest.mark.asyncio
+async def test_receive_datums():
+    event_system, consensus, voters = await setup_real_consensus()
+    await consensus.round_start(consensus._get_epoch(1), 0)
+
+    data10 = DefaultData(id_=os.urandom(16), prev_id=b'genesis', proposer_id=voters[0], number=1,
+                         epoch_num=1, round_num=0, prev_votes=())
+    prev_votes = [await DefaultVoteFactory(voter).create_vote(data10.id, b'genesis', 1, 0) for voter in voters]
+    data11 = DefaultData(id_=os.urandom(16), prev_id=data10.id, proposer_id=voters[1], number=2,
+                         epoch_num=1, round_num=1, prev_votes=prev_votes)
+
+    await consensus._on_event_receive_datums(ReceiveDatumsEvent([data11, data10]))
+
+    assert data10.id in consensus._data_pool
+    assert data11.id in consensus._data_pool
+    assert consensus._round_pool.get_round(1, 0).result_id == data10.id
+    assert consensus._get_candidate_round().result_id == data10.id
+
+
+@pytest.mark.asyncio
+async def test_receive_datums_change_candidate_once_per_round():
+    event_system, consensus, voters = await setup_real_consensus()
+    await consensus.round_start(consensus._get_epoch(1), 0)
+
+    try_change_candidate = consensus._try_change_candidate
+    changed_round_ids = []
+
+    def _try_change_candidate(round_, pruning_messages=False):
+        changed_round_ids.append((round_.epoch_num, round_.num))
+        return try_change_candidate(round_, pruning_messages)
+    consensus._try_change_candidate = _try_change_candidate
+
+    data10 = DefaultData(id_=os.urandom(16), prev_id=b'genesis', proposer_id=voters[0], number=1,
+                         epoch_num=1, round_num=0, prev_votes=())
+    prev_votes = [await DefaultVoteFactory(voter).create_vote(data10.id, b'genesis', 1, 0) for voter in voters]
+    data11 = DefaultData(id_=os.urandom(16), prev_id=data10.id, proposer_id=voters[1], number=2,
+                         epoch_num=1, round_num=1, prev_votes=prev_votes)
+    none_data10 = consensus._data_factory.create_none_data(1, 0, voters[0])
+
+    await consensus._on_event_receive_datums(ReceiveDatumsEvent([data11, data10, none_data10]))
+
+    # Once for the prev votes of round 0 and once for the datums of round 0. Round 1 is pended.
+    assert changed_round_ids == [(1, 0), (1, 0)]
+    assert consensus._get_candidate_round().result_id == data10.id
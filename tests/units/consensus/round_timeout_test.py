@@ -0,0 +1,64 @@
+import os
+import pytest
+from lft.app.data import DefaultData
+from lft.app.vote import DefaultVoteFactory
+from lft.consensus.events import RoundEndEvent, RoundTimeoutEvent
+from lft.event.mediators import DelayedEventMediator
+from tests.units.consensus.setup_consensus import setup_real_consensus, start_round, get_raised_events
+
+
+@pytest.mark.asyncio
+async def test_round_timeout_lazy_votes_of_missing_voters():
+    event_system, consensus, voters = await setup_real_consensus()
+    epoch = await start_round(event_system, consensus, 0)
+    lazy_data = consensus._data_factory.create_lazy_data(1, 0, epoch.get_proposer_id(0))
+    await consensus.receive_data(lazy_data)
+
+    # A quorum of voters without consensus
+    data = DefaultData(id_=os.urandom(16), prev_id=b'genesis', proposer_id=voters[0], number=1,
+                       epoch_num=1, round_num=0, prev_votes=())
+    await consensus.receive_data(data)
+    await consensus.receive_votes([await DefaultVoteFactory(voters[0]).create_vote(data.id, b'genesis', 1, 0),
+                                   DefaultVoteFactory(voters[1]).create_none_vote(1, 0),
+                                   DefaultVoteFactory(voters[2]).create_none_vote(1, 0)])
+    mediator = event_system.get_mediator(DelayedEventMediator)
+    delay, event = mediator.execute.call_args[0]
+    assert event == RoundTimeoutEvent(1, 0)
+    assert not event.deterministic
+    event_system.simulator.raise_event.reset_mock()
+
+    await consensus._on_event_round_timeout(event)
+
+    # Only the voter who has not voted votes for LazyData. Nobody reaches the quorum but all voters are tallied.
+    round_ = consensus._round_pool.get_round(1, 0)
+    lazy_votes = [consensus._vote_factory.create_lazy_vote(voter, 1, 0) for voter in voters]
+    for lazy_vote in lazy_votes[:3]:
+        assert lazy_vote.id not in consensus._vote_pool
+        assert lazy_vote not in round_.messages
+    assert lazy_votes[3].id in consensus._vote_pool
+    assert lazy_votes[3] in round_.messages
+    assert round_.missing_voters == []
+
+    round_ends = get_raised_events(event_system, RoundEndEvent)
+    assert len(round_ends) == 1
+    assert not round_ends[0].is_success
+
+
+@pytest.mark.asyncio
+async def test_round_timeout_lazy_vote_of_voter_for_unknown_data():
+    event_system, consensus, voters = await setup_real_consensus()
+    await start_round(event_system, consensus, 0)
+
+    # The vote of voters[1] is not tallied until its data arrives
+    await consensus.receive_votes([DefaultVoteFactory(voters[0]).create_none_vote(1, 0),
+                                   await DefaultVoteFactory(voters[1]).create_vote(os.urandom(16), b'genesis', 1, 0),
+                                   DefaultVoteFactory(voters[2]).create_none_vote(1, 0)])
+    round_ = consensus._round_pool.get_round(1, 0)
+    assert round_.missing_voters == [voters[1], voters[3]]
+    event_system.simulator.raise_event.reset_mock()
+
+    await consensus._on_event_round_timeout(RoundTimeoutEvent(1, 0))
+    assert round_.missing_voters == []
+    round_ends = get_raised_events(event_system, RoundEndEvent)
+    assert len(round_ends) == 1
+    assert not round_ends[0].is_success
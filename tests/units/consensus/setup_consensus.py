@@ -1,5 +1,7 @@
+import os
 from mock import MagicMock
 from functools import partial
+from typing import Optional, Sequence
 
 from lft.app.data import DefaultData, DefaultDataFactory
 from lft.app.epoch import RotateEpoch
@@ -48,3 +50,43 @@ async def setup_consensus():
 
     await consensus.initialize(commit_id=genesis_data.prev_id, epoch_pool=epochs, data_pool=datums, vote_pool=votes)
     return consensus, voters, vote_factories, now_epoch, genesis_data
+
+
+async def setup_real_consensus(node_id: bytes = b'x', voters: Optional[Sequence[bytes]] = None,
+                               reset_events: bool = True, **kwargs):
+    # Consensus with real rounds, initialized at genesis. voters default to 4 random ones.
+    voters = voters or [os.urandom(16) for _ in range(4)]
+    kwargs.setdefault("data_factory", DefaultDataFactory(node_id))
+    kwargs.setdefault("vote_factory", DefaultVoteFactory(node_id))
+
+    event_system = MagicMock(EventSystem())
+    consensus = Consensus(event_system, node_id=node_id, **kwargs)
+
+    epochs = [RotateEpoch(0, []), RotateEpoch(1, voters)]
+    datums = [DefaultData(id_=b'genesis', prev_id=b'', proposer_id=b'', number=0, epoch_num=0, round_num=0)]
+    await consensus.initialize(datums[0].prev_id, epochs, datums, [])
+    if reset_events:
+        event_system.simulator.raise_event.reset_mock()
+    return event_system, consensus, voters
+
+
+async def start_round(event_system: EventSystem, consensus: Consensus, round_num: int):
+    epoch = consensus._get_epoch(1)
+    await consensus.round_start(epoch, round_num)
+    event_system.simulator.raise_event.reset_mock()
+    return epoch
+
+
+async def decide_round_0(consensus: Consensus, voters: Sequence[bytes]):
+    await consensus.round_start(consensus._get_epoch(1), 0)
+    data10 = DefaultData(id_=os.urandom(16), prev_id=b'genesis', proposer_id=voters[0], number=1,
+                         epoch_num=1, round_num=0, prev_votes=())
+    await consensus.receive_data(data10)
+    votes = [await DefaultVoteFactory(voter).create_vote(data10.id, b'genesis', 1, 0) for voter in voters[:3]]
+    await consensus.receive_votes(votes)
+    return data10
+
+
+def get_raised_events(event_system: EventSystem, event_type: type):
+    return [call[0][0] for call in event_system.simulator.raise_event.call_args_list
+            if isinstance(call[0][0], event_type)]
@@ -0,0 +1,45 @@
+import os
+import pytest
+from mock import MagicMock
+from lft.consensus.events import BroadcastDataEvent
+from tests.units.consensus.setup_consensus import setup_real_consensus, decide_round_0
+
+
+@pytest.mark.asyncio
+async def test_speculative_proposal():
+    voters = [os.urandom(16) for _ in range(4)]
+    event_system, consensus, _ = await setup_real_consensus(voters[1], voters, speculative_proposal=True)
+    data10 = await decide_round_0(consensus, voters)
+
+    speculative_data = consensus._speculative_data
+    assert speculative_data.prev_id == data10.id
+    assert speculative_data.number == data10.number + 1
+    assert (speculative_data.epoch_num, speculative_data.round_num) == (1, 1)
+    assert {vote.data_id for vote in speculative_data.prev_votes if vote} == {data10.id}
+
+    create_data = consensus._data_factory.create_data = MagicMock(wraps=consensus._data_factory.create_data)
+    event_system.simulator.raise_event.reset_mock()
+    await consensus.round_start(consensus._get_epoch(1), 1)
+
+    create_data.assert_not_called()
+    broadcasts = [call[0][0] for call in event_system.simulator.raise_event.call_args_list
+                  if isinstance(call[0][0], BroadcastDataEvent)]
+    assert broadcasts[0].data is speculative_data
+
+
+@pytest.mark.asyncio
+async def test_speculative_proposal_discarded():
+    voters = [os.urandom(16) for _ in range(4)]
+    event_system, consensus, _ = await setup_real_consensus(voters[1], voters, speculative_proposal=True)
+    data10 = await decide_round_0(consensus, voters)
+
+    # Built on data which is not the candidate anymore
+    stale_data = await consensus._data_factory.create_data(1, b'genesis', 1, 1, ())
+    consensus._speculative_data = stale_data
+
+    event_system.simulator.raise_event.reset_mock()
+    await consensus.round_start(consensus._get_epoch(1), 1)
+    broadcasts = [call[0][0] for call in event_system.simulator.raise_event.call_args_list
+                  if isinstance(call[0][0], BroadcastDataEvent)]
+    assert broadcasts[0].data is not stale_data
+    assert broadcasts[0].data.prev_id == data10.id
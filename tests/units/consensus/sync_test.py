@@ -0,0 +1,149 @@
+import asyncio
+import os
+import threading
+import pytest
+from mock import MagicMock
+from lft.app.data import DefaultData
+from lft.app.epoch import RotateEpoch
+from lft.app.node import Node
+from lft.app.sync import PeerSyncFetcher
+from lft.app.vote import DefaultVoteFactory
+from lft.consensus import Consensus
+from lft.consensus.events import RoundEndEvent, SyncEndEvent
+from lft.consensus.sync import SyncFetcher, fetch_datums
+from lft.event import EventSystem
+from tests.units.consensus.setup_consensus import setup_real_consensus, get_raised_events
+
+
+class ChainFetcher(SyncFetcher):
+    def __init__(self, datums):
+        self.datums = datums
+
+    async def fetch(self, start_number: int, end_id: bytes, max_count: int):
+        return [data for data in self.datums if data.number >= start_number][:max_count]
+
+
+@pytest.mark.asyncio
+async def test_sync():
+    voters = [os.urandom(16) for _ in range(4)]
+    chain, target, target_votes = await new_chain(voters, 5)
+    event_system, consensus, _ = await setup_real_consensus(voters[1], voters, sync_fetcher=ChainFetcher(chain),
+                                                            sync_batch_size=2)
+
+    await receive_target(consensus, target, target_votes)
+    assert consensus._sync_target is target
+
+    # Batches of 2 datums, the last one of each batch is certified by the next batch
+    await fetch(event_system, consensus)
+    assert consensus._sync_tip is chain[0]
+    for _ in range(3):
+        await fetch(event_system, consensus)
+    assert consensus._sync_target is None
+
+    sync_end_events = get_raised_events(event_system, SyncEndEvent)
+    assert len(sync_end_events) == 1
+    assert sync_end_events[0].is_success
+    assert [data.number for data in sync_end_events[0].commit_datums] == [0, 1, 2, 3]
+    round_end_events = get_raised_events(event_system, RoundEndEvent)
+    assert [event.commit_id for event in round_end_events] == [chain[3].id, chain[4].id]
+    assert consensus._get_candidate_round().result_id == target.id
+
+
+@pytest.mark.asyncio
+async def test_sync_invalid_votes():
+    voters = [os.urandom(16) for _ in range(4)]
+    chain, target, target_votes = await new_chain(voters, 5)
+    # Votes of a non voter cannot certify data.
+    invalid_votes = [await DefaultVoteFactory(os.urandom(16)).create_vote(chain[1].id, b'', 1, 1) for _ in range(3)]
+    chain[2] = DefaultData(id_=chain[2].id, prev_id=chain[2].prev_id, proposer_id=chain[2].proposer_id,
+                           number=3, epoch_num=1, round_num=2, prev_votes=tuple(invalid_votes))
+    event_system, consensus, _ = await setup_real_consensus(voters[1], voters, sync_fetcher=ChainFetcher(chain),
+                                                            sync_batch_size=2)
+
+    await receive_target(consensus, target, target_votes)
+    await fetch(event_system, consensus)
+    await fetch(event_system, consensus)
+
+    assert get_raised_events(event_system, SyncEndEvent) == [SyncEndEvent(is_success=False, commit_datums=[])]
+    assert consensus._sync_target is None
+    assert chain[1].id not in consensus._data_pool
+
+
+async def fetch(event_system: EventSystem, consensus: Consensus):
+    mediator = event_system.get_mediator.return_value
+    executor, fn, args, to_event = mediator.execute.call_args[0]
+    assert fn is fetch_datums
+    # It runs on a worker thread like executors
+    event = to_event(await asyncio.get_event_loop().run_in_executor(None, fn, *args))
+    assert not event.deterministic
+    await consensus._on_event_sync_fetched(event)
+
+
+async def receive_target(consensus: Consensus, target: DefaultData, target_votes):
+    await consensus.round_start(consensus._get_epoch(1), 0)
+    await consensus.receive_data(target)
+    await consensus.receive_votes(target_votes)
+
+
+async def new_chain(voters, length: int):
+    epoch = RotateEpoch(1, voters)
+    datums = []
+    prev_id, prev_votes = b'genesis', ()
+    for number in range(1, length + 2):
+        round_num = number - 1
+        data = DefaultData(id_=os.urandom(16), prev_id=prev_id, proposer_id=epoch.get_proposer_id(round_num),
+                           number=number, epoch_num=1, round_num=round_num, prev_votes=prev_votes)
+        datums.append(data)
+        prev_id = data.id
+        prev_votes = tuple([await DefaultVoteFactory(voter).create_vote(data.id, data.prev_id, 1, round_num)
+                            for voter in voters[:3]] + [None])
+    return datums[:-1], datums[-1], prev_votes[:-1]
+
+
+@pytest.mark.asyncio
+async def test_peer_sync_fetcher_reads_on_peer_loop():
+    voters = [os.urandom(16) for _ in range(4)]
+    chain, _, _ = await new_chain(voters, 3)
+    peer = Node(voters[0])
+    for data in chain[:-1]:
+        peer.commit_datums[data.number] = data
+    peer._consensus._data_pool.add_data(chain[-1])
+    peer.loop = asyncio.get_event_loop()
+
+    get_datums = peer.get_datums
+    threads = []
+
+    def _get_datums(*args):
+        threads.append(threading.current_thread())
+        return get_datums(*args)
+    peer.get_datums = _get_datums
+
+    # Like executors, it runs on a worker thread
+    fetcher = PeerSyncFetcher([Node(voters[1]), peer])
+    datums = await asyncio.get_event_loop().run_in_executor(None, fetch_datums, fetcher, 2, chain[-1].id, 2)
+    assert datums == chain[1:3]
+    assert threads == [threading.main_thread()]
+    peer.close()
+
+
+@pytest.mark.asyncio
+async def test_node_get_datums_by_number():
+    voters = [os.urandom(16) for _ in range(4)]
+    chain, _, _ = await new_chain(voters, 6)
+    peer = Node(voters[0])
+    for data in chain[:4]:
+        peer.commit_datums[data.number] = data
+    for data in chain[3:]:
+        peer._consensus._data_pool.add_data(data)
+    peer._consensus.find_data = MagicMock(side_effect=peer._consensus.find_data)
+
+    # Committed datums are read by number. The chain is not followed back from end_id.
+    assert peer.get_datums(1, chain[-1].id, 2) == chain[:2]
+    assert peer._consensus.find_data.call_count == 1
+
+    # Uncommitted datums are followed back from end_id
+    assert peer.get_datums(3, chain[-1].id, 10) == chain[2:]
+    assert peer.get_datums(5, chain[-1].id, 1) == chain[4:5]
+    assert peer.get_datums(7, chain[-1].id, 10) == []
+    assert peer.get_datums(1, os.urandom(16), 10) == []
+    peer.close()
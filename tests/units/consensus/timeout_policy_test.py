@@ -0,0 +1,55 @@
+import pytest
+from mock import MagicMock
+from lft.consensus.events import RoundEndEvent, RoundMetricsEvent
+from lft.consensus.timeout_policy import AdaptiveTimeoutPolicy
+from lft.event.mediators import DelayedEventMediator
+from tests.units.consensus.setup_consensus import setup_real_consensus
+
+
+def test_adaptive_timeout_policy():
+    policy = AdaptiveTimeoutPolicy(initial_timeout=2.0, min_timeout=0.1, max_timeout=10.0,
+                                   backoff=2.0, decay=0.5, percentile=0.9, margin=1.5)
+    assert policy.propose_timeout(1, 0) == policy.vote_timeout(1, 0) == 2.0
+
+    # Exponential backoff on consecutive failures, up to max_timeout
+    policy.observe(False, 2.0)
+    assert policy.timeout == 4.0
+    policy.observe(False, 4.0)
+    assert policy.timeout == 8.0
+    policy.observe(False, 8.0)
+    policy.observe(False, 10.0)
+    assert policy.timeout == 10.0
+
+    # Success resets the backoff and decays toward the observed latency
+    policy.observe(True, 0.2)
+    assert policy.timeout == pytest.approx(2.0 + (0.3 - 2.0) * 0.5)
+    for _ in range(20):
+        policy.observe(True, 0.2)
+    assert policy.timeout == pytest.approx(0.3, rel=1e-3)
+
+    policy.observe(False, 0.3)
+    assert policy.timeout == pytest.approx(0.6, rel=1e-3)
+
+
+@pytest.mark.asyncio
+async def test_round_metrics_are_recorded():
+    event_system, consensus, voters = await setup_real_consensus()
+    consensus._timeout_policy = MagicMock(AdaptiveTimeoutPolicy())
+    await consensus.round_start(consensus._get_epoch(1), 0)
+
+    mediator = event_system.get_mediator(DelayedEventMediator)
+    mediator.execute.reset_mock()
+    round_end = RoundEndEvent(is_success=True, epoch_num=1, round_num=0, candidate_id=b'data', commit_id=b'genesis')
+    await consensus._on_event_round_end(round_end)
+    await consensus._on_event_round_end(round_end)
+
+    # The elapsed time is non-deterministic. It is delivered by a recorded event.
+    mediator.execute.assert_called_once()
+    delay, event = mediator.execute.call_args[0]
+    assert isinstance(event, RoundMetricsEvent)
+    assert not event.deterministic
+    assert (event.epoch_num, event.round_num, event.is_success) == (1, 0, True)
+    assert event.elapsed >= 0
+
+    await consensus._on_event_round_metrics(event)
+    consensus._timeout_policy.observe.assert_called_once_with(True, event.elapsed)
@@ -0,0 +1,94 @@
+import os
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from lft.app.data import DefaultData
+from lft.app.vote import DefaultVoteFactory, DefaultVoteVerifier
+from lft.consensus.events import VerifyVotesEvent
+from lft.event.mediators import DelayedEventMediator
+from tests.units.consensus.setup_consensus import setup_real_consensus
+
+VOTE_BATCH_WINDOW = 0.1
+
+
+class RejectVoterVerifier(DefaultVoteVerifier):
+    def __init__(self, rejected_voter: bytes):
+        self.rejected_voter = rejected_voter
+
+    async def verify(self, vote):
+        if vote.voter_id == self.rejected_voter:
+            raise RuntimeError(vote.voter_id)
+
+
+class RejectVoterVoteFactory(DefaultVoteFactory):
+    def __init__(self, node_id: bytes, rejected_voter: bytes):
+        super().__init__(node_id)
+        self.rejected_voter = rejected_voter
+
+    async def create_vote_verifier(self):
+        return RejectVoterVerifier(self.rejected_voter)
+
+
+@pytest.mark.asyncio
+async def test_verify_batch_results():
+    voters = [os.urandom(16) for _ in range(4)]
+    votes = [await DefaultVoteFactory(voter).create_vote(b'data', b'commit', 1, 0) for voter in voters]
+
+    results = await RejectVoterVerifier(voters[2]).verify_batch(votes)
+
+    assert len(results) == len(votes)
+    assert results[0] is None and results[1] is None and results[3] is None
+    assert isinstance(results[2], RuntimeError)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_executor", [False, True])
+async def test_receive_votes_in_batch(use_executor):
+    executor = ThreadPoolExecutor(1) if use_executor else None
+    event_system, consensus, voters = await setup_consensus(executor)
+
+    votes = [await DefaultVoteFactory(voter).create_vote(b'data', b'genesis', 1, 0) for voter in voters]
+    for vote in votes:
+        await consensus.receive_vote(vote)
+
+    # Votes are pending until the window is closed
+    for vote in votes:
+        assert vote.id not in consensus._vote_pool
+
+    mediator = event_system.get_mediator(DelayedEventMediator)
+    mediator.execute.assert_called_once()
+    delay, event = mediator.execute.call_args_list[0][0]
+    assert delay == VOTE_BATCH_WINDOW
+    assert event == VerifyVotesEvent(1, 0)
+
+    await consensus.verify_pending_votes(event.epoch_num, event.round_num)
+    for vote in votes:
+        if vote.voter_id == voters[-1]:
+            assert vote.id not in consensus._vote_pool
+        else:
+            assert vote.id in consensus._vote_pool
+
+    if executor:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_receive_prev_votes_in_batch():
+    event_system, consensus, voters = await setup_consensus()
+
+    prev_votes = [await DefaultVoteFactory(voter).create_vote(b'genesis', b'', 1, 0) for voter in voters]
+    data = DefaultData(id_=b'data', prev_id=b'genesis', proposer_id=voters[1], number=1,
+                       epoch_num=1, round_num=1, prev_votes=prev_votes)
+    await consensus.receive_data(data)
+
+    mediator = event_system.get_mediator(DelayedEventMediator)
+    mediator.execute.assert_not_called()
+    for vote in prev_votes[:-1]:
+        assert vote.id in consensus._vote_pool
+    assert prev_votes[-1].id not in consensus._vote_pool
+
+
+async def setup_consensus(executor=None):
+    voters = [os.urandom(16) for _ in range(4)]
+    return await setup_real_consensus(voters=voters,
+                                      vote_factory=RejectVoterVoteFactory(b'x', rejected_voter=voters[-1]),
+                                      vote_batch_window=VOTE_BATCH_WINDOW, vote_batch_executor=executor)
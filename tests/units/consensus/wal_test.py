@@ -0,0 +1,139 @@
+import asyncio
+import os
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from lft.app.vote import DefaultVoteFactory
+from lft.consensus.events import BroadcastDataEvent
+from lft.consensus import wal as wal_module
+from lft.consensus.wal import WriteAheadLog, sync_wal
+from tests.units.consensus.setup_consensus import setup_real_consensus, get_raised_events
+
+
+@pytest.mark.asyncio
+async def test_wal_group_commit(tmp_path):
+    wal_path = tmp_path.joinpath("wal")
+    wal = WriteAheadLog(wal_path, flush_interval=0.01)
+    vote_factory = DefaultVoteFactory(os.urandom(16))
+    votes = [await vote_factory.create_vote(os.urandom(16), b'genesis', 1, round_num) for round_num in range(8)]
+
+    seqs = [wal.append(vote) for vote in votes]
+    with ThreadPoolExecutor(len(seqs)) as executor:
+        list(executor.map(wal.sync, seqs))
+    assert wal.fsyncs == 1
+
+    # Torn by a crash
+    with open(str(wal_path), "a") as f:
+        f.write('{"!type": ')
+    wal.close()
+
+    wal = WriteAheadLog(wal_path)
+    assert wal.messages == votes
+    wal.prune(1, 4)
+    assert wal.messages == votes[4:]
+    wal.close()
+
+
+@pytest.mark.asyncio
+async def test_wal_restores_own_proposal(tmp_path):
+    voters = [os.urandom(16) for _ in range(4)]
+    wal_path = tmp_path.joinpath("wal")
+
+    event_system, consensus, _ = await setup_real_consensus(voters[0], voters, wal=WriteAheadLog(wal_path))
+    await consensus.round_start(consensus._get_epoch(1), 0)
+
+    # Broadcast after the data is logged
+    assert not get_raised_events(event_system, BroadcastDataEvent)
+    mediator = event_system.get_mediator.return_value
+    executor, fn, args, to_event = mediator.execute.call_args[0]
+    assert fn is sync_wal
+    event = to_event(await asyncio.get_event_loop().run_in_executor(None, fn, *args))
+    assert not event.deterministic
+    await consensus._on_event_wal_synced(event)
+    data = get_raised_events(event_system, BroadcastDataEvent)[0].data
+    assert data.proposer_id == voters[0]
+    consensus._wal.close()
+
+    # After a crash, it does not propose new data for the round. The logged one is broadcast again.
+    event_system, consensus, _ = await setup_real_consensus(voters[0], voters, reset_events=False,
+                                                            wal=WriteAheadLog(wal_path))
+    assert consensus._round_pool.get_round(1, 0)._election._is_proposed
+    await consensus.round_start(consensus._get_epoch(1), 0)
+    assert [event.data for event in get_raised_events(event_system, BroadcastDataEvent)] == [data]
+    consensus._wal.close()
+
+
+@pytest.mark.asyncio
+async def test_wal_append_during_fsync(tmp_path, monkeypatch):
+    wal = WriteAheadLog(tmp_path.joinpath("wal"), flush_interval=0.0)
+    vote_factory = DefaultVoteFactory(os.urandom(16))
+    votes = [await vote_factory.create_vote(os.urandom(16), b'genesis', 1, round_num) for round_num in range(2)]
+
+    fsyncing = threading.Event()
+    release = threading.Event()
+
+    def _slow_fsync(fd):
+        fsyncing.set()
+        release.wait()
+    monkeypatch.setattr(wal_module.os, "fsync", _slow_fsync)
+
+    seq = wal.append(votes[0])
+    syncing = threading.Thread(target=wal.sync, args=(seq,))
+    syncing.start()
+    assert fsyncing.wait(1.0)
+
+    # The event loop is not blocked by the fsync in progress
+    appending = threading.Thread(target=wal.append, args=(votes[1],))
+    appending.start()
+    appending.join(1.0)
+    is_blocked = appending.is_alive()
+    release.set()
+    appending.join()
+    assert not is_blocked
+    syncing.join()
+    wal.sync(seq + 1)
+    assert wal.fsyncs == 2
+    wal.close()
+
+
+@pytest.mark.asyncio
+async def test_wal_sync_failure_retried(tmp_path, monkeypatch):
+    voters = [os.urandom(16) for _ in range(4)]
+    event_system, consensus, _ = await setup_real_consensus(voters[0], voters,
+                                                            wal=WriteAheadLog(tmp_path.joinpath("wal")))
+
+    fsync = wal_module.os.fsync
+    failures = [OSError("disk")]
+
+    def _failing_fsync(fd):
+        if failures:
+            raise failures.pop()
+        fsync(fd)
+    monkeypatch.setattr(wal_module.os, "fsync", _failing_fsync)
+
+    await consensus.round_start(consensus._get_epoch(1), 0)
+    mediator = event_system.get_mediator.return_value
+    executor, fn, args, to_event = mediator.execute.call_args[0]
+    event = to_event(await run_in_executor(fn, args))
+    assert not event.is_success
+    mediator.execute.reset_mock()
+    await consensus._on_event_wal_synced(event)
+    assert not get_raised_events(event_system, BroadcastDataEvent)
+
+    # Synced again with the same record
+    executor, fn, args, to_event = mediator.execute.call_args[0]
+    assert fn is sync_wal
+    assert args[1] == event.seq
+    event = to_event(await run_in_executor(fn, args))
+    assert event.is_success
+    await consensus._on_event_wal_synced(event)
+    assert get_raised_events(event_system, BroadcastDataEvent)[0].data == event.message
+    consensus._wal.close()
+
+
+async def run_in_executor(fn, args):
+    # Like ExecutorEventMediator, an exception is the result.
+    try:
+        return await asyncio.get_event_loop().run_in_executor(None, fn, *args)
+    except Exception as e:
+        return e
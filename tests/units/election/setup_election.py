@@ -13,7 +13,7 @@ TEST_NODE_ID = bytes([2])
 LEADER_ID = bytes([1])
 
 
-async def setup_election(peer_num: int) -> Tuple[EventSystem, Election, List[bytes]]:
+async def setup_election(peer_num: int, data_verify_executor=None) -> Tuple[EventSystem, Election, List[bytes]]:
     event_system = MagicMock(EventSystem())
     voters = [bytes([x]) for x in range(peer_num)]
     data_factory = DefaultDataFactory(TEST_NODE_ID)
@@ -33,6 +33,6 @@ async def setup_election(peer_num: int) -> Tuple[EventSystem, Election, List[byt
     data_pool.add_data(genesis_data)
 
     election = Election(TEST_NODE_ID, RotateEpoch(0, voters), genesis_data.round_num + 1,
-                        event_system, data_factory, vote_factory, data_pool, vote_pool)
+                        event_system, data_factory, vote_factory, data_pool, vote_pool, data_verify_executor)
     election._candidate_id = CANDIDATE_ID
     return event_system, election, voters
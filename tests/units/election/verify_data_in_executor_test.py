@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from lft.app.data import DefaultData
+from lft.app.vote import DefaultVoteFactory
+from lft.consensus.events import BroadcastVoteEvent, DataVerifiedEvent
+from lft.consensus.messages.data import verify_data
+from lft.event import EventSimulator
+from lft.event.mediators import ExecutorEventMediator
+from tests.units.election.setup_election import setup_election, CANDIDATE_ID, LEADER_ID
+
+PEER_NUM = 7
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("is_valid", [True, False])
+async def test_vote_on_data_verified(is_valid):
+    # GIVEN
+    executor = ThreadPoolExecutor(1)
+    event_system, election, voters = await setup_election(PEER_NUM, data_verify_executor=executor)
+    await election.round_start()
+    event_system.simulator.raise_event.reset_mock()
+
+    # WHEN
+    data = new_data()
+    await election.receive_data(data)
+
+    # THEN
+    event_system.simulator.raise_event.assert_not_called()
+
+    mediator = event_system.get_mediator(ExecutorEventMediator)
+    mediator.execute.assert_called_once()
+    executor_, func, args, to_event = mediator.execute.call_args_list[0][0]
+    assert executor_ is executor
+    assert func is verify_data
+    assert args == (election._data_verifier, data)
+
+    event = to_event(None if is_valid else RuntimeError())
+    assert event == DataVerifiedEvent(epoch_num=0, round_num=1, data_id=data.id, is_valid=is_valid)
+    assert not event.deterministic
+
+    await election.receive_data_verified(event.data_id, event.is_valid)
+    broadcast_vote_event = event_system.simulator.raise_event.call_args_list[0][0][0]
+    assert isinstance(broadcast_vote_event, BroadcastVoteEvent)
+    if is_valid:
+        assert broadcast_vote_event.vote.data_id == data.id
+    else:
+        assert broadcast_vote_event.vote.is_none()
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancel_verification_on_round_end():
+    # GIVEN
+    executor = ThreadPoolExecutor(1)
+    event_system, election, voters = await setup_election(PEER_NUM, data_verify_executor=executor)
+    await election.round_start()
+
+    data = new_data()
+    await election.receive_data(data)
+    mediator = event_system.get_mediator(ExecutorEventMediator)
+    verifying = mediator.execute.return_value
+    event_system.simulator.raise_event.reset_mock()
+
+    # WHEN
+    for voter in voters[:election._epoch.quorum_num]:
+        vote = await DefaultVoteFactory(voter).create_vote(data.id, CANDIDATE_ID, 0, 1)
+        await election.receive_vote(vote)
+
+    # THEN
+    verifying.cancel.assert_called_once()
+    event_system.simulator.raise_event.reset_mock()
+
+    await election.receive_data_verified(data.id, True)
+    event_system.simulator.raise_event.assert_not_called()
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_executor_event_mediator():
+    results = []
+    event_simulator = EventSimulator()
+    event_simulator.register_handler(DataVerifiedEvent, lambda e: results.append(e))
+
+    mediator = ExecutorEventMediator()
+    mediator.switch_instant(event_simulator)
+
+    def _to_event(result):
+        event = DataVerifiedEvent(epoch_num=0, round_num=0, data_id=result, is_valid=True)
+        event.deterministic = False
+        return event
+
+    with ThreadPoolExecutor(1) as executor:
+        await mediator.execute(executor, bytes, (b'data', ), _to_event)
+        cancelled = mediator.execute(executor, bytes, (b'cancelled', ), _to_event)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+
+    event_simulator.start(False)
+    await asyncio.sleep(0.01)
+    event_simulator.stop()
+    assert [event.data_id for event in results] == [b'data']
+
+
+def new_data():
+    return DefaultData(
+        id_=b'propose',
+        prev_id=CANDIDATE_ID,
+        proposer_id=LEADER_ID,
+        number=1,
+        epoch_num=0,
+        round_num=1,
+        prev_votes=()
+    )
@@ -54,6 +54,32 @@ async def test_round_failure_lazy():
     assert candidate is None
 
 
+@pytest.mark.asyncio
+async def test_round_success_data_after_votes():
+    epoch_num = 0
+    round_num = 0
+
+    voters = [os.urandom(16) for _ in range(7)]
+    epoch = RotateEpoch(epoch_num, voters)
+    election_messages = ElectionMessages(epoch, round_num, DefaultDataFactory(voters[0]))
+
+    proposer_id = epoch.get_proposer_id(round_num)
+    data = await DefaultDataFactory(proposer_id).create_data(0, b'', epoch_num, round_num, [])
+
+    for voter in voters[:epoch.quorum_num]:
+        vote = await DefaultVoteFactory(voter).create_vote(data.id, b'', epoch_num, round_num)
+        election_messages.add_vote(vote)
+
+    # Votes for unknown data cannot determine the result
+    election_messages.update()
+    assert election_messages.result is None
+
+    election_messages.add_data(data)
+    election_messages.update()
+    assert election_messages.result == data
+    assert election_messages.first_real_data == data
+
+
 async def setup():
     epoch_num = 0
     round_num = 0
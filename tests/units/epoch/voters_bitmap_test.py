@@ -0,0 +1,37 @@
+import os
+import pytest
+from lft.app.epoch import RotateEpoch
+from lft.consensus.epoch import VotersBitmap
+from lft.consensus.exceptions import InvalidVoter
+
+
+def test_voter_indices():
+    voters = [os.urandom(16) for _ in range(100)]
+    epoch = RotateEpoch(1, voters)
+
+    assert epoch.voter_indices == {voter: index for index, voter in enumerate(voters)}
+    for voter in voters:
+        epoch.verify_voter(voter)
+    with pytest.raises(InvalidVoter):
+        epoch.verify_voter(os.urandom(16))
+
+
+@pytest.mark.parametrize("voter_num", [1, 4, 7, 1000])
+def test_voters_bitmap(voter_num: int):
+    voters = [os.urandom(16) for _ in range(voter_num)]
+    epoch = RotateEpoch(1, voters)
+    bitmap = VotersBitmap(epoch.voter_indices)
+
+    for voter in voters[::2]:
+        bitmap.add(voter)
+        bitmap.add(voter)
+
+    assert len(bitmap) == len(voters[::2])
+    for index, voter in enumerate(voters):
+        assert (voter in bitmap) == (index % 2 == 0)
+        assert bool(bitmap.bitmap >> index & 1) == (index % 2 == 0)
+
+    unknown_voter = os.urandom(16)
+    assert unknown_voter not in bitmap
+    with pytest.raises(InvalidVoter):
+        bitmap.add(unknown_voter)
@@ -0,0 +1,189 @@
+import asyncio
+import os
+import time
+import pytest
+from typing import List
+from lft.app import InstantApp, Node
+from lft.app.data import DefaultData
+from lft.app.execution import StateMachine, ExecutionPipeline, ExecutionFailed, SpeculativeDataVerifier
+from lft.app.network import Network
+from lft.app.pacing import ImmediatePacing
+from lft.consensus.commit_stream import Commit, CommitStream
+
+
+class SumStateMachine(StateMachine):
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, state: int, data: DefaultData):
+        if data.round_num < 0:
+            raise ValueError(data.round_num)
+        self.executed.append(data.number)
+        return state + data.number, state
+
+
+class SlowSumStateMachine(SumStateMachine):
+    def execute(self, state: int, data: DefaultData):
+        time.sleep(0.1)
+        return super().execute(state, data)
+
+
+@pytest.mark.asyncio
+async def test_execution_pipeline():
+    datums = new_datums(5)
+    state_machine = SumStateMachine()
+    results = []
+    pipeline = ExecutionPipeline(state_machine, 0, window=2, on_executed=lambda data, result: results.append(result))
+
+    await pipeline.run(await new_commit_stream(datums))
+    assert pipeline.state == sum(range(5))
+    assert results == [0, 0, 1, 3, 6]
+    assert pipeline.metrics.executed_number == 4
+    assert pipeline.metrics.lag == 0
+    assert pipeline.metrics.reused == 0
+    pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_speculative_execution():
+    datums = new_datums(3)
+    state_machine = SumStateMachine()
+    pipeline = ExecutionPipeline(state_machine, 0)
+    verifier = SpeculativeDataVerifier(pipeline)
+
+    for data in datums:
+        await verifier.verify(data)
+    assert state_machine.executed == [0, 1, 2]
+
+    # Verified datums are not executed again on commit
+    await pipeline.run(await new_commit_stream(datums))
+    assert state_machine.executed == [0, 1, 2]
+    assert pipeline.state == 3
+    assert pipeline.metrics.reused == 3
+
+    # Not connected to the executed state
+    assert pipeline.speculate(new_datums(1)[0]) is None
+
+    invalid_data = DefaultData(os.urandom(16), datums[-1].id, b'', 3, 1, -1)
+    with pytest.raises(ValueError):
+        await verifier.verify(invalid_data)
+    pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_speculation_not_connected():
+    datums = new_datums(2)
+    state_machine = SumStateMachine()
+    pipeline = ExecutionPipeline(state_machine, 0)
+    verifier = SpeculativeDataVerifier(pipeline)
+
+    # The prev data is neither executed nor found. The data is verified on commit.
+    await verifier.verify(datums[1])
+    assert state_machine.executed == []
+    assert pipeline.metrics.unverified == 1
+    pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_speculation_of_unexecuted_ancestors():
+    datums = new_datums(4)
+    state_machine = SumStateMachine()
+    found_datums = {data.id: data for data in datums[:3]}
+    pipeline = ExecutionPipeline(state_machine, 0, find_data=found_datums.get)
+    verifier = SpeculativeDataVerifier(pipeline)
+
+    # Ancestors which are not speculated are executed first, from the executed state
+    await verifier.verify(datums[3])
+    assert state_machine.executed == [0, 1, 2, 3]
+    assert pipeline.metrics.unverified == 0
+
+    await pipeline.run(await new_commit_stream(datums))
+    assert state_machine.executed == [0, 1, 2, 3]
+    assert pipeline.metrics.reused == 4
+    assert pipeline.state == 6
+    pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_speculation_chained():
+    datums = new_datums(3)
+    state_machine = SlowSumStateMachine()
+    pipeline = ExecutionPipeline(state_machine, 0)
+    verifier = SpeculativeDataVerifier(pipeline)
+
+    # The next data is speculated before the speculation of its prev data is done
+    futures = [pipeline.speculate(data) for data in datums]
+    assert None not in futures
+    for data in datums:
+        await verifier.verify(data)
+    assert state_machine.executed == [0, 1, 2]
+    pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_execution_failed():
+    datums = new_datums(4)
+    datums[1] = DefaultData(datums[1].id, datums[1].prev_id, b'', 1, 1, -1)
+    state_machine = SumStateMachine()
+    failures = []
+    pipeline = ExecutionPipeline(state_machine, 0, on_failed=failures.append)
+
+    commit_stream = await new_commit_stream(datums)
+    with pytest.raises(ExecutionFailed) as e:
+        await pipeline.run(commit_stream)
+    assert e.value.data == datums[1]
+    assert isinstance(e.value.exception, ValueError)
+    assert failures == [e.value]
+    assert pipeline.metrics.failure == e.value
+
+    # Later commits are not executed on the unknown state, nothing is speculated on it
+    assert state_machine.executed == [0]
+    assert pipeline.state == 0
+    assert pipeline.speculate(datums[2]) is None
+    assert commit_stream.is_closed
+    pipeline.close()
+
+
+class StateMachineApp(InstantApp):
+    def _gen_nodes(self) -> List[Node]:
+        return [Node(os.urandom(16), ImmediatePacing(), state_machine=SumStateMachine(), initial_state=0)
+                for _ in range(self.number)]
+
+
+@pytest.mark.asyncio
+async def test_node_execution(monkeypatch):
+    monkeypatch.setattr(Network, "random_delay", classmethod(lambda cls: 0.01))
+    app = StateMachineApp(4)
+    app.nodes = app._gen_nodes()
+    app._connect_nodes()
+    app._start(app.nodes)
+    await asyncio.sleep(1.0)
+    for node in app.nodes:
+        node.close()
+
+    # Proposals are verified by executing them on the uncommitted chain. No round fails for it.
+    for node in app.nodes:
+        datums = [node.commit_datums[number] for number in sorted(node.commit_datums)]
+        assert len(datums) > 3
+        assert [data.round_num for data in datums] == [data.number for data in datums]
+        assert node.execution.metrics.unverified == 0
+        assert node.execution.metrics.reused > 0
+        assert node.execution.metrics.failure is None
+
+
+async def new_commit_stream(datums):
+    commit_stream = CommitStream()
+    for data in datums:
+        await commit_stream.put(Commit(data, ()))
+    commit_stream.close()
+    return commit_stream
+
+
+def new_datums(count: int):
+    datums = []
+    prev_id = b''
+    for number in range(count):
+        data = DefaultData(os.urandom(16), prev_id, b'', number, 1, number)
+        datums.append(data)
+        prev_id = data.id
+    return datums
@@ -0,0 +1,81 @@
+import os
+import pytest
+from lft.app.data import DefaultDataFactory
+from lft.app.vote import DefaultVoteFactory
+from lft.consensus.messages.data import DataPool
+from lft.consensus.messages.vote import VotePool
+from lft.consensus.events import ReclaimMessagesEvent
+from lft.event.mediators import DelayedEventMediator
+from tests.units.consensus.setup_consensus import setup_real_consensus
+
+
+@pytest.mark.asyncio
+async def test_reclaim_data_in_slices():
+    data_factory = DefaultDataFactory(os.urandom(16))
+    data_pool = DataPool()
+    datums = [await data_factory.create_data(1, b'prev', 1, round_num, ()) for round_num in range(10)]
+    for data in datums:
+        data_pool.add_data(data)
+    data_pool.add_data(data_factory.create_none_data(1, 2, os.urandom(16)))
+
+    data_pool.prune_data(1, 5)
+    assert data_pool.reclaimable
+    for data in datums[:5]:
+        assert data.id not in data_pool
+        with pytest.raises(KeyError):
+            data_pool.get_data(data.id)
+    assert not list(data_pool.get_datums(1, 2))
+    for data in datums[5:]:
+        assert data_pool.get_data(data.id) is data
+    assert list(data_pool.get_datums(1, 5)) == [datums[5]]
+
+    # Hidden messages are still held until they are reclaimed.
+    assert len(data_pool._messages) == 11
+    assert data_pool.reclaim(4) == 4
+    assert data_pool.reclaim(4) == 2
+    assert data_pool.reclaim(4) == 0
+    assert not data_pool.reclaimable
+    assert len(data_pool._messages) == 5
+
+
+@pytest.mark.asyncio
+async def test_reclaim_votes():
+    voters = [os.urandom(16) for _ in range(4)]
+    vote_pool = VotePool()
+
+    data = await DefaultDataFactory(voters[0]).create_data(1, b'prev', 1, 3, ())
+    votes = [await DefaultVoteFactory(voter).create_vote(data.id, b'prev', 1, 3) for voter in voters]
+    vote_pool.add_votes(votes)
+    quorum_certificate = DefaultVoteFactory(voters[0], aggregate_votes=True).create_quorum_certificate(votes)
+    vote_pool.add_quorum_certificate(quorum_certificate)
+
+    vote_pool.prune_vote(1, 4)
+    assert not vote_pool.get_votes_by_data_id(data.id)
+    assert not vote_pool.get_quorum_certificate(data.id)
+
+    assert vote_pool.reclaim(1024) == len(votes) + 1
+    assert not vote_pool._messages
+    assert not vote_pool._votes_by_data_id
+    assert not vote_pool._quorum_certificates
+
+
+@pytest.mark.asyncio
+async def test_consensus_reclaims_pruned_messages():
+    event_system, consensus, voters = await setup_real_consensus()
+    consensus._data_pool.add_data(await DefaultDataFactory(voters[0]).create_data(1, b'prev', 0, 0, ()))
+
+    consensus._prune_messages(1, 0)
+    mediator = event_system.get_mediator(DelayedEventMediator)
+    mediator.execute.assert_called_once()
+    delay, event = mediator.execute.call_args[0]
+    assert delay == 0.0
+    assert isinstance(event, ReclaimMessagesEvent)
+
+    # Not scheduled twice
+    consensus._prune_messages(1, 0)
+    mediator.execute.assert_called_once()
+
+    await consensus._on_event_reclaim_messages(event)
+    assert not consensus._data_pool.reclaimable
+    assert consensus.reclaim_counters.reclaimed == 2
+    assert consensus.reclaim_counters.slices == 1
@@ -0,0 +1,47 @@
+import os
+import pytest
+from lft.app.data import DefaultDataFactory
+from lft.app.vote import DefaultVoteFactory
+from lft.consensus.messages.vote import VotePool
+
+
+@pytest.mark.asyncio
+async def test_get_prev_votes():
+    voters = [os.urandom(16) for _ in range(7)]
+    vote_pool = VotePool()
+
+    data = await DefaultDataFactory(voters[0]).create_data(1, b'prev', 1, 3, ())
+    other_data = await DefaultDataFactory(voters[0]).create_data(1, b'prev', 1, 4, ())
+
+    votes = [await DefaultVoteFactory(voter).create_vote(data.id, b'prev', 1, 3) for voter in voters[:5]]
+    for vote in votes:
+        vote_pool.add_vote(vote)
+    vote_pool.add_vote(await DefaultVoteFactory(voters[5]).create_vote(other_data.id, b'prev', 1, 4))
+    vote_pool.add_vote(DefaultVoteFactory(voters[6]).create_none_vote(1, 3))
+
+    prev_votes = vote_pool.get_prev_votes(data, voters)
+    assert prev_votes == tuple(votes) + (None, None)
+    assert vote_pool.get_prev_votes(data, voters) is prev_votes
+
+    # Cache is invalidated by a new vote for the data
+    last_vote = await DefaultVoteFactory(voters[6]).create_vote(data.id, b'prev', 1, 3)
+    vote_pool.add_vote(last_vote)
+    assert vote_pool.get_prev_votes(data, voters) == tuple(votes) + (None, last_vote)
+
+    # Different order of voters
+    assert vote_pool.get_prev_votes(data, voters[::-1]) == (last_vote, None) + tuple(votes[::-1])
+
+
+@pytest.mark.asyncio
+async def test_prune_prev_votes():
+    voters = [os.urandom(16) for _ in range(4)]
+    vote_pool = VotePool()
+
+    data = await DefaultDataFactory(voters[0]).create_data(1, b'prev', 1, 3, ())
+    for voter in voters:
+        vote_pool.add_vote(await DefaultVoteFactory(voter).create_vote(data.id, b'prev', 1, 3))
+    assert all(vote_pool.get_prev_votes(data, voters))
+
+    vote_pool.prune_vote(1, 4)
+    assert not vote_pool.get_votes_by_data_id(data.id)
+    assert vote_pool.get_prev_votes(data, voters) == (None, ) * len(voters)
@@ -0,0 +1,52 @@
+import os
+import pickle
+import pytest
+from lft.app.data import DefaultData
+from lft.app.vote import DefaultVote
+
+
+def new_vote(id_=None, voter_id=b'voter'):
+    return DefaultVote(id_ or os.urandom(16), b'data', b'commit', voter_id, 1, 0)
+
+
+def new_data(id_=None, prev_votes=()):
+    return DefaultData(id_ or os.urandom(16), b'prev', b'proposer', 1, 1, 0, prev_votes)
+
+
+@pytest.mark.parametrize("message", [new_vote(), new_data()])
+def test_message_immutable(message):
+    assert not hasattr(message, "__dict__")
+    with pytest.raises(AttributeError):
+        message._id = os.urandom(16)
+    with pytest.raises(AttributeError):
+        message.extra = 1
+
+
+def test_vote_equality():
+    vote = new_vote()
+    same_vote = DefaultVote(vote.id, vote.data_id, vote.commit_id, vote.voter_id, vote.epoch_num, vote.round_num)
+    other_voter_vote = DefaultVote(vote.id, vote.data_id, vote.commit_id, b'other', vote.epoch_num, vote.round_num)
+
+    assert vote == same_vote
+    assert hash(vote) == hash(same_vote)
+    assert vote != other_voter_vote
+    assert vote != new_vote()
+
+
+def test_data_equality():
+    votes = [new_vote(voter_id=bytes([i])) for i in range(4)]
+    data = new_data(prev_votes=votes)
+    same_data = new_data(data.id, prev_votes=tuple(votes))
+
+    assert data.prev_votes == tuple(votes)
+    assert data == same_data
+    assert hash(data) == hash(same_data)
+    assert data != new_data(data.id, prev_votes=votes[:3])
+    assert data != new_data(prev_votes=votes)
+
+
+@pytest.mark.parametrize("message", [new_vote(), new_data(prev_votes=[new_vote()])])
+def test_message_pickle(message):
+    unpickled = pickle.loads(pickle.dumps(message))
+    assert unpickled == message
+    assert hash(unpickled) == hash(message)
@@ -0,0 +1,62 @@
+import os
+import pytest
+from lft.app.data import DefaultDataFactory
+from lft.app.id_hasher import ID_SIZE, blake2b_id_hasher, sha3_256_id_hasher, pack_ints
+from lft.app.vote import DefaultVoteFactory
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("id_hasher", [blake2b_id_hasher, sha3_256_id_hasher])
+async def test_ids_by_id_hasher(id_hasher):
+    voters = [os.urandom(16) for _ in range(4)]
+    vote_factories = [DefaultVoteFactory(voter, id_hasher, aggregate_votes=True) for voter in voters]
+    votes = [await vote_factory.create_vote(b'data', b'commit', 1, 0) for vote_factory in vote_factories]
+    assert all(len(vote.id) == ID_SIZE for vote in votes)
+    assert len(set(vote.id for vote in votes)) == len(votes)
+
+    quorum_certificate = vote_factories[0].create_quorum_certificate(votes)
+    vote_verifier = await vote_factories[0].create_vote_verifier()
+    await vote_verifier.verify_quorum_certificate(quorum_certificate, voters)
+
+    data_factory = DefaultDataFactory(voters[0], id_hasher)
+    data = await data_factory.create_data(1, b'data', 1, 1, votes)
+    same_data = await data_factory.create_data(1, b'data', 1, 1, tuple(votes))
+    data_by_qc = await data_factory.create_data(1, b'data', 1, 1, quorum_certificate)
+    assert len(data.id) == ID_SIZE
+    assert data.id == same_data.id
+    assert data.id != data_by_qc.id
+
+
+@pytest.mark.asyncio
+async def test_ids_differ_by_id_hasher():
+    voter = os.urandom(16)
+    blake2b_vote = await DefaultVoteFactory(voter, blake2b_id_hasher).create_vote(b'data', b'commit', 1, 0)
+    sha3_vote = await DefaultVoteFactory(voter, sha3_256_id_hasher).create_vote(b'data', b'commit', 1, 0)
+    assert blake2b_vote.id != sha3_vote.id
+
+
+def test_unreal_votes_cached():
+    voters = [os.urandom(16) for _ in range(4)]
+    vote_factory = DefaultVoteFactory(voters[0])
+
+    none_vote = vote_factory.create_none_vote(1, 0)
+    assert none_vote.is_none()
+    assert vote_factory.create_none_vote(1, 0) is none_vote
+    assert vote_factory.create_none_vote(1, 1) != none_vote
+
+    lazy_votes = [vote_factory.create_lazy_vote(voter, 1, 0) for voter in voters]
+    assert all(lazy_vote.is_lazy() for lazy_vote in lazy_votes)
+    assert len(set(lazy_vote.id for lazy_vote in lazy_votes)) == len(voters)
+    assert all(vote_factory.create_lazy_vote(voter, 1, 0) is lazy_vote
+               for voter, lazy_vote in zip(voters, lazy_votes))
+
+    # Unreal votes do not depend on the factory
+    assert DefaultVoteFactory(voters[1]).create_lazy_vote(voters[0], 1, 0) == lazy_votes[0]
+
+
+def test_pack_ints_range():
+    assert pack_ints(0, 2 ** 63, 2 ** 64 - 1) == bytes(8) + (2 ** 63).to_bytes(8, 'big') + b'\xff' * 8
+    with pytest.raises(ValueError):
+        pack_ints(2 ** 64)
+    with pytest.raises(ValueError):
+        pack_ints(-1)
@@ -0,0 +1,71 @@
+import os
+import pytest
+from mock import MagicMock
+from lft.app import Node
+from lft.app.epoch import RotateEpoch
+from lft.app.pacing import ImmediatePacing, MinIntervalPacing, PayloadPacing, PaceRoundEvent
+from lft.consensus.events import RoundStartEvent
+
+
+def test_min_interval_pacing():
+    epoch = RotateEpoch(1, [os.urandom(16) for _ in range(4)])
+    pacing = MinIntervalPacing(min_interval=10.0)
+
+    assert pacing.delay(epoch, 0, 0.0) == 0.0
+    assert 9.0 < pacing.delay(epoch, 1, 0.0) <= 10.0
+    assert 19.0 < pacing.delay(epoch, 2, 0.0) <= 20.0
+
+
+def test_payload_pacing():
+    voters = [os.urandom(16) for _ in range(4)]
+    epoch = RotateEpoch(1, voters)
+    has_payload = MagicMock(return_value=False)
+    pacing = PayloadPacing(voters[1], has_payload, poll_interval=0.1, max_wait=0.25)
+
+    # Not the proposer
+    assert pacing.is_ready(epoch, 0, 0.0)
+    assert pacing.delay(epoch, 0, 0.0) == 0.0
+
+    assert not pacing.is_ready(epoch, 1, 0.0)
+    assert pacing.delay(epoch, 1, 0.0) == 0.1
+    assert pacing.delay(epoch, 1, 0.2) == pytest.approx(0.05)
+    assert pacing.is_ready(epoch, 1, 0.25)
+
+    has_payload.return_value = True
+    assert pacing.is_ready(epoch, 1, 0.0)
+
+
+@pytest.mark.asyncio
+async def test_node_paces_round_start():
+    voters = [os.urandom(16) for _ in range(4)]
+    has_payload = MagicMock(return_value=False)
+    node = Node(voters[1], PayloadPacing(voters[1], has_payload, poll_interval=0.1))
+    node.event_system.get_mediator = MagicMock()
+    mediator = node.event_system.get_mediator.return_value
+    node._nodes = voters
+    node._epoch_num, node._round_num = 1, 1
+
+    await node._start_new_round()
+    delay, event = mediator.execute.call_args[0]
+    assert delay == 0.1
+    assert event == PaceRoundEvent(1, 1, 0.1)
+    assert not event.deterministic
+
+    has_payload.return_value = True
+    await node._on_pace_round_event(event)
+    delay, event = mediator.execute.call_args[0]
+    assert delay == 0.0
+    assert isinstance(event, RoundStartEvent)
+    assert event.round_num == 1
+
+    # Epochs are cached per epoch number
+    node._pacing_policy = ImmediatePacing()
+    node._round_num = 2
+    await node._start_new_round()
+    assert mediator.execute.call_args[0][1].epoch is event.epoch
+
+    # Stale pacing is ignored
+    mediator.execute.reset_mock()
+    await node._on_pace_round_event(PaceRoundEvent(1, 1, 0.2))
+    mediator.execute.assert_not_called()
+    node.close()
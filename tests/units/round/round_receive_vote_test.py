@@ -1,8 +1,8 @@
 import random
 import pytest
-from lft.app.vote import DefaultVoteFactory
+from lft.app.vote import DefaultVote, DefaultVoteFactory
 from lft.consensus.round import TIMEOUT_PROPOSE, TIMEOUT_VOTE
-from lft.consensus.events import ReceiveDataEvent, ReceiveVoteEvent
+from lft.consensus.events import ReceiveDataEvent, RoundTimeoutEvent
 from lft.consensus.exceptions import InvalidEpoch, InvalidRound, AlreadyVoted
 from lft.event.mediators import DelayedEventMediator
 from tests.units.round.setup_items import setup_items
@@ -50,7 +50,8 @@ async def test_round_already_vote():
         same_vote = await round_._vote_factory.create_vote(b'test', candidate_data.id, epoch.num, round_num)
         with pytest.raises(AlreadyVoted):
             await round_._receive_vote(same_vote)
-        same_vote._id = b'1'
+        same_vote = DefaultVote(b'1', same_vote.data_id, same_vote.commit_id, same_vote.voter_id,
+                                same_vote.epoch_num, same_vote.round_num)
         await round_._receive_vote(same_vote)
 
         none_vote = round_._vote_factory.create_none_vote(epoch.num, round_num)
@@ -59,7 +60,8 @@ async def test_round_already_vote():
         same_none_vote = round_._vote_factory.create_none_vote(epoch.num, round_num)
         with pytest.raises(AlreadyVoted):
             await round_._receive_vote(same_none_vote)
-        same_none_vote._id = b'3'
+        same_none_vote = DefaultVote(b'3', same_none_vote.data_id, same_none_vote.commit_id, same_none_vote.voter_id,
+                                     same_none_vote.epoch_num, same_none_vote.round_num)
         await round_._receive_vote(same_none_vote)
 
 
@@ -119,13 +121,10 @@ async def test_round_reach_quorum(voter_num: int):
         none_vote = quorum_vote_factories[-1].create_none_vote(epoch.num, round_num)
         await round_.receive_vote(none_vote)
 
-        assert len(mediator.execute.call_args_list) == len(voters)
-
-        for voter, call_args in zip(voters, mediator.execute.call_args_list):
-            timeout, event = call_args[0]
-            assert timeout == TIMEOUT_VOTE
-            assert isinstance(event, ReceiveVoteEvent)
-            assert event.vote.is_lazy()
+        mediator.execute.assert_called_once()
+        timeout, event = mediator.execute.call_args_list[0][0]
+        assert timeout == TIMEOUT_VOTE
+        assert event == RoundTimeoutEvent(epoch.num, round_num)
         mediator.execute.reset_mock()
 
         none_vote = vote_factories[-1].create_none_vote(epoch.num, round_num)
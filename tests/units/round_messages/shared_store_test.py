@@ -0,0 +1,45 @@
+import os
+import pytest
+from lft.app.data import DefaultData
+from lft.app.vote import DefaultVoteFactory
+from lft.consensus.events import BroadcastVoteEvent
+from lft.event.mediators import DelayedEventMediator
+from tests.units.consensus.setup_consensus import setup_real_consensus, get_raised_events
+
+
+@pytest.mark.asyncio
+async def test_round_and_election_share_messages():
+    event_system, consensus, voters = await setup_real_consensus()
+    await consensus.round_start(consensus._get_epoch(1), 0)
+
+    data = DefaultData(id_=os.urandom(16), prev_id=b'genesis', proposer_id=voters[0], number=1,
+                       epoch_num=1, round_num=0, prev_votes=())
+    await consensus.receive_data(data)
+    round_ = consensus._round_pool.get_round(1, 0)
+    round_messages = round_._messages
+    assert round_._election._messages._round_messages is round_messages
+
+    vote = await DefaultVoteFactory(voters[1]).create_vote(data.id, b'genesis', 1, 0)
+    await consensus.receive_vote(vote)
+
+    assert round_messages.get_data(data.id) is data
+    assert vote in round_messages
+    assert round_messages.get_votes(data.id) == {vote.id: vote}
+    assert round_messages.get_voters_num(data.id) == 1
+
+
+@pytest.mark.asyncio
+async def test_none_vote_on_propose_timeout():
+    event_system, consensus, voters = await setup_real_consensus()
+    await consensus.round_start(consensus._get_epoch(1), 0)
+    assert not get_raised_events(event_system, BroadcastVoteEvent)
+
+    # LazyData is stored by Election at round start. The propose timeout delivers it again.
+    mediator = event_system.get_mediator(DelayedEventMediator)
+    delay, event = mediator.execute.call_args_list[0][0]
+    assert event.data.is_lazy()
+    await consensus.receive_data(event.data)
+
+    votes = [event.vote for event in get_raised_events(event_system, BroadcastVoteEvent)]
+    assert len(votes) == 1
+    assert votes[0].is_none()
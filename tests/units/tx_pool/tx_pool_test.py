@@ -0,0 +1,79 @@
+import os
+import pytest
+from lft.app.data import DefaultDataFactory, PayloadData
+from lft.app.tx_pool import TxPool, tx_hash
+from lft.serialization import Serializer
+
+
+def test_tx_pool():
+    txs = [os.urandom(100) for _ in range(5)]
+    tx_pool = TxPool(max_count=4, max_bytes=350)
+
+    assert tx_pool.submit(txs[0])
+    assert not tx_pool.submit(txs[0])
+    assert not tx_pool.submit(os.urandom(351))
+
+    # Evicted by bytes, the oldest first
+    for tx in txs[1:4]:
+        tx_pool.submit(tx)
+    assert len(tx_pool) == 3
+    assert txs[0] not in tx_pool
+    assert tx_pool.size_bytes == 300
+    assert tx_pool.evicted == 1
+
+    assert tx_pool.get_batch(max_count=2, max_bytes=1000) == tuple(txs[1:3])
+    assert tx_pool.get_batch(max_count=10, max_bytes=250) == tuple(txs[1:3])
+    assert tx_pool.get_batch(max_count=2, max_bytes=1000, excluded={tx_hash(txs[1])}) == tuple(txs[2:4])
+
+    assert tx_pool.remove([txs[1], txs[2], txs[4]]) == 2
+    assert len(tx_pool) == 1
+    assert tx_pool.size_bytes == 100
+
+
+@pytest.mark.asyncio
+async def test_payload_data():
+    node_id = os.urandom(16)
+    tx_pool = TxPool()
+    txs = [os.urandom(100) for _ in range(5)]
+    for tx in txs:
+        tx_pool.submit(tx)
+
+    data_factory = DefaultDataFactory(node_id, tx_pool=tx_pool, max_batch_count=3)
+    data = await data_factory.create_data(1, b'genesis', 1, 0, ())
+    assert isinstance(data, PayloadData)
+    assert data.payload == tuple(txs[:3])
+
+    empty_data = await DefaultDataFactory(node_id).create_data(1, b'genesis', 1, 0, ())
+    assert data.id != empty_data.id
+
+    serializer = Serializer()
+    deserialized = serializer.deserialize(serializer.serialize(data))
+    assert deserialized == data
+    assert deserialized.payload == data.payload
+
+
+@pytest.mark.asyncio
+async def test_payload_data_excludes_uncommitted_ancestors():
+    node_id = os.urandom(16)
+    tx_pool = TxPool()
+    txs = [os.urandom(100) for _ in range(8)]
+    for tx in txs:
+        tx_pool.submit(tx)
+
+    # Proposed data is not committed yet, its transactions are still in the pool
+    datums = {}
+    data_factory = DefaultDataFactory(node_id, tx_pool=tx_pool, max_batch_count=3, find_data=datums.get)
+    data1 = await data_factory.create_data(1, b'genesis', 1, 0, ())
+    datums[data1.id] = data1
+    data2 = await data_factory.create_data(2, data1.id, 1, 1, ())
+    datums[data2.id] = data2
+    data3 = await data_factory.create_data(3, data2.id, 1, 2, ())
+
+    assert data1.payload == tuple(txs[:3])
+    assert data2.payload == tuple(txs[3:6])
+    assert data3.payload == tuple(txs[6:])
+    assert len(tx_pool) == len(txs)
+
+    # Another data on the same prev data carries the same transactions
+    other_data2 = await data_factory.create_data(2, data1.id, 1, 2, ())
+    assert other_data2.payload == data2.payload